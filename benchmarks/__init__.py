@@ -0,0 +1,6 @@
+"""Benchmarks.
+
+One module per production module it measures, each with a `benchmark()` entry
+point. Run them from the project root:
+    python -m benchmarks.gaps
+"""
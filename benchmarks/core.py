@@ -0,0 +1,95 @@
+"""Start-up benchmark: time-to-first-apply and time-to-window for three start-up strategies."""
+
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+from src.core import KernelSurgeon
+from src.probe import ProbeResult
+from src.state import AdapterState, FakeAdapterBackend
+from src.topology import flat_topology
+
+class _DelayedBackend(FakeAdapterBackend):
+    """Fake backend with the per-call latency of a warm PowerShell worker."""
+    def set_adapter(self, name, changes):
+        time.sleep(0.12)
+        return super().set_adapter(name, changes)
+
+class _InstantProbe:
+    def verify(self) -> ProbeResult:
+        time.sleep(0.005)
+        return ProbeResult(True, 5.0, 1, 0, "bench")
+
+class _BenchSurgeon(KernelSurgeon):
+    """A surgeon whose discovery steps sleep for typical cold-boot durations."""
+    DELAYS = {"hw": 0.005, "polluted_cores": 1.2, "target_adapters": 0.9, "adapter_bindings": 0.35, "gateway_ip": 0.6}
+    serial: Optional[threading.Lock] = None  # Set to run the steps one after another, like the old constructor
+
+    def _step(self, name):
+        if self.serial is None: return time.sleep(self.DELAYS[name])
+        with self.serial: time.sleep(self.DELAYS[name])
+
+    def _load_hardware(self):
+        self._step("hw")
+        return flat_topology(8, 16)
+
+    def scan_polluted_cores(self):
+        self._step("polluted_cores")
+        return [0, 1]
+
+    def _scan_adapters(self):
+        self._step("target_adapters")
+        return ["Ethernet", "WiFi"]
+
+    def _scan_bindings(self):
+        self.discovery.get("target_adapters", fresh=True)
+        self._step("adapter_bindings")
+        return {}
+
+    def _get_default_gateway(self):
+        self._step("gateway_ip")
+        return "192.168.1.1"
+
+def benchmark(ui_import_s: float = 0.8) -> None:
+    """Times time-to-first-apply and time-to-window for three start-up strategies.
+
+    legacy:  UI import, then every discovery step one after another, then the window.
+    cold:    discovery steps run concurrently with each other and with the UI import.
+    profile: a stored hardware profile is used; revalidation runs in the background.
+    """
+    idle = AdapterState(0, 16, "Closest", 8, "Enabled", 0)
+
+    def run(strategy: str, data_dir: str) -> Tuple[float, float]:
+        _BenchSurgeon.serial = threading.Lock() if strategy == "legacy" else None
+        t0 = time.perf_counter()
+        if strategy == "legacy": time.sleep(ui_import_s)
+        surgeon = _BenchSurgeon(backend=_DelayedBackend({n: idle for n in ("Ethernet", "WiFi")}), data_dir=data_dir)
+        window_at = []
+
+        def open_window():
+            if strategy != "legacy": time.sleep(ui_import_s)
+            surgeon.topology, surgeon.polluted_cores  # The dashboard needs both before it can draw
+            if strategy == "legacy": surgeon.discovery.wait()
+            window_at.append(time.perf_counter())
+        ui = threading.Thread(target=open_window)
+        ui.start()
+        if strategy == "legacy": ui.join()
+
+        surgeon.probe = _InstantProbe()
+        base, size = surgeon.calculate_best_gap()
+        surgeon.safe_apply_mode(base, size, "NUMAStatic", "Disabled", size, "GAMING")
+        applied_at = time.perf_counter()
+        ui.join()
+        surgeon.discovery.wait()
+        surgeon.journal.close()
+        return (applied_at - t0) * 1000, (window_at[0] - t0) * 1000
+
+    warm_dir = tempfile.mkdtemp()
+    results = {"legacy": run("legacy", tempfile.mkdtemp()), "cold": run("cold", warm_dir)}
+    results["profile"] = run("profile", warm_dir)
+    for name, (apply_ms, window_ms) in results.items():
+        print(f"[Bench] {name:8} time-to-first-apply {apply_ms:7.0f} ms, time-to-window {window_ms:7.0f} ms")
+
+if __name__ == "__main__":
+    benchmark()
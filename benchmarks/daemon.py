@@ -0,0 +1,42 @@
+"""Idle footprint benchmark: the headless daemon against the daemon with the tray or dashboard attached."""
+
+import subprocess
+import time
+from typing import List, Tuple
+
+import psutil
+
+from src.config import launch_command
+
+def measure_idle(argv: List[str], settle: float = 15.0, duration: float = 30.0) -> Tuple[float, float]:
+    """Starts `argv` and reports its idle footprint, child processes included.
+
+    Returns:
+        (resident memory in MiB, average CPU percent of one core) over `duration`.
+    """
+    proc = subprocess.Popen(argv)
+    try:
+        time.sleep(settle)
+        root = psutil.Process(proc.pid)
+        procs = [root] + root.children(recursive=True)
+        start = [p.cpu_times() for p in procs]
+        time.sleep(duration)
+        cpu = sum(p.cpu_times().user + p.cpu_times().system - t.user - t.system for p, t in zip(procs, start))
+        rss = sum(p.memory_info().rss for p in procs)
+        return rss / 2**20, cpu / duration * 100
+    finally:
+        for child in psutil.Process(proc.pid).children(recursive=True): child.kill()
+        proc.kill()
+
+def benchmark() -> None:
+    """Compares the idle cost of the headless daemon against the daemon with the dashboard attached.
+
+    Stop any running daemon first: "--gui" starts its own when none is reachable,
+    which makes it the equivalent of the former all-in-one process.
+    """
+    for label, args in (("daemon", ["--daemon"]), ("daemon+tray", ["--tray"]), ("daemon+dashboard", ["--gui"])):
+        rss, cpu = measure_idle(launch_command(*args))
+        print(f"[Bench] {label:16} idle RSS {rss:7.1f} MiB, CPU {cpu:5.2f} %")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,27 @@
+"""Gap finder benchmark: `best_gap` over synthetic topologies."""
+
+import random
+import time
+from typing import Sequence
+
+from src.gaps import GapObjective, best_gap, group_segments, mask_from_indices
+
+def benchmark(widths: Sequence[int] = (4, 8, 16, 32, 64, 128, 256, 512, 1024), rounds: int = 200) -> None:
+    """Times `best_gap` over synthetic topologies with ~10% polluted cores."""
+    rng = random.Random(5)
+    objective = GapObjective(distance=1.0, p_core=0.5)
+    for n in widths:
+        groups = group_segments([64] * (n // 64) + ([n % 64] if n % 64 else []))
+        masks = []
+        for _ in range(rounds):
+            polluted = mask_from_indices(rng.sample(range(n), max(1, n // 10))) | 1
+            masks.append(((1 << n) - 1) & ~polluted)
+        p_cores = (1 << (n // 2)) - 1
+        t0 = time.perf_counter()
+        for clean in masks:
+            best_gap(clean, n, (8, 4, 2, 1), objective, groups, p_cores)
+        us = (time.perf_counter() - t0) / rounds * 1e6
+        print(f"[Bench] {n:>5} logical / {len(groups)} group(s): {us:8.1f} us per search")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,34 @@
+"""Dashboard benchmark: slider sweeps over the core grid and log bursts, full rebuild against incremental."""
+
+import time
+
+from src.gui import ConsoleLog, CpuCoreGrid
+
+def benchmark(tiles=256, messages=1000):
+    """Times slider sweeps over a grid and log bursts, full rebuild versus incremental."""
+    grid = CpuCoreGrid(tiles // 2, tiles, 0, 4, polluted_indices=[0, 1], p_core_indices=range(tiles // 2))
+    t0 = time.perf_counter()
+    for base in range(tiles):
+        grid.base = base
+        grid.build_grid()
+    full_ms = (time.perf_counter() - t0) * 1000
+    full_sent = grid.tiles_sent
+
+    grid.tiles_sent = 0
+    t0 = time.perf_counter()
+    for base in range(tiles): grid.update_config(base, 4)
+    inc_ms = (time.perf_counter() - t0) * 1000
+    print(f"[Bench] {tiles}-tile grid, {tiles} slider steps: rebuild {full_ms:.1f} ms ({full_sent} tiles sent), "
+          f"incremental {inc_ms:.1f} ms ({grid.tiles_sent} tiles sent)")
+
+    console = ConsoleLog()
+    t0 = time.perf_counter()
+    for n in range(messages): console.log(f"[Core] message {n}")
+    burst_ms = (time.perf_counter() - t0) * 1000
+    while console._queue: time.sleep(0.001)
+    time.sleep(console.FLUSH_INTERVAL * 2)
+    print(f"[Bench] {messages}-message burst: logged in {burst_ms:.1f} ms, {console.flushes} UI update(s) instead of {messages}, "
+          f"{len(console.log_view.controls)} lines kept")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,44 @@
+"""Launch watcher benchmark: spawn-to-detection latency and watcher CPU cost."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from src.launchwatch import LaunchEvent, LaunchWatcher
+from src.matcher import GameMatcher
+
+def benchmark(launches: int = 20) -> None:
+    """Starts short-lived Python processes and reports spawn-to-detection latency and watcher CPU cost."""
+    exe = psutil.Process().name()
+    seen = {}
+    done = threading.Event()
+
+    def on_launch(event: LaunchEvent) -> None:
+        seen[event.pid] = event.detected
+        done.set()
+
+    watcher = LaunchWatcher(on_launch, lambda: GameMatcher([exe])).start()
+    time.sleep(0.5)
+    cpu0 = psutil.Process().cpu_times()
+    t_start = time.monotonic()
+    latencies = []
+    for _ in range(launches):
+        done.clear()
+        spawned = time.monotonic()
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.6)"])
+        if done.wait(2.0) and child.pid in seen: latencies.append((seen[child.pid] - spawned) * 1000)
+        child.wait()
+    elapsed = time.monotonic() - t_start
+    cpu1 = psutil.Process().cpu_times()
+    watcher.stop()
+    latencies.sort()
+    cost = ((cpu1.user + cpu1.system) - (cpu0.user + cpu0.system)) / elapsed * 100
+    print(f"[Bench] {watcher.source}: {len(latencies)}/{launches} launches seen, spawn-to-detection "
+          f"median {latencies[len(latencies) // 2]:.0f} ms, max {latencies[-1]:.0f} ms; "
+          f"watcher process CPU {cost:.2f} % (incl. spawning)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,49 @@
+"""Placement controller benchmark: synthetic load traces through tuned and naive controllers."""
+
+import random
+from typing import List
+
+from src.placement import PlacementController, simulate
+
+def _traces(n: int = 16, steps: int = 600, seed: int = 17):
+    """Synthetic traces: a step disturbance, load flapping between two windows, and plain noise."""
+    rng = random.Random(seed)
+
+    def noise() -> List[float]:
+        return [max(0.0, rng.gauss(8.0, 6.0)) for _ in range(n)]
+
+    step_trace = []
+    for t in range(steps):
+        row = noise()
+        if t >= 60:
+            for c in range(n - 4, n): row[c] += 60.0  # A game thread lands on the default window
+        step_trace.append(row)
+
+    flap_trace = []
+    for t in range(steps):
+        row = noise()
+        hot = range(n - 4, n) if (t // 10) % 2 == 0 else range(n - 8, n - 4)
+        for c in hot: row[c] += 45.0
+        flap_trace.append(row)
+
+    spiky_trace = []
+    for t in range(steps):
+        row = noise()
+        if rng.random() < 0.2: row[rng.randrange(n)] += 50.0  # Short bursts on random cores
+        spiky_trace.append(row)
+    return {"step": step_trace, "flapping": flap_trace, "spiky noise": spiky_trace}
+
+def benchmark() -> None:
+    """Replays the synthetic traces through the tuned controller and a naive one (no threshold, hysteresis, cooldown or clearance)."""
+    n = 16
+    start = (n - 4, 4)
+    for name, trace in _traces(n).items():
+        for label, controller in (("tuned", PlacementController()),
+                                  ("naive", PlacementController(threshold=0.0, confirm=1, cooldown=0.0, keep_clear=False))):
+            r = simulate(trace, controller, start)
+            settled = f"settled at step {r.settled_at}" if r.settled_at is not None else "never moved"
+            print(f"[Bench] {name:11} {label}: {r.switches:3} switches, {settled:20}, "
+                  f"window on busy cores {r.hot_steps:3}/{len(trace)} steps, mean window load {r.mean_load:5.1f} %")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,102 @@
+"""Process watcher benchmark: a full name scan against incremental ticks."""
+
+import random
+import time
+from collections import namedtuple
+from typing import Dict, List, Tuple
+
+from src.matcher import GameMatcher
+from src.procwatch import ProcessWatcher
+
+_CpuTimes = namedtuple("_CpuTimes", "user system")
+
+# Rough cost of the psutil calls on Windows, each an OpenProcess plus a query
+NAME_COST = 20e-6
+QUERY_COST = 5e-6
+
+def _spend(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end: pass
+
+class _SyntheticProcess:
+    """A process handle whose queries take about as long as psutil's."""
+    __slots__ = ("pid", "_name", "_born", "_cpu")
+    name_calls = 0
+    queries = 0
+
+    def __init__(self, pid: int, name: str):
+        self.pid = pid
+        self._name = name
+        self._born = time.time() - 60.0
+        self._cpu = 0.0
+
+    def name(self) -> str:
+        _SyntheticProcess.name_calls += 1
+        _spend(NAME_COST)
+        return self._name
+
+    def create_time(self) -> float:
+        _SyntheticProcess.queries += 1
+        _spend(QUERY_COST)
+        return self._born
+
+    def is_running(self) -> bool:
+        return self.create_time() == self._born
+
+    def cpu_times(self) -> _CpuTimes:
+        _SyntheticProcess.queries += 1
+        _spend(QUERY_COST)
+        self._cpu += 0.01
+        return _CpuTimes(self._cpu, 0.0)
+
+class _SyntheticTable:
+    """A process table that churns a fraction of its PIDs on every call."""
+
+    def __init__(self, size: int, churn: float = 0.01, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 4
+        self.procs: Dict[int, _SyntheticProcess] = {}
+        for _ in range(size): self._spawn()
+
+    def _spawn(self) -> None:
+        pid = self.next_pid
+        self.next_pid += 4
+        self.procs[pid] = _SyntheticProcess(pid, f"Proc{self.rng.randrange(2000)}.EXE")
+
+    def pids(self) -> List[int]:
+        for pid in self.rng.sample(list(self.procs), max(1, int(len(self.procs) * self.churn))):
+            del self.procs[pid]
+            self._spawn()
+        return list(self.procs)
+
+def benchmark(sizes: Tuple[int, ...] = (1000, 5000, 10000), ticks: int = 50) -> None:
+    """Compares a full name scan against incremental ticks on synthetic tables."""
+    games = {"cs2.exe", "proc17.exe", "proc1999.exe"}
+    for size in sizes:
+        table = _SyntheticTable(size)
+        _SyntheticProcess.name_calls = 0
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            for pid in table.pids():
+                table.procs[pid].name().lower() in games
+        full_ms = (time.perf_counter() - t0) / ticks * 1000
+        full_calls = _SyntheticProcess.name_calls / ticks
+
+        table = _SyntheticTable(size)
+        watcher = ProcessWatcher(table.pids, table.procs.__getitem__)
+        watcher.set_matcher(GameMatcher(sorted(games)))
+        watcher.tick()
+        _SyntheticProcess.name_calls = _SyntheticProcess.queries = 0
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            watcher.tick()
+            watcher.active_game(5.0)
+        inc_ms = (time.perf_counter() - t0) / ticks * 1000
+        inc_calls = _SyntheticProcess.name_calls / ticks
+        inc_queries = _SyntheticProcess.queries / ticks
+        print(f"[Bench] {size:>6} procs: full scan {full_ms:7.3f} ms/tick ({full_calls:.0f} name lookups), "
+              f"incremental {inc_ms:7.3f} ms/tick ({inc_calls:.0f} name lookups, {inc_queries:.0f} time queries)")
+
+if __name__ == "__main__":
+    benchmark()
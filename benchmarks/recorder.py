@@ -0,0 +1,55 @@
+"""Session recorder benchmark: per-tick `record` cost and a full scan of a month of ticks."""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from src.recorder import FLAG_SWITCH, MODES, CoreLoad, SessionRecorder, list_days, np, segments, summarize
+
+def benchmark(days: int = 30, tick: float = 2.0, cores: int = 16) -> None:
+    """Times `record` per tick, then writes `days` days of ticks and scans them all."""
+    rng = random.Random(24)
+    root = tempfile.mkdtemp(prefix="rss-rec-")
+    try:
+        load = [rng.uniform(0, 100) for _ in range(cores)]
+        games = [(4242, "cs2.exe", 120.0), (5150, "discord.exe", 3.0)]
+        clock = [1_700_000_000.0]
+        rec = SessionRecorder(root, retention_days=days + 1, load_fn=lambda: load, clock=lambda: clock[0])
+        per_day = int(86400 / tick)
+        t0 = time.perf_counter()
+        for i in range(per_day * days):
+            clock[0] += tick
+            rec.record("GAMING" if i % 1000 < 600 else "DESKTOP", games if i % 1000 < 600 else (),
+                       1500.0 if i % 1000 in (0, 600) else 0.0, FLAG_SWITCH if i % 1000 in (0, 600) else 0)
+        rec.close()
+        per_tick_us = (time.perf_counter() - t0) / (per_day * days) * 1e6
+        size = sum(os.path.getsize(os.path.join(root, d, f)) for d in list_days(root) for f in os.listdir(os.path.join(root, d)))
+        source = CoreLoad()
+        source()
+        t0 = time.perf_counter()
+        for _ in range(200): source()
+        load_us = (time.perf_counter() - t0) / 200 * 1e6
+        print(f"[Bench] record(): {per_tick_us:.1f} us/tick incl. flushes; real per-core load sample {load_us:.0f} us; "
+              f"{size / days / 1e6:.2f} MB/day at a {tick:g} s tick ({cores} cores)")
+
+        t0 = time.perf_counter()
+        if np is not None:
+            summary = summarize(root)
+            scanned = summary["rows"]
+            what = f"{summary['switches']} switches, GAMING {summary['ticks']['GAMING']} ticks"
+        else:
+            scanned = gaming = 0
+            for seg in segments(root):
+                scanned += seg.rows
+                gaming += seg.column("mode").tobytes().count(MODES.index("GAMING"))
+            what = f"GAMING {gaming} ticks (memoryview, no NumPy)"
+        scan_s = time.perf_counter() - t0
+        print(f"[Bench] full scan of {days} days ({scanned:,} rows): {scan_s * 1000:.0f} ms, "
+              f"{scanned / scan_s / 1e6:.1f} M rows/s; {what}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,20 @@
+"""Autopilot simulator benchmark: a week of synthetic days, then a parameter grid across a pool."""
+
+import os
+import time
+
+from src.simulator import combine, format_table, grid, run, sweep, synthetic_trace
+
+def benchmark(days: int = 7) -> None:
+    """Replays a week of synthetic days at the default settings, then a small grid across a pool."""
+    traces = [synthetic_trace(24, seed) for seed in range(days)]
+    report = combine(run(trace) for trace in traces)
+    print(f"[Bench] {days} days, {report.ticks} ticks in {report.wall_s:.2f} s: {report.speedup:,.0f}x real time, "
+          f"{report.wall_s / report.ticks * 1e6:.0f} us/tick")
+    t0 = time.perf_counter()
+    results = sweep(traces, grid(hysteresis=(0, 20, 60, 120), cpu_threshold=(2.0, 5.0, 10.0), launch_events=(False, True)))
+    print(f"[Bench] {len(results)} parameter sets x {days} days in {time.perf_counter() - t0:.1f} s across {os.cpu_count()} CPUs")
+    print(format_table(results))
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,33 @@
+"""Span tracing benchmark: the per-call cost of `traced` and `span`, disabled and enabled."""
+
+import time
+from typing import Any, Callable
+
+from src import tracing
+from src.tracing import Tracer, span, traced
+
+def benchmark(calls: int = 500_000) -> None:
+    """Measures the per-call cost of `traced` and `span`, disabled and enabled."""
+    def plain(): pass
+    wrapped = traced("bench")(plain)
+
+    def per_call(fn: Callable[[], Any]) -> float:
+        t0 = time.perf_counter_ns()
+        for _ in range(calls): fn()
+        return (time.perf_counter_ns() - t0) / calls
+
+    def with_span():
+        with span("bench"): pass
+
+    saved, tracing._tracer = tracing._tracer, None
+    base = per_call(plain)
+    off_deco, off_span = per_call(wrapped), per_call(with_span)
+    tracing._tracer = Tracer(None, capacity=calls)
+    on_deco, on_span = per_call(wrapped), per_call(with_span)
+    tracing._tracer = saved
+    print(f"[Bench] plain call {base:.0f} ns")
+    print(f"[Bench] disabled: @traced +{off_deco - base:.0f} ns, span() +{off_span - base:.0f} ns per call")
+    print(f"[Bench] enabled:  @traced +{on_deco - base:.0f} ns, span() +{on_span - base:.0f} ns per call (ring of {calls})")
+
+if __name__ == "__main__":
+    benchmark()
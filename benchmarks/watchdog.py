@@ -0,0 +1,67 @@
+"""Watchdog benchmark: kill-to-rollback time for a killed or frozen Sentinel, with dry-run shells."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+from src.journal import SwitchJournal
+from src.rollback import prepare
+from src.state import ApplyPlan
+from src.watchdog import WatchdogClient
+
+def _sentinel(argv_json: str) -> None:
+    """Child process for the benchmark: arms a plan and waits to be killed."""
+    client = WatchdogClient(json.loads(argv_json) + ["--parent", str(os.getpid())], interval=0.1)
+    client.arm(prepare(ApplyPlan({"Ethernet": {"base_proc": 0, "queues": 4, "interrupt_mod": "Enabled"},
+                                  "WiFi": {"interrupt_mod": "Enabled"}}, {}, {"MaxNumRSSQueues": 4}, {}), "GAMING"))
+    print("armed", flush=True)
+    threading.Event().wait()
+
+def benchmark(rounds: int = 5) -> None:
+    """Kills (and freezes) a stand-in Sentinel and times kill-to-rollback with dry-run shells."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    for case in ("kill", "hang"):
+        timings = []
+        for _ in range(rounds):
+            work = tempfile.mkdtemp(prefix="rss-wd-")
+            log, journal_path = os.path.join(work, "dry.log"), os.path.join(work, "journal.log")
+            journal = SwitchJournal(journal_path)
+            journal.begin("GAMING", ApplyPlan({"Ethernet": {"interrupt_mod": "Disabled"}}, {"Ethernet": {"interrupt_mod": "Enabled"}}))
+            journal.close()
+            argv = [sys.executable, "-m", "src.watchdog", "--dry-run", log, "--journal", journal_path, "--timeout", "1.0"]
+            child = subprocess.Popen([sys.executable, "-c", f"from benchmarks.watchdog import _sentinel; _sentinel({json.dumps(json.dumps(argv))})"],
+                                     stdout=subprocess.PIPE, text=True, env=env, cwd=root)
+            child.stdout.readline()
+            time.sleep(1.0)  # Let the watchdog start its dry-run shells
+            proc = psutil.Process(child.pid)
+            t0 = time.monotonic()
+            if case == "kill": proc.kill()
+            else: proc.suspend()
+            while time.monotonic() - t0 < 10:
+                try:
+                    with open(log, "r", encoding="utf-8") as f: done = f.read().count("Set-Net") >= 3
+                except OSError: done = False
+                if done: break
+                time.sleep(0.002)
+            timings.append((time.monotonic() - t0) * 1000 if done else float("inf"))
+            if case == "hang":
+                try: proc.kill()
+                except psutil.Error: pass
+            child.wait()
+            time.sleep(0.3)
+            leftover = SwitchJournal(journal_path)
+            assert leftover.pending() is None and leftover.originals().empty, "journal not reset after rollback"
+            leftover.close()
+        timings.sort()
+        print(f"[Bench] Sentinel {case}: all rollback commands executed {timings[len(timings) // 2]:.0f} ms (median), "
+              f"{timings[-1]:.0f} ms (max) after the {'kill' if case == 'kill' else 'freeze (1 s heartbeat timeout)'}")
+
+if __name__ == "__main__":
+    benchmark()
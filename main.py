@@ -8,6 +8,11 @@ import sys
 import os
 import traceback
 import argparse
+import subprocess
+import time
+
+from src import tracing
+from src.tracing import instant, span
 
 # Use the same logic as src.config for paths
 def get_app_path():
@@ -19,7 +24,7 @@ BASE_DIR = get_app_path()
 os.chdir(BASE_DIR)
 DEBUG_FILE = os.path.join(BASE_DIR, "debug_start.txt")
 ERROR_FILE = os.path.join(BASE_DIR, "error.log")
-TRACE_FILE = os.path.join(BASE_DIR, "debug_trace.txt")
+TRACE_FILE = os.path.join(BASE_DIR, "debug_trace_{role}.json")
 
 try:
     with open(DEBUG_FILE, "w") as f:
@@ -48,32 +53,67 @@ def log_crash(msg):
 
 def main():
     try:
-        with open(TRACE_FILE, "a") as f:
-            f.write("Main: Start\n")
-            
         parser = argparse.ArgumentParser(description="RSS Sentinel Controller")
         parser.add_argument('--tray', action='store_true', help='Run in background (System Tray)')
+        parser.add_argument('--daemon', action='store_true', help='Run in background without any UI')
         parser.add_argument('--gui', action='store_true', help='Run the Configuration Dashboard')
+        parser.add_argument('--trace', action='store_true', help='Record a Chrome/Perfetto trace (debug_trace_<role>.json)')
+        parser.add_argument('--watchdog', action='store_true', help=argparse.SUPPRESS)  # Started by the daemon, see src.watchdog
+        parser.add_argument('--parent', type=int, default=None, help=argparse.SUPPRESS)
+        parser.add_argument('--journal', default=None, help=argparse.SUPPRESS)
         
         args = parser.parse_args()
 
-        # In v3.0 Unified Architecture, we always launch the GUI entry point.
-        # The GUI module handles the tray thread and autopilot internally.
-        # Ideally, we would pass 'start_minimized=True' if args.tray is set,
-        # but Flet's current architecture makes starting purely hidden tricky.
-        # The user will see the window pop up and can close it to tray.
-        with open(TRACE_FILE, "a") as f:
-            f.write("Main: Importing GUI\n")
-            
-        from src.gui import run_gui
-        
-        with open(TRACE_FILE, "a") as f:
-            f.write("Main: Imported GUI. Calling run_gui\n")
-            
-        run_gui(start_minimized=args.tray)
-        
-        with open(TRACE_FILE, "a") as f:
-            f.write("Main: run_gui returned (Unexpected)\n")
+        if args.watchdog:
+            from src.watchdog import serve
+            serve(args.parent, args.journal)
+            return
+
+        # Tracing is inherited by the daemon this process may spawn
+        if args.trace: os.environ[tracing.TRACE_ENV] = "1"
+        if os.environ.get(tracing.TRACE_ENV):
+            role = "daemon" if args.daemon else "tray" if args.tray else "gui"
+            tracing.enable(TRACE_FILE.format(role=role), process_name=f"rss-sentinel {role}")
+            instant("main start", frozen=bool(getattr(sys, 'frozen', False)))
+
+        # The autopilot runs in a headless daemon (optionally with a tray icon).
+        # The dashboard is a separate client process that attaches over local IPC,
+        # so the always-on part never loads the UI toolkit.
+        if args.daemon or args.tray:
+            with span("import daemon", cat="startup"):
+                from src.daemon import run_service
+            run_service(tray=args.tray)
+            return
+
+        from src.ipc import ControlClient, ControlError
+        try:
+            with span("probe daemon", cat="startup"):
+                ControlClient().status()
+            daemon = None
+        except ControlError:
+            # No daemon yet: start one (with tray) and import the UI while it boots
+            with span("spawn daemon", cat="startup"):
+                from src.config import launch_command
+                flags = subprocess.CREATE_NEW_PROCESS_GROUP | getattr(subprocess, "DETACHED_PROCESS", 0) if sys.platform == "win32" else 0
+                daemon = subprocess.Popen(launch_command("--tray"), creationflags=flags, start_new_session=sys.platform != "win32")
+
+        with span("import gui", cat="startup"):
+            from src.gui import run_gui
+
+        with span("attach daemon", cat="startup"):
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    client = ControlClient()
+                    client.status()
+                    break
+                except ControlError:
+                    if time.monotonic() > deadline or (daemon is not None and daemon.poll() is not None):
+                        raise RuntimeError("daemon did not come up")
+                    time.sleep(0.2)
+
+        run_gui(client)
+        instant("dashboard closed")
             
     except ImportError as e:
         log_crash(f"Dependency Error: {e}")
@@ -0,0 +1,85 @@
+"""Multi-NIC Core Allocator Module.
+
+This module splits the clean logical processors between several adapters so each
+one gets its own RSS window instead of every NIC piling onto the same gap.
+
+Adapters are served in order of weight (user priority or link speed). Each gets
+a power-of-two share of the clean cores proportional to its weight, carved out
+with the gap finder. When the clean cores run out, the remaining adapters share
+the window with the lowest total weight already on it, and are flagged as shared.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from src.gaps import GapObjective, Segment, best_gap
+
+class AdapterDemand(NamedTuple):
+    """An adapter asking for cores. Higher weight means a larger, earlier pick."""
+    name: str
+    weight: float
+
+class Allocation(NamedTuple):
+    """The RSS window assigned to one adapter (global processor numbering)."""
+    base: int
+    size: int
+    shared: bool
+
+def _pow2_floor(value: float) -> int:
+    size = 1
+    while size * 2 <= value: size *= 2
+    return size
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+def allocate(adapters: Sequence[AdapterDemand], clean_mask: int, n: int, max_per_adapter: int = 4,
+             segments: Optional[Sequence[Segment]] = None, objective: Optional[GapObjective] = None,
+             p_core_mask: int = 0, smt: bool = True) -> Dict[str, Allocation]:
+    """Assigns non-overlapping RSS windows to adapters where possible.
+
+    Args:
+        adapters: Adapters and their weights.
+        clean_mask: Bitset of usable logical processors.
+        n: Number of logical processors.
+        max_per_adapter: Upper bound on any single window.
+        segments: Ranges a window must stay inside (groups, cache domains).
+        objective: Gap ranking weights.
+        p_core_mask: Bitset of performance-class processors.
+        smt: Whether SMT pairing should be rewarded.
+
+    Returns:
+        Adapter name -> `Allocation`. Empty if no processor is clean.
+    """
+    if not adapters: return {}
+    ordered = sorted(adapters, key=lambda a: (-a.weight, a.name))
+    total_weight = sum(max(a.weight, 0.0) for a in ordered) or float(len(ordered))
+    free = clean_mask & ((1 << n) - 1)
+    budget = _popcount(free)
+
+    result: Dict[str, Allocation] = {}
+    load: Dict[int, float] = {}  # window base -> weight already placed there
+    for demand in ordered:
+        share = budget * (max(demand.weight, 0.0) or 1.0) / total_weight
+        target = max(1, min(max_per_adapter, _pow2_floor(share)))
+        sizes = [s for s in (target, target // 2, target // 4, 1) if s >= 1]
+        window = best_gap(free, n, sorted(set(sizes), reverse=True), objective, segments, p_core_mask, smt) if free else None
+        if window is not None:
+            free &= ~(((1 << window.size) - 1) << window.base)
+            result[demand.name] = Allocation(window.base, window.size, False)
+            load[window.base] = demand.weight
+            continue
+
+        # Out of clean cores: share the least-loaded existing window
+        if not result: return {}
+        owner = min((a for a in result.values() if not a.shared), key=lambda a: (load.get(a.base, 0.0), -a.size))
+        result[demand.name] = Allocation(owner.base, owner.size, True)
+        load[owner.base] = load.get(owner.base, 0.0) + demand.weight
+    return result
+
+def describe(allocations: Dict[str, Allocation]) -> List[str]:
+    """One human-readable line per adapter, for logs and the dashboard."""
+    lines = []
+    for name, a in sorted(allocations.items(), key=lambda item: item[1].base):
+        cores = f"{a.base}-{a.base + a.size - 1}" if a.size > 1 else f"{a.base}"
+        lines.append(f"{name}: cores {cores}{' (shared)' if a.shared else ''}")
+    return lines
@@ -2,13 +2,22 @@
 
 This module handles the persistent storage of application settings using a JSON file.
 It implements the Singleton pattern to ensure a unified state across the application.
+
+Readers get an immutable, versioned snapshot that is swapped atomically, so they
+never need a lock. Writes are coalesced and flushed to disk after a short delay
+through a temp file + rename, and reloads cost a single `stat` when the file is
+unchanged.
 """
 
+import atexit
 import json
 import os
 import sys
 import threading
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+from src.matcher import normalize_rule
 
 def get_app_path():
     """Returns the base path for the application."""
@@ -19,32 +28,70 @@ def get_app_path():
     # If running from source, it's the project root (one level up from src)
     return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+def launch_command(*args: str) -> List[str]:
+    """Returns the command line that starts this application with `args`."""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, *args]
+    return [sys.executable, os.path.join(get_app_path(), "main.py"), *args]
+
 # --- PATH CONSTANTS ---
 PROJECT_ROOT = get_app_path()
 
 CONFIG_FILE_PATH = os.path.join(PROJECT_ROOT, "rss_config.json")
 DEBUG_FILE = os.path.join(PROJECT_ROOT, "debug_start.txt")
-TRACE_FILE = os.path.join(PROJECT_ROOT, "debug_trace.txt")
+TRACE_FILE = os.path.join(PROJECT_ROOT, "debug_trace_{role}.json")  # See src.tracing
 ERROR_FILE = os.path.join(PROJECT_ROOT, "error.log")
 
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict): return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list): return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping): return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple): return [_thaw(v) for v in value]
+    return value
+
+class ConfigSnapshot(NamedTuple):
+    """An immutable view of the configuration. Lists are exposed as tuples."""
+    version: int
+    data: Mapping[str, Any]
+
 class ConfigManager:
     """Singleton class for managing application configuration.
     
     Attributes:
         _instance: The singleton instance.
-        _lock: Thread lock for safe file operations.
-        data: The current configuration dictionary.
+        _lock: Guards singleton creation.
+        FLUSH_DELAY: Seconds of write inactivity before pending changes hit the disk.
     """
     _instance: Optional['ConfigManager'] = None
     _lock: threading.Lock = threading.Lock()
     
     CONFIG_FILE: str = CONFIG_FILE_PATH
+    FLUSH_DELAY: float = 0.5
     DEFAULT_CONFIG: Dict[str, Any] = {
         "manual_mode": False,
         "manual_base": 0,
         "manual_max": 8,
         "manual_profile": "Closest",
         "autostart": False,
+        "probe_deadline": 5.0,
+        "probe_max_failures": 3,
+        "bench_enabled": True,
+        "bench_samples": 200,
+        "bench_host": "",  # Echo target; empty for the default gateway
+        "bench_port": 0,  # UDP echo port on the target; 0 for ICMP echo
+        "bench_max_loss": 0.05,  # Runs that lost a larger share of probes are dropped
+        "bench_settle": 1.0,  # Seconds after an apply before the link is checked and measured
+        "adapter_priority": {},
+        "placement_enabled": True,
+        "placement_threshold": 15.0,
+        "placement_cooldown": 30.0,
+        "profile_tuning": False,
+        "metrics_port": 9464,
+        "recording_days": 30,
+        "watchdog_enabled": True,
         "games_list": [
             "cs2.exe", "dota2.exe", "valorant.exe", "valorant-win64-shipping.exe",
             "r5apex.exe", "cod.exe", "mw2.exe", "pubg.exe", "rainbowsix.exe",
@@ -55,22 +102,71 @@ class ConfigManager:
     def __new__(cls) -> 'ConfigManager':
         with cls._lock:
             if cls._instance is None:
-                cls._instance = super(ConfigManager, cls).__new__(cls)
-                cls._instance._load()
+                inst = super(ConfigManager, cls).__new__(cls)
+                inst._write_lock = threading.RLock()
+                inst._snapshot = ConfigSnapshot(0, _freeze(cls.DEFAULT_CONFIG))
+                inst._file_sig = None
+                inst._dirty = False
+                inst._flush_timer = None
+                inst._game_keys = (None, frozenset())
+                inst._load()
+                atexit.register(inst.flush)
+                cls._instance = inst
         return cls._instance
 
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.CONFIG_FILE)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
     def _load(self) -> None:
         """Loads configuration from the disk."""
-        self.data = self.DEFAULT_CONFIG.copy()
-        if os.path.exists(self.CONFIG_FILE):
-            try:
-                with open(self.CONFIG_FILE, 'r') as f:
-                    loaded_data = json.load(f)
-                    # Merge defaults to ensure all keys exist
-                    for key, value in loaded_data.items():
-                        self.data[key] = value
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"[ConfigManager] Load error: {e}")
+        with self._write_lock:
+            data = dict(self.DEFAULT_CONFIG)
+            sig = self._stat()
+            if sig is not None:
+                try:
+                    with open(self.CONFIG_FILE, 'r') as f:
+                        loaded_data = json.load(f)
+                        # Merge defaults to ensure all keys exist
+                        for key, value in loaded_data.items():
+                            data[key] = value
+                except (json.JSONDecodeError, IOError) as e:
+                    print(f"[ConfigManager] Load error: {e}")
+            self._file_sig = sig
+            self._snapshot = ConfigSnapshot(self._snapshot.version + 1, _freeze(data))
+
+    def reload(self) -> bool:
+        """Re-reads the file only if its mtime/size changed since the last load or flush.
+
+        Local changes that have not been flushed yet take precedence and suppress
+        the reload.
+
+        Returns:
+            True if a new snapshot was loaded.
+        """
+        if self._stat() == self._file_sig or self._dirty:
+            return False
+        self._load()
+        return True
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Returns the current immutable snapshot. Safe to call from any thread."""
+        return self._snapshot
+
+    @property
+    def data(self) -> Mapping[str, Any]:
+        return self._snapshot.data
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns a plain, mutable copy of the current configuration."""
+        return _thaw(self._snapshot.data)
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
 
     def get(self, key: str) -> Any:
         """Retrieves a configuration value.
@@ -81,55 +177,104 @@ class ConfigManager:
         Returns:
             The value associated with the key, or the default value if not found.
         """
-        return self.data.get(key, self.DEFAULT_CONFIG.get(key))
+        return self._snapshot.data.get(key, self.DEFAULT_CONFIG.get(key))
 
     def set(self, key: str, value: Any) -> None:
-        """Sets a configuration value and saves to disk.
+        """Sets a configuration value and schedules a save to disk.
         
         Args:
             key: The configuration key.
             value: The value to set.
         """
-        self.data[key] = value
-        self.save()
+        self.update({key: value})
+
+    @classmethod
+    def check(cls, values: Mapping[str, Any]) -> None:
+        """Rejects unknown keys and values whose type differs from the default's.
+
+        Raises:
+            ValueError: Naming the first offending key.
+        """
+        for key, value in values.items():
+            if key not in cls.DEFAULT_CONFIG: raise ValueError(f"unknown setting {key!r}")
+            default = cls.DEFAULT_CONFIG[key]
+            if isinstance(default, bool) or isinstance(value, bool): ok = type(value) is type(default)
+            elif isinstance(default, float): ok = isinstance(value, (int, float))
+            else: ok = isinstance(value, type(default))
+            if not ok: raise ValueError(f"{key} must be {type(default).__name__}, got {type(value).__name__}")
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Sets several configuration values as one new snapshot.
+
+        Args:
+            values: Mapping of keys to new values.
+        """
+        with self._write_lock:
+            data = dict(self._snapshot.data)
+            data.update({k: _freeze(v) for k, v in values.items()})
+            self._snapshot = ConfigSnapshot(self._snapshot.version + 1, MappingProxyType(data))
+            self._dirty = True
+            if self._flush_timer is not None: self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _game_rules(self) -> FrozenSet[str]:
+        """Normalized `games_list` rules, rebuilt only when the list changes."""
+        games = self.get("games_list")
+        if self._game_keys[0] is not games:
+            self._game_keys = (games, frozenset(normalize_rule(g) for g in games))
+        return self._game_keys[1]
 
     def add_game(self, game_exe: str) -> bool:
-        """Adds a game to the monitoring list.
+        """Adds a game rule to the monitoring list.
 
         Args:
-            game_exe: The executable name of the game (e.g., 'game.exe').
+            game_exe: An executable name ('game.exe'), a wildcard ('*-win64-shipping.exe'),
+                an install path ('D:\\Games\\*') or an exclusion ('!launcher.exe'). See `src.matcher`.
 
         Returns:
-            True if added, False if already exists.
+            True if added, False if already exists (compared case-insensitively).
         """
-        games = self.data.get("games_list", [])
-        if game_exe not in games:
-            games.append(game_exe)
-            self.set("games_list", games)
+        with self._write_lock:
+            if normalize_rule(game_exe) in self._game_rules(): return False
+            self.set("games_list", list(self.get("games_list")) + [game_exe])
             return True
-        return False
 
     def remove_game(self, game_exe: str) -> bool:
-        """Removes a game from the monitoring list.
+        """Removes a game rule from the monitoring list.
 
         Args:
-            game_exe: The executable name to remove.
+            game_exe: The rule to remove (compared case-insensitively).
 
         Returns:
             True if removed, False if not found.
         """
-        games = self.data.get("games_list", [])
-        if game_exe in games:
-            games.remove(game_exe)
-            self.set("games_list", games)
+        with self._write_lock:
+            key = normalize_rule(game_exe)
+            if key not in self._game_rules(): return False
+            self.set("games_list", [g for g in self.get("games_list") if normalize_rule(g) != key])
             return True
-        return False
+
+    def flush(self) -> None:
+        """Writes pending changes to disk, if any."""
+        with self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty: self.save()
 
     def save(self) -> None:
-        """Persists the current configuration to disk."""
-        try:
-            with self._lock:
-                with open(self.CONFIG_FILE, 'w') as f:
-                    json.dump(self.data, f, indent=4)
-        except IOError as e:
-            print(f"[ConfigManager] Save error: {e}")
\ No newline at end of file
+        """Persists the current configuration to disk atomically (temp file + rename)."""
+        with self._write_lock:
+            tmp_path = self.CONFIG_FILE + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(_thaw(self._snapshot.data), f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.CONFIG_FILE)
+                self._file_sig = self._stat()
+                self._dirty = False
+            except IOError as e:
+                print(f"[ConfigManager] Save error: {e}")
@@ -1,220 +1,469 @@
-import subprocess
-import winreg
+import base64
 import json
 import time
 import os
-from typing import Dict, List, Optional, Union, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union, Tuple
+
+from src.allocator import AdapterDemand, Allocation, allocate, describe
+from src.config import PROJECT_ROOT
+from src.discovery import Discovery, FactCodec
+from src.gaps import GapObjective, best_gap, group_segments, indices_from_mask, mask_from_indices, split_segments
+from src.irqscan import AffinityScanner
+from src.journal import SwitchJournal
+from src.metrics import REGISTRY
+from src.probe import ConnectivityProbe
+from src.rollback import TCPIP_PARAMS_KEY, adapter_commands, prepare, ps_quote, write_tcpip_registry
+from src.shell import ShellError, ShellPool
+from src.topology import CpuTopology, encode_slpi_ex, load_topology, parse_slpi_ex
+from src.tracing import traced
+from src.state import TCPIP_KEYS, AdapterBackend, AdapterState, ApplyPlan, StateReconciler, normalize_im
+
+APPLY_SECONDS = REGISTRY.histogram("rss_apply_duration_seconds", "safe_apply_mode wall time, apply plus verification.", ("mode",))
+ROLLBACKS = REGISTRY.counter("rss_rollbacks_total", "Rollbacks after failed connectivity checks (scope: all or adapter).", ("scope",))
+PROBE_SECONDS = REGISTRY.histogram("rss_probe_latency_seconds", "Connectivity probe time until an answer or give-up.", ("result",))
+ROLLBACK_SECONDS = REGISTRY.histogram("rss_rollback_duration_seconds", "Time to put adapters back after a failed check.", ("scope",))
+
+class PowerShellBackend(AdapterBackend):
+    """Adapter backend driving NetAdapter cmdlets through a shell pool and Tcpip via winreg."""
+
+    def __init__(self, shell: ShellPool):
+        self.shell = shell
+
+    def read_adapters(self, names):
+        names = list(names)
+        scripts = [
+            f"$r = Get-NetAdapterRss -Name {ps_quote(nic)}; "
+            f"$im = (Get-NetAdapterAdvancedProperty -Name {ps_quote(nic)} -DisplayName 'Interrupt Moderation' -ErrorAction SilentlyContinue).DisplayValue; "
+            "[pscustomobject]@{group=$r.BaseProcessorGroup; base=$r.BaseProcessorNumber; max=$r.MaxProcessors; profile=\"$($r.Profile)\"; queues=$r.NumberOfReceiveQueues; im=$im} | ConvertTo-Json -Compress"
+            for nic in names
+        ]
+        states = {}
+        try: results = self.shell.run_batch(scripts)
+        except ShellError: results = []
+        for nic, res in zip(names, results):
+            try:
+                d = json.loads(res.output) if res.ok else {}
+                states[nic] = AdapterState(d.get("base"), d.get("max"), d.get("profile") or None, d.get("queues"), d.get("im") or None, d.get("group"))
+            except ValueError:
+                states[nic] = AdapterState()
+        for nic in names: states.setdefault(nic, AdapterState())
+        return states
+
+    def set_adapter(self, name, changes):
+        commands = adapter_commands(name, changes)
+        try:
+            return all(r.ok for r in self.shell.run_batch(commands))
+        except ShellError as e:
+            print(f"[Core] Adapter '{name}' apply error: {e}")
+            return False
+
+    def read_bindings(self, names):
+        names = list(names)
+        scripts = [
+            f"$c = Get-NetIPConfiguration -InterfaceAlias {ps_quote(nic)}; "
+            "[pscustomobject]@{ip=($c.IPv4Address | Select-Object -First 1).IPAddress; gw=($c.IPv4DefaultGateway | Select-Object -First 1).NextHop} | ConvertTo-Json -Compress"
+            for nic in names
+        ]
+        bindings = {}
+        try: results = self.shell.run_batch(scripts)
+        except ShellError: return bindings
+        for nic, res in zip(names, results):
+            try:
+                d = json.loads(res.output) if res.ok else {}
+                if d.get("ip"): bindings[nic] = (d["ip"], d.get("gw") or None)
+            except ValueError: pass
+        return bindings
+
+    def read_link_speeds(self, names):
+        names = list(names)
+        try: results = self.shell.run_batch([f"(Get-NetAdapter -Name {ps_quote(nic)}).ReceiveLinkSpeed" for nic in names])
+        except ShellError: return {}
+        speeds = {}
+        for nic, res in zip(names, results):
+            try:
+                if res.ok: speeds[nic] = int(res.output.strip())
+            except ValueError: pass
+        return speeds
+
+    def read_tcpip(self):
+        import winreg
+        values = {k: None for k in TCPIP_KEYS}
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_PARAMS_KEY, 0, winreg.KEY_READ) as key:
+                for name in TCPIP_KEYS:
+                    try: values[name] = winreg.QueryValueEx(key, name)[0]
+                    except OSError: pass
+        except OSError: pass
+        return values
+
+    def write_tcpip(self, values):
+        return write_tcpip_registry(values)
 
 class KernelSurgeon:
     """The interface for system-level modifications."""
     
-    def __init__(self):
-        """Initializes the surgeon and scans for hardware context."""
-        self.topology: Dict[str, int] = self._analyze_topology()
-        self.polluted_cores: List[int] = self.scan_polluted_cores()
-        self.target_adapters: List[str] = []
-        self._scan_adapters_cache()
-        self.gateway_ip = self._get_default_gateway()
+    @traced(cat="core")
+    def __init__(self, shell: Optional[ShellPool] = None, backend: Optional[AdapterBackend] = None,
+                 data_dir: Optional[str] = None):
+        """Initializes the surgeon and starts hardware discovery in the background.
+
+        Topology, polluted cores, adapters and the gateway are looked up
+        concurrently and awaited on first use. The last known values are kept in
+        hardware_profile.json and used immediately on the next start.
+
+        Args:
+            shell: Worker pool used for every PowerShell call. A private pool is
+                created when omitted.
+            backend: Adapter state backend. Defaults to `PowerShellBackend`.
+            data_dir: Directory for caches, the profile and the journal. Defaults to the project root.
+        """
+        data_dir = self.data_dir = data_dir or PROJECT_ROOT
+        self.shell = shell or ShellPool(size=4)
+        self.state = StateReconciler(backend or PowerShellBackend(self.shell))
+        self.irq_scanner = AffinityScanner(cache_path=os.path.join(data_dir, "irq_cache.json"))
+        self.hardware_version = 0
+        self.busy_mask = 0  # Cores measured as busy; gap searches avoid them (see src.placement)
+        self._topology_src: Optional[CpuTopology] = None
+        self._topology: Dict[str, Any] = {}
+        self._probe: Optional[ConnectivityProbe] = None
+        self.discovery = Discovery(
+            {"hw": self._load_hardware, "polluted_cores": self.scan_polluted_cores, "target_adapters": self._scan_adapters,
+             "adapter_bindings": self._scan_bindings, "gateway_ip": self._get_default_gateway},
+            profile_path=os.path.join(data_dir, "hardware_profile.json"),
+            codecs={
+                "hw": FactCodec(lambda t: base64.b64encode(encode_slpi_ex(t)).decode("ascii"), lambda s: parse_slpi_ex(base64.b64decode(s))),
+                "adapter_bindings": FactCodec(lambda b: {k: list(v) for k, v in b.items()}, lambda b: {k: tuple(v) for k, v in b.items()}),
+            },
+            on_change=self._on_hardware_change)
+        self.discovery.start()
+        self.last_apply_report: Optional[Dict[str, Any]] = None
+        self.journal = SwitchJournal(os.path.join(data_dir, "network_journal.log"))
+        self.watchdog = None  # Optional `src.watchdog.WatchdogClient`, armed with the originals before every change
+        self.recover_interrupted_switch()
+
+    # --- Discovered facts (profile value first, revalidated in the background) ---
+
+    @property
+    def hw(self) -> CpuTopology: return self.discovery.get("hw")
 
+    @property
+    def topology(self) -> Dict[str, Any]:
+        hw = self.hw
+        if hw is not self._topology_src: self._topology_src, self._topology = hw, hw.as_dict()
+        return self._topology
+
+    @property
+    def polluted_cores(self) -> List[int]: return self.discovery.get("polluted_cores")
+
+    @polluted_cores.setter
+    def polluted_cores(self, value: List[int]) -> None: self.discovery.set("polluted_cores", value)
+
+    @property
+    def target_adapters(self) -> List[str]: return self.discovery.get("target_adapters")
+
+    @target_adapters.setter
+    def target_adapters(self, value: List[str]) -> None: self.discovery.set("target_adapters", value)
+
+    @property
+    def adapter_bindings(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]: return self.discovery.get("adapter_bindings")
+
+    @adapter_bindings.setter
+    def adapter_bindings(self, value: Dict[str, Tuple[Optional[str], Optional[str]]]) -> None: self.discovery.set("adapter_bindings", value)
+
+    @property
+    def gateway_ip(self) -> str: return self.discovery.get("gateway_ip")
+
+    @gateway_ip.setter
+    def gateway_ip(self, value: str) -> None: self.discovery.set("gateway_ip", value)
+
+    @property
+    def probe(self) -> ConnectivityProbe:
+        if self._probe is None: self._probe = ConnectivityProbe(self.gateway_ip)
+        return self._probe
+
+    @probe.setter
+    def probe(self, value: ConnectivityProbe) -> None: self._probe = value
+
+    def _on_hardware_change(self, name: str, old: Any, new: Any) -> None:
+        """Background revalidation found a different value than the stored profile."""
+        print(f"[Core] Hardware profile updated: {name} changed")
+        if name == "gateway_ip" and self._probe is not None: self._probe.host = new
+        self.hardware_version += 1
+
+    @traced(cat="core")
     def _get_default_gateway(self) -> str:
         try:
             ps_cmd = "Get-NetRoute -DestinationPrefix 0.0.0.0/0 | Sort-Object RouteMetric | Select-Object -First 1 -ExpandProperty NextHop"
-            res = subprocess.run(["powershell", "-NoProfile", "-Command", ps_cmd], capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            ip = res.stdout.strip()
+            ip = self.shell.run(ps_cmd).output.strip()
             return ip if ip else "8.8.8.8"
         except: return "8.8.8.8"
 
+    @traced(cat="core")
     def scan_polluted_cores(self) -> List[int]:
-        def run_registry_scan() -> int:
-            ps_script = r"""
-            $total_mask = [long]0
-            $basePath = "HKLM:\SYSTEM\CurrentControlSet\Enum"
-            $keys = Get-ChildItem -Path $basePath -Recurse -ErrorAction SilentlyContinue | Where-Object { $_.Name -like '*Affinity Policy*' }
-            foreach ($key in $keys) {
-                $path = $key.Name.Replace('HKEY_LOCAL_MACHINE', 'HKLM:')
-                $val = Get-ItemProperty -Path $path -ErrorAction SilentlyContinue
-                if ($val -and $val.AssignmentSetOverride) {
-                    $item_mask = [long]0
-                    $data = $val.AssignmentSetOverride
-                    if ($data -is [byte[]]) {
-                        for ($i=0; $i -lt $data.Length; $i++) {
-                            $multiplier = [long][math]::Pow(256, $i)
-                            $item_mask += [long]$data[$i] * $multiplier
-                        }
-                    } elseif ($data -is [long] -or $data -is [int]) {
-                        $item_mask = [long]$data
-                    }
-                    $total_mask = $total_mask -bor $item_mask
-                }
-            }
-            Write-Output $total_mask
-            """
-            try:
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                res = subprocess.run(["powershell", "-NoProfile", "-Command", ps_script], capture_output=True, text=True, startupinfo=si)
-                out = res.stdout.strip()
-                return int(out) if out else 0
-            except: return 0
-
         print("[Core] Scanning Registry for IRQ-polluted cores...")
         polluted_mask = 1 
-        polluted_mask |= run_registry_scan()
-        indices = []
-        for i in range(64):
-            if (polluted_mask & (1 << i)): indices.append(i)
+        try: polluted_mask |= self.irq_scanner.scan()
+        except Exception as e: print(f"[Core] IRQ scan error: {e}")
+        indices = indices_from_mask(polluted_mask)
         return indices if indices else [0]
 
-    def calculate_best_gap(self) -> Tuple[int, int]:
+    def _placement_args(self) -> Dict[str, Any]:
+        """Gap-search arguments that keep windows inside one group and L3/NUMA domain, on P-cores where possible."""
+        return {
+            "segments": split_segments(group_segments(self.topology["groups"]), self.hw.placement_segments()),
+            "objective": GapObjective(p_core=2.0), "p_core_mask": self.hw.performance_mask, "smt": self.topology["ht"],
+        }
+
+    def _clean_mask(self) -> int:
+        clean = ((1 << self.topology["logical"]) - 1) & ~mask_from_indices(self.polluted_cores)
+        return (clean & ~self.busy_mask) or clean  # Measured hot cores are avoided only while something else is left
+
+    def is_clean_window(self, base: int, size: int) -> bool:
+        """True if every core in [base, base + size) is free of IRQs and measured load."""
+        window = ((1 << size) - 1) << base
+        return window & self._clean_mask() == window
+
+    @traced(cat="core")
+    def calculate_best_gap(self, sizes: Tuple[int, ...] = (4, 2, 1)) -> Tuple[int, int]:
         l_procs = self.topology.get("logical", 8)
-        polluted = set(self.polluted_cores)
-        clean_set = set(i for i in range(l_procs) if i not in polluted)
-        
-        if not clean_set:
+        window = best_gap(self._clean_mask(), l_procs, sizes=sizes, **self._placement_args())
+        if window is None:
             return (1, 1)
+        print(f"[Core] Safety-Fit: {window.size} Core(s), Base {window.base} (Score {window.score:.2f})")
+        return (window.base, window.size)
 
-        search_range = range(l_procs - 1, -1, -1)
-
-        # Priority 1: 4 cores, even start
-        for n in search_range:
-            if n % 2 == 0 and n + 3 < l_procs:
-                if all(i in clean_set for i in range(n, n + 4)):
-                    print(f"[Core] Safety-Fit: Priority 1 (4 Cores, Even Base {n})")
-                    return (n, 4)
-
-        # Priority 2: 4 cores, any start
-        for n in search_range:
-            if n + 3 < l_procs:
-                if all(i in clean_set for i in range(n, n + 4)):
-                    print(f"[Core] Safety-Fit: Priority 2 (4 Cores, Base {n})")
-                    return (n, 4)
-
-        # Priority 3: 2 cores, even start
-        for n in search_range:
-            if n % 2 == 0 and n + 1 < l_procs:
-                if all(i in clean_set for i in range(n, n + 2)):
-                    print(f"[Core] Safety-Fit: Priority 3 (2 Cores, Even Base {n})")
-                    return (n, 2)
-
-        # Priority 4: 2 cores, any start
-        for n in search_range:
-            if n + 1 < l_procs:
-                if all(i in clean_set for i in range(n, n + 2)):
-                    print(f"[Core] Safety-Fit: Priority 4 (2 Cores, Base {n})")
-                    return (n, 2)
-
-        sorted_clean = sorted(list(clean_set), reverse=True)
-        print(f"[Core] Safety-Fit: Fallback (1 Core, Base {sorted_clean[0]})")
-        return (sorted_clean[0], 1)
-
-    def _analyze_topology(self) -> Dict[str, int]:
-        try:
-            import psutil
-            p_cores = psutil.cpu_count(logical=False)
-            l_procs = psutil.cpu_count(logical=True)
-            return {"physical": p_cores or 4, "logical": l_procs or 8, "ht": (l_procs or 8) > (p_cores or 4)}
-        except: return {"physical": 4, "logical": 8, "ht": True}
+    @traced(cat="core")
+    def calculate_adapter_windows(self, priorities: Optional[Dict[str, float]] = None) -> Dict[str, Allocation]:
+        """Gives every target adapter its own RSS window, weighted by priority or link speed.
 
-    def _scan_adapters_cache(self) -> None: 
+        Args:
+            priorities: Optional adapter name -> user weight. Adapters not listed are
+                weighted by receive link speed in Gbit/s.
+
+        Returns:
+            Adapter name -> `Allocation`. Empty if there is nothing to allocate.
+        """
+        if not self.target_adapters: return {}
+        priorities = priorities or {}
+        speeds = self.state.backend.read_link_speeds([n for n in self.target_adapters if n not in priorities])
+        demands = [AdapterDemand(nic, float(priorities.get(nic, speeds.get(nic, 1e9) / 1e9))) for nic in self.target_adapters]
+        allocations = allocate(demands, self._clean_mask(), self.topology["logical"], **self._placement_args())
+        for line in describe(allocations): print(f"[Core] Allocation: {line}")
+        return allocations
+
+    def split_proc_index(self, index: int) -> Tuple[int, int]:
+        """Converts a global logical processor index to (processor group, group-relative number)."""
+        for group, (start, end) in enumerate(group_segments(self.topology["groups"])):
+            if start <= index < end: return (group, index - start)
+        return (0, index)
+
+    @traced(cat="core")
+    def _load_hardware(self) -> CpuTopology:
+        return load_topology()
+
+    @traced(cat="core")
+    def _scan_adapters(self) -> List[str]:
         ps_script = "Get-NetAdapter | Where-Object { $_.Status -eq 'Up' -and $_.Virtual -eq $false } | Select-Object -ExpandProperty Name"
         try:
-            res = subprocess.run(["powershell", "-Command", ps_script], capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            self.target_adapters = [name.strip() for name in res.stdout.split('\n') if name.strip()]
-        except: pass
+            res = self.shell.run(ps_script)
+            return [name.strip() for name in res.output.split('\n') if name.strip()]
+        except: return []
+
+    @traced(cat="core")
+    def _scan_bindings(self) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        try: return self.state.backend.read_bindings(self.discovery.get("target_adapters", fresh=True))
+        except: return {}
 
+    @traced(cat="core")
     def apply_rss_settings(self, base_proc: int, max_procs: int, queues: int, profile: str = "Closest") -> bool:
+        """Unconditionally pushes RSS settings to every adapter, one adapter per worker."""
         if not self.target_adapters: return False
-        
-        # [DEBUG] Ensuring parameters reach PowerShell as intended
-        print(f"[DEBUG] Applying Base: {base_proc}, Queues: {queues}, MaxProcs: {max_procs}, Profile: {profile}")
-        
-        commands = []
-        for nic in self.target_adapters:
-            # RSS Affinity & Max Processors
-            commands.append(f"Set-NetAdapterRss -Name '{nic}' -BaseProcessorNumber {base_proc} -MaxProcessors {max_procs} -Profile {profile} -ErrorAction SilentlyContinue")
-            # Number of Receive Queues
-            commands.append(f"Set-NetAdapterRss -Name '{nic}' -NumberOfReceiveQueues {queues} -ErrorAction SilentlyContinue")
-        
-        try:
-            subprocess.run(["powershell", "-Command", "; ".join(commands)], creationflags=subprocess.CREATE_NO_WINDOW)
-            return True
-        except Exception as e:
-            print(f"[Core] RSS Settings Error: {e}")
-            return False
+        print(f"[Core] Forcing RSS Base: {base_proc}, Queues: {queues}, MaxProcs: {max_procs}, Profile: {profile}")
+        group, rel_base = self.split_proc_index(base_proc)
+        changes = {"base_group": group, "base_proc": rel_base, "max_procs": max_procs, "profile": profile, "queues": queues}
+        result = self.state.execute(ApplyPlan({nic: dict(changes) for nic in self.target_adapters}))
+        if result.failed: print(f"[Core] RSS Settings failed on: {', '.join(result.failed)}")
+        return result.ok
 
+    @traced(cat="core")
     def apply_advanced_properties(self, interrupt_mod: Union[int, str]) -> bool:
+        """Unconditionally pushes interrupt moderation to every adapter, one adapter per worker."""
         if not self.target_adapters: return False
-        val_im = str(interrupt_mod) if not isinstance(interrupt_mod, int) else ("Enabled" if interrupt_mod == 1 else "Disabled")
-        commands = [f"Set-NetAdapterAdvancedProperty -Name '{nic}' -DisplayName 'Interrupt Moderation' -DisplayValue '{val_im}' -ErrorAction SilentlyContinue" for nic in self.target_adapters]
-        try:
-            subprocess.run(["powershell", "-Command", "; ".join(commands)], creationflags=subprocess.CREATE_NO_WINDOW)
-            return True
-        except: return False
+        result = self.state.execute(ApplyPlan({nic: {"interrupt_mod": normalize_im(interrupt_mod)} for nic in self.target_adapters}))
+        return result.ok
 
+    @traced(cat="core")
     def apply_registry_tweaks(self, mode: str, queues: int) -> bool:
+        import winreg
         try:
-            key_path = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_WRITE) as key:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_PARAMS_KEY, 0, winreg.KEY_WRITE) as key:
                 winreg.SetValueEx(key, "ReceiveSideScaling", 0, winreg.REG_DWORD, 1)
                 winreg.SetValueEx(key, "EnableTCPA", 0, winreg.REG_DWORD, 1)
                 winreg.SetValueEx(key, "MaxNumRSSQueues", 0, winreg.REG_DWORD, queues)
             return True
         except: return False
             
-    def backup_network_config(self) -> Optional[dict]:
-        backup = {}
-        try:
-            key_path = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_READ) as key:
-                for name in ["ReceiveSideScaling", "EnableTCPA", "MaxNumRSSQueues"]:
-                    try:
-                        val, _ = winreg.QueryValueEx(key, name)
-                        backup[name] = val
-                    except: pass
-            
-            from src.config import PROJECT_ROOT
-            backup_path = os.path.join(PROJECT_ROOT, "network_backup.json")
-            with open(backup_path, "w") as f: json.dump(backup, f)
-            return backup
-        except: return None
+    @traced(cat="core")
+    def recover_interrupted_switch(self) -> bool:
+        """Undoes any switch the journal shows as started but never finished.
 
+        Returns:
+            True if something was recovered.
+        """
+        recovered = False
+        while (pending := self.journal.pending()) is not None:
+            seq, mode, undo = pending
+            print(f"[Core] Recovering interrupted switch to {mode or 'unknown mode'}...")
+            if not self.state.execute(undo).ok: print("[Core] Recovery incomplete, some parameters could not be restored.")
+            self.journal.commit(seq)
+            recovered = True
+        return recovered
+
+    @traced(cat="core")
     def restore_network_config(self, backup_data: Optional[dict] = None) -> bool:
-        from src.config import PROJECT_ROOT
-        backup_path = os.path.join(PROJECT_ROOT, "network_backup.json")
-        if not backup_data and os.path.exists(backup_path):
+        """Puts every parameter Sentinel has touched back to its original value.
+
+        Args:
+            backup_data: Optional Tcpip\\Parameters values to write instead of the journal originals.
+        """
+        if backup_data:
+            return self.state.execute(ApplyPlan(tcpip=dict(backup_data))).ok
+        originals = self.journal.originals()
+        if originals.empty:
+            legacy_path = os.path.join(PROJECT_ROOT, "network_backup.json")  # Written by older versions
+            if not os.path.exists(legacy_path): return False
             try:
-                with open(backup_path, "r") as f: backup_data = json.load(f)
-            except: pass
-        if not backup_data: return False
-        try:
-            key_path = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path, 0, winreg.KEY_WRITE) as key:
-                for name, val in backup_data.items(): winreg.SetValueEx(key, name, 0, winreg.REG_DWORD, val)
-            return True
-        except: return False
+                with open(legacy_path, "r") as f: return self.restore_network_config(json.load(f))
+            except (OSError, ValueError): return False
+        if not self.state.execute(originals).ok: return False
+        self.journal.reset()
+        self.arm_watchdog()
+        return True
+
+    def progress(self) -> None:
+        """Tells the watchdog the caller is still making progress. Called between the long phases of a switch."""
+        if self.watchdog is not None: self.watchdog.touch()
 
+    def longest_phase(self) -> float:
+        """Worst-case seconds of one step of `safe_apply_mode` between two `progress` calls."""
+        shell = self.shell.timeout  # Only a batch that was never sent is retried
+        probe = self.probe
+        verify = probe.deadline + probe.max_delay + (len(probe.tcp_ports) + 2) * probe.timeout  # Last attempt tries every method
+        return max(shell, verify)
+
+    def arm_watchdog(self) -> None:
+        """Hands the watchdog a plan that restores every original value, or disarms it if nothing is changed."""
+        if self.watchdog is None: return
+        originals = self.journal.originals()
+        if originals.empty: self.watchdog.disarm()
+        else: self.watchdog.arm(prepare(originals, "originals"))
+
+    @traced(cat="core")
     def check_connectivity(self) -> bool:
-        try:
-            res = subprocess.run(["ping", self.gateway_ip, "-n", "1", "-w", "1000"], capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            return res.returncode == 0
-        except: return False
+        return self.probe.verify().ok
+
+    def _adapter_probe(self, nic: str) -> ConnectivityProbe:
+        """Builds a probe that leaves through `nic`, or the default probe if its address is unknown."""
+        local_ip, gateway = self.adapter_bindings.get(nic, (None, None))
+        if not local_ip: return self.probe
+        return ConnectivityProbe(gateway or self.gateway_ip, deadline=self.probe.deadline,
+                                 max_failures=self.probe.max_failures, source=local_ip)
 
-    def safe_apply_mode(self, base, max_p, profile, im_mode, queues, mode_name) -> bool:
-        print(f"[Core] Applying SAFE Mode: {mode_name} (Base:{base}, Queues:{queues})...")
-        backup = self.backup_network_config()
-        self.apply_rss_settings(base, max_p, queues, profile)
-        self.apply_advanced_properties(im_mode)
-        self.apply_registry_tweaks(mode_name, queues)
-        time.sleep(2)
-        if not self.check_connectivity():
+    @traced(cat="core")
+    def safe_apply_mode(self, base, max_p, profile, im_mode, queues, mode_name, per_adapter: Optional[Dict[str, Allocation]] = None) -> bool:
+        """Applies a mode, verifies connectivity and rolls back adapters that lost their link.
+
+        Args:
+            base, max_p, profile, im_mode, queues: Settings for every target adapter.
+            mode_name: Label used in logs and reports.
+            per_adapter: Optional adapter name -> `Allocation` overriding base,
+                max processors and queue count for that adapter.
+        """
+        desired = {}
+        for nic in self.target_adapters:
+            nic_base, nic_max, nic_queues = base, max_p, queues
+            if per_adapter and nic in per_adapter:
+                nic_base, nic_max = per_adapter[nic].base, per_adapter[nic].size
+                nic_queues = per_adapter[nic].size
+            group, rel_base = self.split_proc_index(nic_base)
+            desired[nic] = AdapterState(rel_base, nic_max, profile, nic_queues, normalize_im(im_mode), group)
+        max_queues = max([queues] + [d.queues for d in desired.values()])
+        tcpip = {"ReceiveSideScaling": 1, "EnableTCPA": 1, "MaxNumRSSQueues": max_queues}
+        plan = self.state.diff(desired, tcpip)
+        if plan.empty:
+            print(f"[Core] {mode_name} already in effect (Base:{base}, Queues:{queues}), nothing to apply.")
+            return True
+
+        print(f"[Core] Applying SAFE Mode: {mode_name} (Base:{base}, Queues:{queues}, {len(plan.adapters)} adapter(s) changed)...")
+        t0 = time.perf_counter()
+        undo = plan.inverse()  # Ready before anything changes, so a failed check rolls back without rework
+        seq = self.journal.begin(mode_name, plan)
+        self.arm_watchdog()
+        executed = self.state.execute(plan)
+        t_applied = time.perf_counter()
+        self.progress()
+
+        # Verify every changed adapter through its own address, concurrently.
+        # Adapters without a known address share the default probe, so they are verified once.
+        probes: Dict[int, Tuple[ConnectivityProbe, List[str]]] = {}
+        for nic in (plan.adapters or {"": None}):
+            probe = self._adapter_probe(nic) if nic else self.probe
+            probes.setdefault(id(probe), (probe, []))[1].append(nic)
+        with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+            verified = dict(zip(probes, pool.map(lambda entry: entry[0].verify(), probes.values())))
+        self.progress()
+
+        report = {"mode": mode_name, "apply_ms": round((t_applied - t0) * 1000, 1), "adapters": {}}
+        lost = []
+        for key, (probe, nics) in probes.items():
+            result = verified[key]
+            PROBE_SECONDS.observe(result.elapsed_ms / 1000, result="ok" if result.ok else "lost")
+            for nic in nics:
+                if not nic: continue
+                applied = executed.adapters.get(nic)
+                report["adapters"][nic] = {
+                    "applied": applied.ok if applied else False, "apply_ms": round(applied.elapsed_ms, 1) if applied else None,
+                    "verified": result.ok, "verify_ms": round(result.elapsed_ms, 1), "method": result.method,
+                }
+                if not result.ok: lost.append(nic)
+        all_lost = all(not r.ok for r in verified.values())
+        report["ok"] = not lost and not all_lost
+        report["total_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        self.last_apply_report = report
+        APPLY_SECONDS.observe(report["total_ms"] / 1000, mode=mode_name)
+
+        for nic, info in report["adapters"].items():
+            state = "OK" if info["verified"] else "LOST"
+            print(f"[Core]   {nic}: applied in {info['apply_ms']} ms, {state} after {info['verify_ms']} ms")
+        if all_lost:
             print("[Core] Connectivity Lost! Rolling back...")
-            self.restore_network_config(backup)
-            self.apply_advanced_properties("Enabled")
+            ROLLBACKS.inc(scope="all")
+            self._roll_back(undo, "all")
+            self.journal.commit(seq)
             return False
+        if lost:
+            # Only the adapters that lost their link go back; the rest keep the new mode.
+            print(f"[Core] Connectivity Lost on {', '.join(lost)}! Rolling back those adapters...")
+            ROLLBACKS.inc(len(lost), scope="adapter")
+            self._roll_back(undo.subset(lost), "adapter")
+        self.journal.commit(seq)
+        print(f"[Core] {mode_name} verified in {report['total_ms']:.0f} ms (apply {report['apply_ms']:.0f} ms)")
         return True
 
+    def _roll_back(self, undo: ApplyPlan, scope: str) -> None:
+        t0 = time.perf_counter()
+        result = self.state.execute(undo)
+        elapsed = time.perf_counter() - t0
+        self.progress()
+        ROLLBACK_SECONDS.observe(elapsed, scope=scope)
+        self.last_apply_report["rollback_ms"] = round(elapsed * 1000, 1)
+        if not result.ok: print("[Core] Rollback incomplete, some parameters could not be restored.")
+
+    @traced(cat="core")
     def manage_autostart(self, enable: bool) -> bool:
         import sys
+        import winreg
         key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
         app_name = "RSS_Sentinel"
         
@@ -241,4 +490,4 @@ class KernelSurgeon:
             return True
         except: return False
 
-    def get_topology_info(self) -> Dict[str, int]: return self.topology
\ No newline at end of file
+    def get_topology_info(self) -> Dict[str, Any]: return self.topology
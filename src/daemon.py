@@ -2,40 +2,107 @@
 
 This module runs the background service (RSS Sentinel).
 It monitors active processes and switches RSS profiles accordingly.
+
+Presets are computed ahead of time (at start and whenever the hardware, the
+adapter priorities or the measured placement change), so a switch only pushes
+settings. Game launches are reported by `src.launchwatch` the moment the process
+starts. Every switch records its detection-to-applied latency.
+
+`run_loop` hands every tick to a `SessionRecorder` (see `src.recorder`), if one
+is attached.
+
+Each game gets its own profile (see `src.profiles`), applied as soon as the game
+is detected and optionally tuned over several sessions.
+
+`run_service` runs the autopilot headless, with only psutil and the backend
+loaded, and exposes it over the local control channel (see `src.ipc`). The
+dashboard and the tray icon are clients that attach and detach at will.
 """
 
+import os
 import threading
 import time
-import sys
-import ctypes
-import psutil
-import pystray
-from PIL import Image, ImageDraw
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
 
 from src.core import KernelSurgeon
-from src.config import ConfigManager
+from src.config import ConfigManager, launch_command
+from src.ipc import ControlServer
+from src.gaps import indices_from_mask
+from src.jitter import BURST_MAX_DURATION, JitterBenchmark, format_summary
+from src.launchwatch import LaunchEvent, LaunchWatcher
+from src.matcher import GameMatcher
+from src.metrics import REGISTRY, MetricsServer
+from src.placement import PlacementController
+from src.procwatch import ProcessWatcher
+from src.profiles import ProfileStore, RssSettings
+from src.recorder import FLAG_FAILED, FLAG_FORCED, FLAG_LAUNCH, FLAG_SWITCH, SessionRecorder
+from src.telemetry import TelemetrySampler
+from src.tracing import instant, span, traced
+from src.watchdog import WatchdogClient, stale_after_for
+
+SWITCHES = REGISTRY.counter("rss_mode_switches_total", "Completed mode switches.", ("mode", "trigger"))
+SWITCH_FAILURES = REGISTRY.counter("rss_mode_switch_failures_total", "Switches that were rolled back completely.", ("mode",))
+SWITCH_LATENCY = REGISTRY.histogram("rss_switch_latency_seconds", "Detection to settings applied.", ("trigger",))
+CURRENT_MODE = REGISTRY.gauge("rss_mode", "1 for the mode in effect, 0 otherwise.", ("mode",))
+TICK_SECONDS = REGISTRY.histogram("rss_tick_duration_seconds", "Autopilot tick wall time.")
+SCAN_SECONDS = REGISTRY.histogram("rss_process_scan_duration_seconds", "Process table diff and game check per tick.",
+                                  buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+CONFIG_RELOADS = REGISTRY.counter("rss_config_reloads_total", "Config file changes picked up from disk.")
 
 class RSSAutopilot:
     """Handles the automated profile switching logic with Hysteresis and Gap Finder."""
     
-    def __init__(self, surgeon: KernelSurgeon, config_mgr: ConfigManager, on_status_update=None):
+    def __init__(self, surgeon: KernelSurgeon, config_mgr: ConfigManager, on_status_update=None, watcher: ProcessWatcher = None,
+                 launches: LaunchWatcher = None, recorder: Optional[SessionRecorder] = None):
         self.surgeon = surgeon
         self.config_mgr = config_mgr
         self.on_status_update = on_status_update
+        self.watcher = watcher if watcher is not None else ProcessWatcher()  # An empty table is falsy
+        self.launches = launches or LaunchWatcher(self._on_launch, self._games)
+        self._pending_launch: Optional[LaunchEvent] = None
+        self.recorder = recorder
+        self._tick_apply_ms = 0.0  # Apply time and FLAG_* bits of the current tick, for the recorder
+        self._tick_flags = 0
         self.stop_event = threading.Event()
+        self._wake = threading.Event()
         self.current_mode = "UNKNOWN"
+        self.forced_mode = None  # "GAMING"/"DESKTOP" pinned by a client, or None for automatic
         
         # Hysteresis Logic
         self.hysteresis_timer = 0
         self.HYSTERESIS_DELAY = 60 # Seconds to wait before leaving Gaming Mode
+        self.TICK_INTERVAL = 2.0
+        self.CPU_THRESHOLD = 5.0 # Percent of one core a game must use to count as active
+
+        self._games_src = None
+        self._matcher = GameMatcher(())
+        self._config_version = None
+        self._priority_src = None
+
+        # Latency evidence per mode: {"GAMING": {"before": summary, "after": summary}}
+        self.benchmarks = {}
+        # Detection-to-applied time of recent switches: {"mode", "trigger", "latency_ms", "at"}
+        self.switch_latency = deque(maxlen=50)
+
+        # Per-game profiles; `session` is (game, settings, is_trial) while in Gaming Mode
+        self.profiles = ProfileStore(os.path.join(self.surgeon.data_dir, "game_profiles.json"))
+        self.session: Optional[Tuple[Optional[str], RssSettings, bool]] = None
+
+        # Closed-loop placement: only samples load while in Gaming Mode
+        self.placement = PlacementController()
+        self.sampler: Optional[TelemetrySampler] = None
         
-        topo = self.surgeon.get_topology_info()
-        self.p_cores = topo["physical"]
-        self.l_procs = topo["logical"]
+        self._hardware_version = self.surgeon.hardware_version
         self._calculate_presets()
 
+    @traced(cat="autopilot")
     def _calculate_presets(self):
         """Pre-calculates optimal settings based on Gap Finder Strategy."""
+        topo = self.surgeon.get_topology_info()
+        self.p_cores = topo.get("p_cores", topo["physical"])
+        self.l_procs = topo["logical"]
+
         # 1. GAMING PRESET
         # Uses surgeon's Gap Finder to find the best contiguous clean cores
         base_core, calculated_queues = self.surgeon.calculate_best_gap()
@@ -44,6 +111,16 @@ class RSSAutopilot:
         self.gaming_max = calculated_queues # We match max processors to queue count
         self.gaming_queues = calculated_queues
         self.gaming_im = "Enabled" if self.p_cores <= 6 else "Disabled"
+        # Per-adapter windows when several NICs are active (adapter -> Allocation)
+        self._priority_src = self.config_mgr.get("adapter_priority")
+        self.gaming_windows = self.surgeon.calculate_adapter_windows(dict(self._priority_src or {})) \
+            if len(self.surgeon.target_adapters) > 1 else {}
+        # Clean window per queue count, for game profiles and the tuner
+        self.gaming_bases = {}
+        for queues in (1, 2, 4, 8):
+            if queues > self.l_procs: break
+            base, size = self.surgeon.calculate_best_gap(sizes=(queues,))
+            if size == queues and self.surgeon.is_clean_window(base, size): self.gaming_bases[queues] = base
         
         # 2. DESKTOP PRESET
         self.desktop_base = 0
@@ -51,50 +128,328 @@ class RSSAutopilot:
         self.desktop_queues = 4 if self.l_procs < 12 else 8
         self.desktop_im = "Enabled" 
 
-    def stop(self): self.stop_event.set()
+    def stop(self):
+        self.stop_event.set()
+        self._wake.set()
+        self.launches.stop()
+        if self.sampler is not None: self.sampler.stop()
+
+    def force_mode(self, mode: Optional[str]) -> None:
+        """Pins GAMING or DESKTOP regardless of game activity. None returns to automatic."""
+        if mode not in (None, "GAMING", "DESKTOP"): raise ValueError(f"unknown mode {mode!r}")
+        self.forced_mode = mode
+        self._wake.set()
+
+    def status(self) -> Dict[str, Any]:
+        """A plain-data snapshot of the autopilot for clients."""
+        return {
+            "mode": self.current_mode, "forced": self.forced_mode, "manual": bool(self.config_mgr.get("manual_mode")),
+            "gaming": {"base": self.gaming_base, "max": self.gaming_max, "queues": self.gaming_queues, "im": self.gaming_im},
+            "desktop": {"base": self.desktop_base, "max": self.desktop_max, "queues": self.desktop_queues, "im": self.desktop_im},
+            "gaming_windows": {nic: tuple(a) for nic, a in self.gaming_windows.items()},
+            "topology": self.surgeon.get_topology_info(), "polluted_cores": list(self.surgeon.polluted_cores),
+            "last_apply": self.surgeon.last_apply_report, "benchmarks": self.benchmarks,
+            "placement": {"switches": self.placement.switches, "busy_mask": self.surgeon.busy_mask},
+            "switch_latency": list(self.switch_latency),
+            "session": {"game": self.session[0], "settings": self.session[1]._asdict(), "trial": self.session[2]} if self.session else None,
+        }
+
+    def _games(self) -> GameMatcher:
+        """Returns the compiled game rules, rebuilt only when the list changes."""
+        games = self.config_mgr.get("games_list")
+        if games is not self._games_src:
+            self._games_src = games
+            self._matcher = GameMatcher(games)
+        return self._matcher
+
+    @traced(cat="autopilot")
+    def _measure(self, settle: bool = False):
+        """Runs a jitter burst against the echo target, if benchmarking is enabled.
+
+        Returns None when the run lost more than `bench_max_loss` of its probes,
+        so a rate-limited or unreachable target is never recorded as a measurement.
+
+        Args:
+            settle: Right after an apply. Waits `bench_settle` seconds, then until
+                the probe gets an answer, so the burst does not time an adapter restart.
+        """
+        if not self.config_mgr.get("bench_enabled"): return None
+        if settle:
+            time.sleep(float(self.config_mgr.get("bench_settle")))
+            if not self.surgeon.check_connectivity():
+                print("[Autopilot] Benchmark skipped: link not back up")
+                return None
+            self.surgeon.progress()
+        host = self.config_mgr.get("bench_host") or self.surgeon.gateway_ip
+        try:
+            summary = JitterBenchmark(host, self.config_mgr.get("bench_port") or None, samples=int(self.config_mgr.get("bench_samples"))).run()
+        except OSError as e:
+            print(f"[Autopilot] Benchmark error: {e}")
+            return None
+        if summary["loss"] > self.config_mgr.get("bench_max_loss"):
+            print(f"[Autopilot] Benchmark dropped: {summary['lost']} of {summary['count'] + summary['lost']} probes to {host} lost")
+            return None
+        return summary
+
+    def _on_launch(self, event: LaunchEvent) -> None:
+        """Called from the launch watcher thread. The switch itself happens on the autopilot thread."""
+        instant("game launch", game=event.name, pid=event.pid, source=event.source)
+        self._pending_launch = event
+        self._wake.set()
+
+    def _gaming_settings(self, game: Optional[str]) -> Tuple[RssSettings, bool]:
+        """Settings for a Gaming switch: the game's profile (or a tuning trial), else the preset.
+
+        A re-apply within a session (hardware or placement change) keeps the
+        session's settings and only moves the base if its window is no longer clean.
+        """
+        default = RssSettings(self.gaming_base, self.gaming_queues, "NUMAStatic", self.gaming_im)
+        if self.current_mode == "GAMING" and self.session and game in (None, self.session[0]):
+            game, settings, trial = self.session
+        elif game:
+            tune = self.config_mgr.get("profile_tuning") and self.config_mgr.get("bench_enabled")
+            candidates = [RssSettings(base, q, "NUMAStatic", im) for q, base in self.gaming_bases.items() for im in ("Enabled", "Disabled")]
+            settings, trial = self.profiles.choose(game, default, candidates if tune else ())
+        else:
+            settings, trial = default, False
+        if not self.surgeon.is_clean_window(settings.base, settings.queues):
+            base = self.gaming_bases.get(settings.queues)
+            settings = settings._replace(base=base) if base is not None else default
+        self.session = (game, settings, trial)
+        return settings, trial
+
+    @traced(cat="autopilot")
+    def _switch(self, mode, launch: Optional[LaunchEvent] = None, game: Optional[str] = None):
+        """Applies the GAMING or DESKTOP preset, measuring latency before and after.
+
+        The "before" burst runs just ahead of the apply, so it measures the path
+        as it is now rather than whenever the previous mode was applied. The
+        "after" burst waits for the link to come back (see `_measure`).
+
+        Args:
+            mode: "GAMING" or "DESKTOP".
+            launch: The process start that triggered the switch. The apply is timed
+                from its detection.
+            game: The game that triggered a Gaming switch, if known. Its profile is applied.
+        """
+        new_session = self.current_mode != mode
+        if mode == "GAMING":
+            game = game or (launch.name if launch else None)
+            settings, trial = self._gaming_settings(game)
+            args = (settings.base, settings.queues, settings.profile, settings.im, settings.queues)
+            detail = f", {game} {'trial' if trial else 'profile'}" if game else ""
+            status = (f"GAMING MODE ({settings.queues}Q{detail})", "#e74c3c")
+        else:
+            args = (self.desktop_base, self.desktop_max, "Closest", self.desktop_im, self.desktop_queues)
+            status = ("DESKTOP MODE (Throughput)", "#2ecc71")
+
+        before = self._measure()
+        self.surgeon.progress()
+        started = launch.detected if launch else time.monotonic()
+        per_adapter = self.gaming_windows if mode == "GAMING" else None
+        t_apply = time.perf_counter()
+        with span("apply", cat="autopilot", mode=mode, trigger=launch.name if launch else "tick"):
+            applied = self.surgeon.safe_apply_mode(*args, mode, per_adapter=per_adapter)
+        self._tick_apply_ms += (time.perf_counter() - t_apply) * 1000
+        self._tick_flags |= (FLAG_SWITCH if applied else FLAG_FAILED) | (FLAG_LAUNCH if launch else 0)
+        if not applied:
+            SWITCH_FAILURES.inc(mode=mode)
+            return False
+        self.current_mode = mode
+        for name in ("GAMING", "DESKTOP"): CURRENT_MODE.set(1 if name == mode else 0, mode=name)
+        if mode != "GAMING": self.session = None
+        latency_ms = (time.monotonic() - started) * 1000
+        trigger = f"{launch.name} launch ({launch.source})" if launch else "tick"
+        self.switch_latency.append({"mode": mode, "trigger": trigger, "latency_ms": round(latency_ms, 1), "at": time.time()})
+        SWITCHES.inc(mode=mode, trigger="launch" if launch else "tick")
+        SWITCH_LATENCY.observe(latency_ms / 1000, trigger="launch" if launch else "tick")
+        print(f"[Autopilot] {mode} applied {latency_ms:.0f} ms after detection ({trigger})")
+        self.surgeon.progress()
+        after = self._measure(settle=True)
+        self.surgeon.progress()
+        if before is not None or after is not None:
+            self.benchmarks[mode] = {"before": before, "after": after}
+            print(f"[Autopilot] {mode} latency before: {format_summary(before)}")
+            print(f"[Autopilot] {mode} latency after:  {format_summary(after)}")
+        if mode == "GAMING" and new_session and self.session and self.session[0]:
+            change = self.profiles.record(self.session[0], self.session[1], after)
+            if change: print(f"[Autopilot] Profile: {change}")
+        if self.on_status_update: self.on_status_update(*status)
+        return True
+
+    def _apply_config(self):
+        """Pushes tunables from the config into the surgeon when the config changes."""
+        if self.config_mgr.version == self._config_version: return
+        self._config_version = self.config_mgr.version
+        self.surgeon.probe.deadline = float(self.config_mgr.get("probe_deadline"))
+        self.surgeon.probe.max_failures = int(self.config_mgr.get("probe_max_failures"))
+        self.placement.threshold = float(self.config_mgr.get("placement_threshold"))
+        self.placement.cooldown = float(self.config_mgr.get("placement_cooldown"))
+        if self.config_mgr.get("adapter_priority") is not self._priority_src: self._calculate_presets()
+
+    def _check_hardware(self):
+        """Recomputes presets when background discovery corrected the stored hardware profile."""
+        if self.surgeon.hardware_version == self._hardware_version: return
+        self._hardware_version = self.surgeon.hardware_version
+        self._calculate_presets()
+        if self.current_mode == "GAMING": self._switch("GAMING")  # Only the difference is pushed
+
+    def _propose_windows(self, busy_mask: int) -> List[Tuple[int, int]]:
+        """The windows the gap logic would pick if the cores in `busy_mask` were polluted."""
+        previous, self.surgeon.busy_mask = self.surgeon.busy_mask, busy_mask
+        try:
+            if self.gaming_windows:
+                windows = self.surgeon.calculate_adapter_windows(dict(self.config_mgr.get("adapter_priority") or {}))
+                return [(a.base, a.size) for a in windows.values()]
+            return [self.surgeon.calculate_best_gap()]
+        finally:
+            self.surgeon.busy_mask = previous
+
+    @traced(cat="autopilot")
+    def _check_placement(self):
+        """Moves the Gaming window off cores that measured load shows to be busy."""
+        if self.current_mode != "GAMING" or not self.config_mgr.get("placement_enabled"):
+            if self.sampler is not None:
+                self.sampler.stop()
+                self.sampler = None
+                self.placement.reset()
+                if self.surgeon.busy_mask:
+                    self.surgeon.busy_mask = 0
+                    self._calculate_presets()  # Next session starts from the registry view again
+            return
+        if self.sampler is None:
+            self.sampler = TelemetrySampler(hz=2.0, seconds=self.placement.window * 2).start()
+            return
+        current = [(a.base, a.size) for a in self.gaming_windows.values()] or [(self.gaming_base, self.gaming_queues)]
+        move = self.placement.evaluate(self.sampler.load(self.placement.window), current, self._propose_windows)
+        if move is None: return
+        print(f"[Autopilot] Placement: avoiding cores {indices_from_mask(move.busy_mask)}, moving to {move.windows} ({move.gain:.1f} pts cooler)")
+        self.surgeon.busy_mask = move.busy_mask
+        self._calculate_presets()
+        self._switch("GAMING")
+
+    @traced(cat="autopilot")
+    def tick(self):
+        """Runs one autopilot decision step."""
+        self._tick_apply_ms, self._tick_flags = 0.0, 0
+        if self.config_mgr.reload(): CONFIG_RELOADS.inc()
+        self._apply_config()
+        self._check_hardware()
+        self._check_placement()
+        launch, self._pending_launch = self._pending_launch, None  # Only acted on in automatic mode
+        if self.forced_mode:
+            if self.current_mode != self.forced_mode: self._switch(self.forced_mode)
+        elif self.config_mgr.get("manual_mode"):
+            if self.current_mode != "MANUAL":
+                if self.on_status_update: self.on_status_update("MANUAL OVERRIDE", "#3498db")
+                self.current_mode = "MANUAL"
+        else:
+            # --- AUTO PILOT ---
+            if launch is not None and self.current_mode != "GAMING":
+                # Switch on process start, before the game loads; CPU polling takes over from the next tick
+                self.hysteresis_timer = self.HYSTERESIS_DELAY
+                self._switch("GAMING", launch)
+                return
+
+            t0 = time.perf_counter()
+            self.watcher.set_matcher(self._games())
+            self.watcher.tick()
+            active_game = self.watcher.active_game(self.CPU_THRESHOLD)
+            SCAN_SECONDS.observe(time.perf_counter() - t0)
+
+            if active_game:
+                self.hysteresis_timer = self.HYSTERESIS_DELAY # Reset/Refill timer
+                if self.current_mode != "GAMING":
+                    instant("game active", game=active_game)
+                    self._switch("GAMING", game=active_game)
+            else:
+                if self.current_mode == "GAMING":
+                    if self.hysteresis_timer > 0:
+                        self.hysteresis_timer -= self.TICK_INTERVAL
+                    else:
+                        # Timer expired, switch to Desktop
+                        self._switch("DESKTOP")
+                elif self.current_mode != "DESKTOP":
+                    self._switch("DESKTOP")
 
     def run_loop(self):
+        self.launches.start()
         while not self.stop_event.is_set():
+            self.surgeon.progress()  # Heartbeats stop if the loop stalls
+            t0 = time.perf_counter()
             try:
-                self.config_mgr._load()
-                if self.config_mgr.get("manual_mode"):
-                    if self.current_mode != "MANUAL":
-                        if self.on_status_update: self.on_status_update("MANUAL OVERRIDE", "#3498db")
-                        self.current_mode = "MANUAL"
-                else:
-                    # --- AUTO PILOT ---
-                    is_game_active = False
-                    games_set = {g.lower() for g in self.config_mgr.get("games_list")}
-                    
-                    for p in psutil.process_iter(['name', 'cpu_percent']):
-                        try:
-                            if p.info['name'] and p.info['name'].lower() in games_set:
-                                if p.cpu_percent(interval=0.1) > 5.0:
-                                    is_game_active = True
-                                    break
-                        except: continue
-
-                    if is_game_active:
-                        self.hysteresis_timer = self.HYSTERESIS_DELAY # Reset/Refill timer
-                        if self.current_mode != "GAMING":
-                            # Refresh presets in case polluted cores changed (rare but possible)
-                            self._calculate_presets()
-                            if self.surgeon.safe_apply_mode(self.gaming_base, self.gaming_max, "NUMAStatic", self.gaming_im, self.gaming_queues, "GAMING"):
-                                self.current_mode = "GAMING"
-                                if self.on_status_update: self.on_status_update(f"GAMING MODE ({self.gaming_queues}Q)", "#e74c3c")
-                    else:
-                        if self.current_mode == "GAMING":
-                            if self.hysteresis_timer > 0:
-                                self.hysteresis_timer -= 2
-                            else:
-                                # Timer expired, switch to Desktop
-                                if self.surgeon.safe_apply_mode(self.desktop_base, self.desktop_max, "Closest", self.desktop_im, self.desktop_queues, "DESKTOP"):
-                                    self.current_mode = "DESKTOP"
-                                    if self.on_status_update: self.on_status_update("DESKTOP MODE (Throughput)", "#2ecc71")
-                        elif self.current_mode != "DESKTOP":
-                            if self.surgeon.safe_apply_mode(self.desktop_base, self.desktop_max, "Closest", self.desktop_im, self.desktop_queues, "DESKTOP"):
-                                self.current_mode = "DESKTOP"
-                                if self.on_status_update: self.on_status_update("DESKTOP MODE (Throughput)", "#2ecc71")
-
+                self.tick()
             except Exception as e: print(f"[Autopilot] Error: {e}")
-            time.sleep(2.0)
\ No newline at end of file
+            TICK_SECONDS.observe(time.perf_counter() - t0)
+            if self.recorder is not None:
+                self.recorder.record(self.current_mode, self.watcher.game_usage(), self._tick_apply_ms,
+                                     self._tick_flags | (FLAG_FORCED if self.forced_mode else 0))
+            self._wake.wait(self.TICK_INTERVAL)
+            self._wake.clear()
+
+# --- Headless service ---
+
+def _handlers(autopilot: RSSAutopilot, config_mgr: ConfigManager) -> Dict[str, Any]:
+    def force(req):
+        autopilot.force_mode(req.get("mode"))
+        return {"ok": True}
+
+    def set_config(req):
+        values = dict(req["values"])
+        config_mgr.check(values)  # The request is from another process; only known settings of the right type
+        config_mgr.update(values)
+        autopilot._wake.set()
+        return {"ok": True}
+
+    def autostart(req):
+        return {"ok": autopilot.surgeon.manage_autostart(bool(req.get("enable")))}
+
+    def stop(req):
+        autopilot.stop()
+        return {"ok": True}
+
+    return {
+        "status": lambda req: {"ok": True, "status": autopilot.status()},
+        "get_config": lambda req: {"ok": True, "config": config_mgr.as_dict()},
+        "force": force, "set_config": set_config, "autostart": autostart, "stop": stop,
+    }
+
+def run_service(tray: bool = False, address: Optional[str] = None) -> None:
+    """Runs the autopilot headless with a control endpoint until told to stop.
+
+    Args:
+        tray: Also show the tray icon (loads pystray and Pillow, but not the dashboard).
+        address: Control endpoint. Defaults to `src.ipc.default_address()`.
+    """
+    config_mgr = ConfigManager()
+    surgeon = KernelSurgeon()
+    recorder = SessionRecorder(os.path.join(surgeon.data_dir, "sessions"), int(config_mgr.get("recording_days"))) \
+        if config_mgr.get("recording_days") else None
+    if config_mgr.get("watchdog_enabled"):
+        surgeon.watchdog = WatchdogClient(
+            launch_command("--watchdog", "--parent", str(os.getpid()), "--journal", surgeon.journal.path),
+            log_path=os.path.join(surgeon.data_dir, "watchdog.log"),
+            stale_after=stale_after_for(surgeon.longest_phase(), BURST_MAX_DURATION))
+        surgeon.arm_watchdog()  # Covers values left changed by an earlier run
+    autopilot = RSSAutopilot(surgeon, config_mgr, recorder=recorder)
+    server = ControlServer(_handlers(autopilot, config_mgr), address)
+    server.start()
+    server.capture_output()
+    autopilot.on_status_update = lambda msg, color: server.publish(
+        {"event": "status", "msg": msg, "color": color, "status": autopilot.status()})
+    if tray:
+        from src.tray import run_tray
+        threading.Thread(target=run_tray, args=(autopilot,), daemon=True).start()
+    metrics = None
+    if config_mgr.get("metrics_port"):
+        try: metrics = MetricsServer(port=config_mgr.get("metrics_port")).start()
+        except OSError as e: print(f"[Metrics] Cannot serve on port {config_mgr.get('metrics_port')}: {e}")
+    try:
+        autopilot.run_loop()
+    finally:
+        if metrics: metrics.close()
+        if recorder: recorder.close()
+        if surgeon.watchdog: surgeon.watchdog.close()
+        REGISTRY.snapshot(os.path.join(autopilot.surgeon.data_dir, "metrics.prom"))
+        server.close()
+        config_mgr.flush()
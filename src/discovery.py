@@ -0,0 +1,159 @@
+"""Hardware Discovery Module.
+
+This module runs the slow start-up lookups (topology, IRQ scan, adapters,
+gateway) concurrently and hands each result out on first use. It also keeps the
+last answers in a small profile file.
+
+With a profile on disk, every fact is available at boot without waiting. The
+real lookups still run in the background. When one finishes with a different
+answer, the new value replaces the old one and the change callback fires.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import Future, wait as wait_futures
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+PROFILE_VERSION = 1
+
+class FactCodec(NamedTuple):
+    """Converts a fact to and from its JSON form in the profile."""
+    encode: Callable[[Any], Any]
+    decode: Callable[[Any], Any]
+
+class Discovery:
+    """Concurrent, lazily awaited start-up facts with a persisted profile.
+
+    Attributes:
+        profile_path: JSON file holding the last known values (None disables it).
+        on_change: Called as `on_change(name, old, new)` when a background lookup
+            disagrees with the profile value that was already handed out.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]], profile_path: Optional[str] = None,
+                 codecs: Optional[Dict[str, FactCodec]] = None,
+                 on_change: Optional[Callable[[str, Any, Any], None]] = None):
+        self.profile_path = profile_path
+        self.on_change = on_change
+        self._loaders = dict(loaders)
+        self._codecs = codecs or {}
+        self._values: Dict[str, Any] = {}
+        self._stale: Dict[str, Any] = {}
+        self._overridden: set = set()
+        self._futures: Dict[str, Future] = {}
+        self._running = 0
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # Lookups finishing back to back would share the temp file
+        self._load_profile()
+
+    # --- Profile ---
+
+    def _load_profile(self) -> None:
+        if not self.profile_path: return
+        try:
+            with open(self.profile_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != PROFILE_VERSION: return
+            for name, raw in data.get("facts", {}).items():
+                if name not in self._loaders: continue
+                codec = self._codecs.get(name)
+                self._stale[name] = codec.decode(raw) if codec else raw
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError): print(f"[Discovery] Profile ignored: {e}")
+            self._stale = {}
+
+    def save_profile(self) -> None:
+        """Writes the current values atomically (temp file + rename)."""
+        if not self.profile_path: return
+        with self._save_lock:
+            with self._lock:
+                facts = {}
+                for name, value in {**self._stale, **self._values}.items():
+                    codec = self._codecs.get(name)
+                    facts[name] = codec.encode(value) if codec else value
+            tmp_path = self.profile_path + ".tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"version": PROFILE_VERSION, "facts": facts}, f)
+                os.replace(tmp_path, self.profile_path)
+            except OSError as e:
+                print(f"[Discovery] Profile save error: {e}")
+
+    @property
+    def from_profile(self) -> bool:
+        """True while at least one handed-out value has not been revalidated yet."""
+        return bool(self._stale)
+
+    # --- Lookups ---
+
+    def _submit(self, name: str) -> Future:
+        with self._lock:
+            fut = self._futures.get(name)
+            if fut is not None: return fut
+            fut = self._futures[name] = Future()
+            self._running += 1
+        threading.Thread(target=self._run, args=(name, fut), name=f"discover-{name}", daemon=True).start()
+        return fut
+
+    def _run(self, name: str, fut: Future) -> None:
+        try:
+            value = self._loaders[name]()
+        except BaseException as e:
+            with self._lock:
+                if name in self._stale: self._values[name] = self._stale.pop(name)  # Keep the last known value
+                self._running -= 1
+            fut.set_exception(e)
+            return
+        changed = None
+        with self._lock:
+            if name not in self._overridden:
+                if name in self._stale:
+                    old = self._stale.pop(name)
+                    if old != value: changed = old
+                self._values[name] = value
+            self._running -= 1
+            done = self._running == 0
+        try:
+            if changed is not None and self.on_change:
+                self.on_change(name, changed, value)
+            if done: self.save_profile()
+        finally:
+            fut.set_result(value)  # Last, so `wait` returns with callbacks run and the profile saved
+
+    def start(self, names: Optional[Iterable[str]] = None) -> None:
+        """Starts the lookups in the background (all of them by default)."""
+        for name in (self._loaders if names is None else names): self._submit(name)
+
+    def get(self, name: str, fresh: bool = False) -> Any:
+        """Returns a fact, blocking only if it is neither known nor in the profile.
+
+        Args:
+            name: Fact name.
+            fresh: Wait for the real lookup even if a profile value exists.
+        """
+        with self._lock:
+            if name in self._values: return self._values[name]
+            if not fresh and name in self._stale:
+                self._submit(name)
+                return self._stale[name]
+        self._submit(name).result()
+        with self._lock:
+            return self._values[name]
+
+    def set(self, name: str, value: Any) -> None:
+        """Overrides a fact. Background lookups will no longer replace it."""
+        with self._lock:
+            self._overridden.add(name)
+            self._stale.pop(name, None)
+            self._values[name] = value
+
+    def ready(self, name: str) -> bool:
+        with self._lock:
+            return name in self._values or name in self._stale
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Waits for every started lookup. Returns False on timeout."""
+        with self._lock:
+            futures = list(self._futures.values())
+        return not wait_futures(futures, timeout).not_done
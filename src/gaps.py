@@ -0,0 +1,148 @@
+"""Gap Finder Module.
+
+This module finds contiguous runs of clean (non-polluted) logical processors and
+ranks them. Cores are plain Python ints used as arbitrary-width bitsets, so the
+same code handles 4 threads and 1024 threads across several processor groups.
+
+Windows never span a segment boundary. A segment is a processor group (and, once
+the topology is known, a cache/NUMA domain), because RSS cannot spread a queue
+window across those.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+Segment = Tuple[int, int]  # [start, end) in global logical processor numbering
+
+class GapWindow(NamedTuple):
+    """A contiguous clean window. `base` is a global logical processor index."""
+    base: int
+    size: int
+    score: float
+
+@dataclass
+class GapObjective:
+    """Weights used to rank windows of equal size (higher score wins).
+
+    Attributes:
+        smt_aligned: Bonus for starting on an even index, so the window covers
+            whole SMT sibling pairs.
+        distance: Bonus per logical processor of distance to the nearest polluted
+            core, normalized to the machine width.
+        p_core: Bonus scaled by the fraction of the window on performance cores.
+        position: Tie-breaker that prefers windows towards the end of the die.
+    """
+    smt_aligned: float = 1.0
+    distance: float = 0.0
+    p_core: float = 0.0
+    position: float = 0.5
+
+def mask_from_indices(indices: Iterable[int]) -> int:
+    mask = 0
+    for i in indices: mask |= 1 << i
+    return mask
+
+def indices_from_mask(mask: int) -> List[int]:
+    out, i = [], 0
+    while mask:
+        if mask & 1: out.append(i)
+        mask >>= 1
+        i += 1
+    return out
+
+def group_segments(group_sizes: Sequence[int]) -> List[Segment]:
+    """Converts per-group processor counts into global [start, end) segments."""
+    segments, start = [], 0
+    for size in group_sizes:
+        segments.append((start, start + size))
+        start += size
+    return segments
+
+def split_segments(segments: Sequence[Segment], boundaries: Sequence[Segment]) -> List[Segment]:
+    """Intersects two segment lists (e.g. processor groups with L3 domains)."""
+    out = []
+    for a0, a1 in segments:
+        for b0, b1 in boundaries:
+            lo, hi = max(a0, b0), min(a1, b1)
+            if lo < hi: out.append((lo, hi))
+    return sorted(out)
+
+def _bits(mask: int, n: int) -> str:
+    """Bit string of `mask` with index 0 first, built in one conversion."""
+    return format(mask & ((1 << n) - 1), f"0{n}b")[::-1] if n else ""
+
+def _nearest_polluted(clean_mask: int, n: int) -> List[int]:
+    """Distance from each index to the nearest polluted index (n if none)."""
+    bits = _bits(clean_mask, n)
+    dist = [n] * n
+    last = None
+    for i in range(n):
+        if bits[i] == "0": last = i
+        if last is not None: dist[i] = i - last
+    last = None
+    for i in range(n - 1, -1, -1):
+        if bits[i] == "0": last = i
+        if last is not None: dist[i] = min(dist[i], last - i)
+    return dist
+
+def find_windows(clean_mask: int, n: int, sizes: Sequence[int],
+                 segments: Optional[Sequence[Segment]] = None) -> List[Tuple[int, int]]:
+    """Lists every clean window of each requested size in one sliding pass.
+
+    Args:
+        clean_mask: Bitset of usable logical processors.
+        n: Number of logical processors.
+        sizes: Window sizes of interest.
+        segments: Ranges a window must stay inside. Defaults to the whole machine.
+
+    Returns:
+        (base, size) pairs.
+    """
+    sizes = sorted(set(s for s in sizes if s > 0))
+    bits = _bits(clean_mask, n)
+    found = []
+    for start, end in (segments or [(0, n)]):
+        run = 0
+        for i in range(start, min(end, n)):
+            run = run + 1 if bits[i] == "1" else 0
+            for s in sizes:
+                if s > run: break
+                found.append((i - s + 1, s))
+    return found
+
+def best_gap(clean_mask: int, n: int, sizes: Sequence[int] = (4, 2, 1),
+             objective: Optional[GapObjective] = None, segments: Optional[Sequence[Segment]] = None,
+             p_core_mask: int = 0, smt: bool = True) -> Optional[GapWindow]:
+    """Returns the best clean window, preferring sizes in the order given.
+
+    Args:
+        clean_mask: Bitset of usable logical processors.
+        n: Number of logical processors.
+        sizes: Candidate sizes, most preferred first.
+        objective: Ranking weights within a size. Defaults to `GapObjective()`.
+        segments: Ranges a window must stay inside.
+        p_core_mask: Bitset of performance-class processors.
+        smt: Whether SMT pairing should be rewarded.
+
+    Returns:
+        The winning `GapWindow`, or None if no processor is clean.
+    """
+    objective = objective or GapObjective()
+    windows = find_windows(clean_mask, n, sizes, segments)
+    if not windows: return None
+    present = {size for _, size in windows}
+    wanted = next(s for s in sizes if s in present)
+    dist = _nearest_polluted(clean_mask, n) if objective.distance else None
+
+    best: Optional[GapWindow] = None
+    for base, size in windows:
+        if size != wanted: continue
+        score = objective.position * base / n
+        if smt and size > 1 and base % 2 == 0: score += objective.smt_aligned
+        if dist is not None: score += objective.distance * min(dist[base], dist[base + size - 1]) / n
+        if objective.p_core and p_core_mask:
+            window_mask = ((1 << size) - 1) << base
+            score += objective.p_core * bin(window_mask & p_core_mask).count("1") / size
+        if best is None or score > best.score:
+            best = GapWindow(base, size, score)
+    return best
@@ -1,21 +1,18 @@
-from src.config import TRACE_FILE, ERROR_FILE
+from src.config import ERROR_FILE
 import flet as ft
 try:
     from flet import icons
 except ImportError:
     from flet import Icons as icons
 import time
-import psutil
 import math
 import threading
-import sys
-import os
-import pystray
-from PIL import Image, ImageDraw
+from collections import deque
 
-from src.config import ConfigManager
-from src.core import KernelSurgeon
-from src.daemon import RSSAutopilot 
+from src.allocator import Allocation
+from src.ipc import ControlClient, ControlError
+from src.telemetry import TelemetrySampler
+from src.tracing import instant, span, traced
 
 # --- RELEASE CONSTANTS ---
 COLOR_BG = "#0f0f0f"
@@ -26,20 +23,68 @@ COLOR_DESKTOP = "#00aaff"
 COLOR_TEXT_DIM = "#666666"
 FONT_MONO = "Consolas"
 
-def create_tray_image(width: int, color: str = "#00ff41") -> Image.Image:
-    image = Image.new('RGB', (width, width), (0, 0, 0))
-    dc = ImageDraw.Draw(image)
-    dc.ellipse([width//4, width//4, 3*width//4, 3*width//4], outline=color, width=4)
-    return image
+ADAPTER_PALETTE = ["#00e5ff", "#ffb300", "#d500f9", "#76ff03", "#ff4081", "#2979ff"]
+COLOR_HEAT = "#ff6a00"
+HEAT_LEVELS = 8  # Heat is quantized so small fluctuations don't resend tiles
+HEAT_FULL_SCALE = 20.0  # Interrupt + DPC percent drawn at full intensity
+
+def blend(color_a, color_b, t):
+    """Mixes two #rrggbb colors, t=0 -> a, t=1 -> b."""
+    a = [int(color_a[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(color_b[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(a, b))
+
+class FrameThrottle:
+    """Calls `fn` at most once per `interval`, always delivering the latest arguments.
+
+    The first call in a quiet period runs immediately; calls arriving during the
+    interval collapse into one trailing call, so the final slider position is
+    never lost.
+    """
+
+    def __init__(self, fn, interval=1 / 60):
+        self.fn = fn
+        self.interval = interval
+        self._last = 0.0
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            wait = self._last + self.interval - time.monotonic()
+            if wait <= 0 and self._timer is None:
+                self._last = time.monotonic()
+                run_now = True
+            else:
+                self._pending = args
+                run_now = False
+                if self._timer is None:
+                    self._timer = threading.Timer(max(wait, 0), self._trailing)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if run_now: self.fn(*args)
+
+    def _trailing(self):
+        with self._lock:
+            args, self._pending, self._timer = self._pending, None, None
+            self._last = time.monotonic()
+        if args is not None: self.fn(*args)
 
 class CpuCoreGrid(ft.Container):
-    def __init__(self, physical_cores, logical_procs, base, max_p, polluted_indices=None):
+    """Tile per logical processor. Tiles are created once and only changed tiles are sent to Flet."""
+
+    def __init__(self, physical_cores, logical_procs, base, max_p, polluted_indices=None, p_core_indices=None):
         super().__init__()
         self.p_cores = physical_cores
         self.l_procs = logical_procs
+        self.p_core_indices = set(p_core_indices) if p_core_indices is not None else set(range(logical_procs))
         self.base = base
         self.max_p = max_p
         self.polluted_indices = set(polluted_indices) if polluted_indices else set()
+        self.adapter_map = {}  # adapter name -> Allocation, drawn instead of base/max_p when set
+        self.heat = [0] * logical_procs  # Quantized interrupt + DPC load per tile, 0..HEAT_LEVELS
+        self.tiles_sent = 0  # Tiles pushed to Flet since creation (for benchmarks)
         cols = math.ceil(math.sqrt(self.l_procs))
         self.grid = ft.GridView(runs_count=cols, spacing=8, run_spacing=8, padding=10, expand=True)
         self.content = self.grid
@@ -47,30 +92,101 @@ class CpuCoreGrid(ft.Container):
         self.border_radius = 12
         self.border = ft.border.all(1, "#333333")
         self.expand = True 
+        self._states = []
         self.build_grid()
 
     def update_config(self, base, max_p):
         self.base = int(base)
         self.max_p = int(max_p)
-        self.build_grid()
-        self.update()
+        self.adapter_map = {}
+        self.refresh()
 
-    def build_grid(self):
-        self.grid.controls.clear()
+    def update_adapters(self, adapter_map):
+        self.adapter_map = dict(adapter_map)
+        self.refresh()
+
+    def update_heat(self, load_percent):
+        """Shades tiles by measured interrupt + DPC load (percent of one CPU each)."""
+        self.heat = [min(HEAT_LEVELS, round(v / HEAT_FULL_SCALE * HEAT_LEVELS)) for v in load_percent[:self.l_procs]]
+        self.heat += [0] * (self.l_procs - len(self.heat))
+        return self.refresh()
+
+    def _owners(self):
+        """Logical processor -> (color, tooltip) for the per-adapter view."""
+        owners = {}
+        for idx, (name, a) in enumerate(sorted(self.adapter_map.items())):
+            color = ADAPTER_PALETTE[idx % len(ADAPTER_PALETTE)]
+            for i in range(a.base, a.base + a.size):
+                prev = owners.get(i)
+                owners[i] = (color, f"{prev[1]}, {name}" if prev else name)
+        return owners
+
+    def _tile_states(self):
+        """(background, border color, text color, tooltip) for every tile, heat blended into the background."""
+        states = []
         end = self.base + self.max_p
+        owners = self._owners() if self.adapter_map else None
         for i in range(self.l_procs):
-            is_active = self.base <= i < end
+            owner = owners.get(i) if owners is not None else None
+            is_active = owner is not None if owners is not None else self.base <= i < end
             is_polluted = i in self.polluted_indices
             bg_color = "#222222"
-            border_color = "transparent"
-            if is_active:
-                bg_color = COLOR_ACCENT if i < self.p_cores else "#008f24"
+            border_color = None
+            if owner:
+                bg_color = owner[0]
+            elif is_active:
+                bg_color = COLOR_ACCENT if i in self.p_core_indices else "#008f24"
             if is_polluted:
                 border_color = "#ff0000"
                 if not is_active: bg_color = "#331111"
-            self.grid.controls.append(ft.Container(content=ft.Text(f"{i}", size=12, weight="bold", color="white" if is_active else "#555555"), bgcolor=bg_color, border=ft.border.all(2, border_color) if border_color != "transparent" else None, border_radius=6, alignment=ft.alignment.center))
+            tooltip = owner[1] if owner else None
+            level = self.heat[i]
+            if level:
+                bg_color = blend(bg_color, COLOR_HEAT, 0.25 + 0.75 * level / HEAT_LEVELS)
+                load = f"IRQ/DPC ~{level * HEAT_FULL_SCALE / HEAT_LEVELS:.1f}%"
+                tooltip = f"{tooltip} | {load}" if tooltip else load
+            states.append((bg_color, border_color, "white" if is_active or level else "#555555", tooltip))
+        return states
+
+    @staticmethod
+    def _paint(tile, state):
+        bg_color, border_color, text_color, tooltip = state
+        tile.bgcolor = bg_color
+        tile.border = ft.border.all(2, border_color) if border_color else None
+        tile.content.color = text_color
+        tile.tooltip = tooltip
+
+    def build_grid(self):
+        """Creates every tile from scratch (initial build)."""
+        self._states = self._tile_states()
+        self.grid.controls = [ft.Container(content=ft.Text(f"{i}", size=12, weight="bold"), border_radius=6, alignment=ft.alignment.center)
+                              for i in range(self.l_procs)]
+        for tile, state in zip(self.grid.controls, self._states): self._paint(tile, state)
+        self.tiles_sent += self.l_procs
+
+    def refresh(self):
+        """Repaints only the tiles whose state changed and sends them in one batch.
+
+        Returns:
+            Number of tiles that changed.
+        """
+        states = self._tile_states()
+        changed = []
+        for i, (old, new) in enumerate(zip(self._states, states)):
+            if old != new:
+                self._paint(self.grid.controls[i], new)
+                changed.append(self.grid.controls[i])
+        self._states = states
+        if changed:
+            self.tiles_sent += len(changed)
+            if self.page: self.page.update(*changed)
+        return len(changed)
 
 class ConsoleLog(ft.Container):
+    """Bounded event log. Lines may come from any thread and are flushed to Flet in batches."""
+    MAX_LINES = 100
+    FLUSH_INTERVAL = 0.05
+
     def __init__(self):
         super().__init__()
         self.log_view = ft.ListView(expand=True, spacing=2, auto_scroll=True)
@@ -80,18 +196,48 @@ class ConsoleLog(ft.Container):
         self.border_radius = 8
         self.padding = 10
         self.height = 180
+        self.lines = deque(maxlen=self.MAX_LINES)
+        self.flushes = 0  # Batches pushed to Flet (for benchmarks)
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._flusher = None
     
     def log(self, message, color="white"):
+        """Queues a line. Safe to call from any thread; never blocks on Flet."""
         ts = time.strftime("%H:%M:%S")
-        self.log_view.controls.append(ft.Text(f"[{ts}] {message}", font_family=FONT_MONO, size=11, color=color))
-        if len(self.log_view.controls) > 100: self.log_view.controls.pop(0)
-        try: self.update()
-        except: pass
+        self._queue.append((f"[{ts}] {message}", color))
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="console-flush", daemon=True)
+            self._flusher.start()
+        self._wake.set()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+            time.sleep(self.FLUSH_INTERVAL)  # Lines arriving meanwhile join the next batch
+
+    def flush(self):
+        """Moves every queued line into the view with a single update."""
+        if not self._queue: return
+        batch = []
+        while self._queue: batch.append(self._queue.popleft())
+        for text, color in batch[-self.MAX_LINES:]:
+            self.lines.append(ft.Text(text, font_family=FONT_MONO, size=11, color=color))
+        self.log_view.controls = list(self.lines)
+        self.flushes += 1
+        if self.page:
+            try: self.update()
+            except: pass
 
-def main_gui(page: ft.Page, start_minimized=False):
-    config = ConfigManager()
-    surgeon = KernelSurgeon()
-    topo = surgeon.get_topology_info()
+@traced("gui.build", cat="gui")
+def main_gui(page: ft.Page, client: ControlClient):
+    """Builds the dashboard as a client of the running daemon."""
+    with span("gui.fetch_state", cat="gui"):
+        config = client.call("get_config")["config"]
+        status = client.status()
+    topo = status["topology"]
 
     def update_ui_from_state(base, max_p, manual_active):
         """Syncs all UI elements with current settings."""
@@ -104,30 +250,27 @@ def main_gui(page: ft.Page, start_minimized=False):
         cpu_grid.update_config(base, max_p)
         page.update()
 
-    def on_autopilot_status(msg, color):
+    def on_autopilot_status(msg, color, snapshot):
+        status.update(snapshot)
         console.log(f"Sentinel: {msg}", color)
         # If autopilot changed settings, reflect it on the grid (even if sliders are locked)
         if not sw_manual.value:
-            # We don't have direct access to autopilot's current target here easily, 
-            # but we can refresh the grid based on what the surgeon just applied.
-            # In a real scenario, we might want to pass (base, max) in the callback.
-            pass
-        if tray_icon:
-            tray_icon.title = f"RSS Sentinel: {msg}"
-            tray_icon.icon = create_tray_image(64, color)
-
-    def on_tray_exit(icon, item):
-        autopilot.stop()
-        icon.stop()
-        page.window_destroy()
-        sys.exit(0)
-            
-    def run_tray():
-        nonlocal tray_icon
-        menu = pystray.Menu(pystray.MenuItem("Restore Dashboard", lambda: (setattr(page, 'window_visible', True), page.update())), 
-                            pystray.MenuItem("Exit Fully", on_tray_exit))
-        tray_icon = pystray.Icon("RSS-Sentinel", create_tray_image(64), "RSS Sentinel Active", menu)
-        tray_icon.run()
+            if snapshot["mode"] == "GAMING" and snapshot["gaming_windows"]:
+                cpu_grid.update_adapters({nic: Allocation(*a) for nic, a in snapshot["gaming_windows"].items()})
+            elif snapshot["mode"] == "GAMING":
+                cpu_grid.update_config(snapshot["gaming"]["base"], snapshot["gaming"]["max"])
+            else:
+                cpu_grid.update_config(snapshot["desktop"]["base"], snapshot["desktop"]["max"])
+
+    def follow_events():
+        for event in client.events():
+            if event.get("event") == "status": on_autopilot_status(event["msg"], event["color"], event["status"])
+            elif event.get("event") == "log": console.log(event["line"], COLOR_TEXT_DIM)
+        console.log("Daemon disconnected.", COLOR_GAMING)
+
+    def send(action, *args):
+        try: action(*args)
+        except ControlError as e: console.log(f"Daemon error: {e}", COLOR_GAMING)
 
     try:
         page.title = "RSS SENTINEL PRO"
@@ -136,44 +279,48 @@ def main_gui(page: ft.Page, start_minimized=False):
         page.theme_mode = ft.ThemeMode.DARK
         page.bgcolor = COLOR_BG
         page.padding = 25
-        page.window_prevent_close = True
-        page.window_visible = not start_minimized
 
         console = ConsoleLog()
-        cpu_grid = CpuCoreGrid(topo["physical"], topo["logical"], config.get("manual_base"), config.get("manual_max"), polluted_indices=surgeon.polluted_cores)
+        cpu_grid = CpuCoreGrid(topo["physical"], topo["logical"], config.get("manual_base"), config.get("manual_max"), polluted_indices=status["polluted_cores"], p_core_indices=topo.get("p_core_indices"))
 
-        autopilot = RSSAutopilot(surgeon, config, on_autopilot_status)
-        threading.Thread(target=autopilot.run_loop, daemon=True).start()
+        # Live interrupt/DPC load, sampled in this process only while the dashboard is open
+        sampler = TelemetrySampler().start()
 
-        tray_icon = None
-        threading.Thread(target=run_tray, daemon=True).start()
+        def follow_heat():
+            while not sampler.wait(0.5): cpu_grid.update_heat(sampler.heat(1.0))
+        threading.Thread(target=follow_heat, daemon=True).start()
 
-        page.on_window_event = lambda e: (setattr(page, 'window_visible', False) or page.update()) if e.data == "close" else None
+        # Closing the window only detaches; the daemon keeps running
+        page.on_disconnect = lambda e: (sampler.stop(), client.close())
 
         def on_save(e):
-            config.set("manual_mode", sw_manual.value)
+            changes = {"manual_mode": sw_manual.value, "autostart": sw_autostart.value}
             if sw_manual.value:
-                config.set("manual_base", int(sl_base.value))
-                config.set("manual_max", int(sl_max.value))
-                config.set("manual_profile", dd_profile.value)
-            
-            config.set("autostart", sw_autostart.value)
-            surgeon.manage_autostart(sw_autostart.value)
+                changes.update(manual_base=int(sl_base.value), manual_max=int(sl_max.value), manual_profile=dd_profile.value)
+            config.update(changes)
+            send(client.update_config, changes)
+            send(lambda: client.call("autostart", enable=sw_autostart.value))
+            if not sw_manual.value: send(client.force, None)  # Back to automatic switching
             
             # Update visual state
             update_ui_from_state(int(sl_base.value), int(sl_max.value), sw_manual.value)
             console.log("Configuration updated.", COLOR_ACCENT)
 
+        def render_sliders(base, max_p):
+            lbl_base.value = f"Base Core: {base}"
+            lbl_max.value = f"Core Range (Queues): {max_p}"
+            page.update(lbl_base, lbl_max)
+            cpu_grid.update_config(base, max_p)
+
+        slider_throttle = FrameThrottle(render_sliders)
+
         def on_slider_change(e):
-            lbl_base.value = f"Base Core: {int(sl_base.value)}"
-            lbl_max.value = f"Core Range (Queues): {int(sl_max.value)}"
-            cpu_grid.update_config(sl_base.value, sl_max.value)
-            page.update()
+            slider_throttle(int(sl_base.value), int(sl_max.value))
 
         def force_mode(mode_type):
             sw_manual.value = True
             if mode_type == "GAMING":
-                base, queues = surgeon.calculate_best_gap()
+                base, queues = status["gaming"]["base"], status["gaming"]["queues"]
                 sl_base.value = base
                 sl_max.value = queues
                 dd_profile.value = "NUMAStatic"
@@ -184,6 +331,7 @@ def main_gui(page: ft.Page, start_minimized=False):
                 dd_profile.value = "Closest"
                 console.log("Manual Override: DESKTOP (Max)", COLOR_DESKTOP)
             on_save(None)
+            send(client.force, mode_type)
 
         # UI Elements
         sw_manual = ft.Switch(label="MANUAL OVERRIDE", value=config.get("manual_mode"), on_change=on_save, active_color=COLOR_ACCENT)
@@ -242,11 +390,15 @@ def main_gui(page: ft.Page, start_minimized=False):
             ], expand=1)
         )
         console.log("Sentinel Pro Online.", COLOR_ACCENT)
-        console.log(f"Isolated: {surgeon.polluted_cores}", "#ffaa00")
+        console.log(f"Isolated: {status['polluted_cores']}", "#ffaa00")
+        if status["mode"] != "UNKNOWN": console.log(f"Sentinel: {status['mode']} MODE", COLOR_ACCENT)
+        threading.Thread(target=follow_events, daemon=True).start()
+        instant("gui ready", cat="gui")
 
     except Exception as e:
         with open(ERROR_FILE, "a") as f: f.write(f"GUI Error: {e}\n")
         page.add(ft.Text(f"CRITICAL UI ERROR: {e}", color="red"))
 
-def run_gui(start_minimized=False):
-    ft.app(target=lambda p: main_gui(p, start_minimized))
+def run_gui(client: ControlClient):
+    instant("gui start", cat="gui")
+    ft.app(target=lambda p: main_gui(p, client))
@@ -0,0 +1,339 @@
+"""Control Channel Module.
+
+This module connects the headless daemon to its clients (dashboard, tray icon,
+scripts) over local IPC. It uses `multiprocessing.connection`, so the transport
+is a named pipe on Windows and a Unix socket elsewhere. Messages are JSON objects
+sent as byte frames, never pickles, because the daemon runs elevated and must
+not run code on behalf of whoever connects. The shared key and the endpoint are
+readable by the current user only, and every request is checked against
+`REQUESTS` before it reaches a handler.
+
+Requests and replies:
+    {"cmd": "status"}                              -> {"ok": True, "status": {...}}
+    {"cmd": "force", "mode": "GAMING"|"DESKTOP"|None}
+    {"cmd": "get_config"}                          -> {"ok": True, "config": {...}}
+    {"cmd": "set_config", "values": {...}}
+    {"cmd": "autostart", "enable": bool}
+    {"cmd": "stop"}
+Failures reply {"ok": False, "error": "..."}.
+
+After {"cmd": "subscribe"} the connection only carries events, for example
+{"event": "status", "msg": ..., "color": ..., "status": {...}} and
+{"event": "log", "line": ...}.
+"""
+
+import io
+import json
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Connection, Listener, address_type
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.config import PROJECT_ROOT
+
+PIPE_NAME = "RSS-Sentinel"
+AUTHKEY_FILE = os.path.join(PROJECT_ROOT, "ipc.key")
+MAX_MESSAGE = 1 << 20  # Bytes; requests are tiny, so anything larger is refused
+
+# Command -> {argument: check}. Every argument is required and no others are accepted.
+REQUESTS: Dict[str, Dict[str, Callable[[Any], bool]]] = {
+    "status": {},
+    "get_config": {},
+    "stop": {},
+    "subscribe": {},
+    "force": {"mode": lambda v: v in (None, "GAMING", "DESKTOP")},
+    "set_config": {"values": lambda v: isinstance(v, dict)},
+    "autostart": {"enable": lambda v: isinstance(v, bool)},
+}
+
+class ControlError(Exception):
+    """Raised by `ControlClient` when the daemon rejects a request or cannot be reached."""
+
+def default_address() -> Tuple[str, str]:
+    """Returns (address, family) of the daemon's endpoint on this platform."""
+    if sys.platform == "win32":
+        return rf"\\.\pipe\{PIPE_NAME}", "AF_PIPE"
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"rss-sentinel-{uid}.sock"), "AF_UNIX"
+
+def _owner_only_attributes():
+    """Windows security attributes whose DACL grants the current user, and nobody else, full access."""
+    import ntsecuritycon
+    import win32api
+    import win32security
+    token = win32security.OpenProcessToken(win32api.GetCurrentProcess(), win32security.TOKEN_QUERY)
+    user = win32security.GetTokenInformation(token, win32security.TokenUser)[0]
+    dacl = win32security.ACL()
+    dacl.AddAccessAllowedAce(win32security.ACL_REVISION, ntsecuritycon.GENERIC_ALL, user)
+    descriptor = win32security.SECURITY_DESCRIPTOR()
+    descriptor.SetSecurityDescriptorOwner(user, False)
+    descriptor.SetSecurityDescriptorDacl(True, dacl, False)
+    descriptor.SetSecurityDescriptorControl(win32security.SE_DACL_PROTECTED, win32security.SE_DACL_PROTECTED)  # No inherited ACEs
+    attributes = win32security.SECURITY_ATTRIBUTES()
+    attributes.SECURITY_DESCRIPTOR = descriptor
+    return attributes
+
+def _write_private(path: str, data: bytes) -> None:
+    """Creates or replaces `path` with `data`, readable and writable by the current user only."""
+    if os.path.exists(path): os.unlink(path)  # An existing file would keep its old permissions
+    if sys.platform == "win32":
+        import win32file
+        handle = win32file.CreateFile(path, win32file.GENERIC_WRITE, 0, _owner_only_attributes(), win32file.CREATE_ALWAYS, 0, None)
+        try: win32file.WriteFile(handle, data)
+        finally: handle.Close()
+        return
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f: f.write(data)
+
+def load_authkey(path: str = AUTHKEY_FILE, create: bool = False) -> bytes:
+    """Reads the shared secret.
+
+    With `create` (the daemon), a missing key is generated, and the file is rewritten
+    owner-only either way, so a key file left with wider permissions is tightened.
+    """
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+    except FileNotFoundError:
+        if not create: raise ControlError("daemon is not running (no IPC key)")
+        key = secrets.token_bytes(32)
+    if create: _write_private(path, key)
+    return key
+
+def validate_request(request: Any) -> str:
+    """Checks a decoded request against `REQUESTS` and returns its command.
+
+    Raises:
+        ValueError: If the command is unknown or an argument is missing, unexpected or invalid.
+    """
+    if not isinstance(request, dict): raise ValueError("request is not an object")
+    cmd = request.get("cmd")
+    spec = REQUESTS.get(cmd) if isinstance(cmd, str) else None
+    if spec is None: raise ValueError(f"unknown command {cmd!r}")
+    args = set(request) - {"cmd"}
+    if args != set(spec): raise ValueError(f"{cmd} takes {sorted(spec)}, got {sorted(args)}")
+    for name, check in spec.items():
+        if not check(request[name]): raise ValueError(f"invalid {name} for {cmd}: {request[name]!r}")
+    return cmd
+
+def send_message(conn: Connection, message: Dict[str, Any]) -> None:
+    """Sends one JSON frame. Raises ValueError if `message` is not plain data."""
+    try: frame = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    except TypeError as e: raise ValueError(str(e))
+    conn.send_bytes(frame)
+
+def recv_message(conn: Connection, maxlength: Optional[int] = None) -> Any:
+    """Receives one JSON frame. Raises ValueError if it is not valid JSON."""
+    return json.loads(conn.recv_bytes(maxlength).decode("utf-8"))
+
+if sys.platform == "win32":
+    from multiprocessing.connection import PipeListener, BUFSIZE
+    import _winapi
+
+    class _OwnerOnlyPipeListener(PipeListener):
+        """`PipeListener` whose pipe instances carry an owner-only DACL instead of the default one."""
+
+        def _new_handle(self, first=False):
+            import win32pipe
+            flags = _winapi.PIPE_ACCESS_DUPLEX | _winapi.FILE_FLAG_OVERLAPPED
+            if first: flags |= _winapi.FILE_FLAG_FIRST_PIPE_INSTANCE
+            handle = win32pipe.CreateNamedPipe(
+                self._address, flags, _winapi.PIPE_TYPE_MESSAGE | _winapi.PIPE_READMODE_MESSAGE | _winapi.PIPE_WAIT,
+                _winapi.PIPE_UNLIMITED_INSTANCES, BUFSIZE, BUFSIZE, _winapi.NMPWAIT_WAIT_FOREVER, _owner_only_attributes())
+            return handle.Detach()
+
+    class _OwnerOnlyListener(Listener):
+        """`Listener` over `_OwnerOnlyPipeListener`. The stock one has no hook for the pipe's security."""
+
+        def __init__(self, address: str, authkey: bytes):
+            self._listener = _OwnerOnlyPipeListener(address)
+            self._authkey = authkey
+
+def _listen(address: str, family: Optional[str], authkey: bytes) -> Listener:
+    """Binds a listener that only the current user can connect to."""
+    family = family or address_type(address)
+    if family == "AF_PIPE":
+        return _OwnerOnlyListener(address, authkey)
+    listener = Listener(address, family, authkey=authkey)
+    if family == "AF_UNIX": os.chmod(address, 0o600)
+    return listener
+
+class _EventTee(io.TextIOBase):
+    """Copies everything written to a stream into `log` events, line by line."""
+
+    def __init__(self, stream, publish: Callable[[Dict[str, Any]], None]):
+        self._stream = stream
+        self._publish = publish
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        if self._stream is not None:
+            try: self._stream.write(text)
+            except (OSError, ValueError): pass
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            if line: self._publish({"event": "log", "line": line})
+        return len(text)
+
+    def flush(self) -> None:
+        if self._stream is not None:
+            try: self._stream.flush()
+            except (OSError, ValueError): pass
+
+class ControlServer:
+    """Serves control requests and pushes events to subscribed clients.
+
+    Attributes:
+        address: Endpoint the server listens on.
+        handlers: Command name -> callable taking the request dict and returning a reply dict.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]],
+                 address: Optional[str] = None, family: Optional[str] = None, authkey: Optional[bytes] = None):
+        default, default_family = default_address()
+        self.address = address or default
+        self.family = family or (default_family if address is None else None)
+        self.handlers = dict(handlers)
+        self._authkey = authkey if authkey is not None else load_authkey(create=True)
+        self._listener: Optional[Listener] = None
+        self._subscribers: List[Connection] = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def start(self) -> None:
+        """Binds the endpoint and accepts clients on a background thread."""
+        try:
+            Client(self.address, self.family, authkey=self._authkey).close()
+        except (OSError, EOFError):
+            if self.family == "AF_UNIX" and os.path.exists(self.address): os.unlink(self.address)  # Stale socket file
+        else:
+            raise ControlError(f"another daemon is listening on {self.address}")
+        self._listener = _listen(self.address, self.family, self._authkey)
+        threading.Thread(target=self._accept_loop, name="ipc-accept", daemon=True).start()
+
+    def _accept_loop(self) -> None:
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed.is_set(): return
+                continue  # Failed handshake (wrong key) or a client that went away
+            threading.Thread(target=self._serve, args=(conn,), name="ipc-client", daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        try:
+            while True:
+                try:
+                    request = recv_message(conn, MAX_MESSAGE)
+                    cmd = validate_request(request)
+                except ValueError as e:
+                    send_message(conn, {"ok": False, "error": f"bad request: {e}"})
+                    continue
+                if cmd == "subscribe":
+                    with self._lock: self._subscribers.append(conn)
+                    send_message(conn, {"ok": True})
+                    return  # Events are pushed by `publish`; the connection stays open
+                handler = self.handlers.get(cmd)
+                try:
+                    reply = handler(request) if handler else {"ok": False, "error": f"unsupported command {cmd!r}"}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                try: send_message(conn, reply)
+                except ValueError as e: send_message(conn, {"ok": False, "error": f"reply is not plain data: {e}"})
+        except (OSError, EOFError):
+            conn.close()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Sends `event` to every subscriber, dropping the ones that went away."""
+        with self._lock:
+            alive = []
+            for conn in self._subscribers:
+                try:
+                    send_message(conn, event)
+                    alive.append(conn)
+                except (OSError, ValueError):
+                    conn.close()
+            self._subscribers = alive
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def capture_output(self) -> None:
+        """Mirrors stdout into `log` events so attached clients see the daemon's log."""
+        sys.stdout = _EventTee(sys.stdout, self.publish)
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._listener is not None:
+            try: self._listener.close()
+            except OSError: pass
+        with self._lock:
+            for conn in self._subscribers: conn.close()
+            self._subscribers = []
+
+class ControlClient:
+    """Talks to a running daemon.
+
+    Attributes:
+        address: Daemon endpoint.
+    """
+
+    def __init__(self, address: Optional[str] = None, family: Optional[str] = None, authkey: Optional[bytes] = None):
+        default, default_family = default_address()
+        self.address = address or default
+        self.family = family or (default_family if address is None else None)
+        self._authkey = authkey if authkey is not None else load_authkey()
+        self._conn: Optional[Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        try:
+            return Client(self.address, self.family, authkey=self._authkey)
+        except (OSError, EOFError) as e:
+            raise ControlError(f"daemon is not reachable at {self.address}: {e}")
+
+    def call(self, cmd: str, **args: Any) -> Dict[str, Any]:
+        """Sends one request and returns the reply. Raises `ControlError` if it failed."""
+        with self._lock:
+            if self._conn is None: self._conn = self._connect()
+            try:
+                send_message(self._conn, {"cmd": cmd, **args})
+                reply = recv_message(self._conn)
+            except (OSError, EOFError, ValueError) as e:
+                self._conn = None
+                raise ControlError(f"lost connection to daemon: {e}")
+        if not reply.get("ok"): raise ControlError(reply.get("error", "request failed"))
+        return reply
+
+    def status(self) -> Dict[str, Any]:
+        return self.call("status")["status"]
+
+    def force(self, mode: Optional[str]) -> None:
+        self.call("force", mode=mode)
+
+    def update_config(self, values: Dict[str, Any]) -> None:
+        self.call("set_config", values=values)
+
+    def events(self) -> Iterator[Dict[str, Any]]:
+        """Yields pushed events on a dedicated connection until the daemon goes away."""
+        conn = self._connect()
+        try:
+            send_message(conn, {"cmd": "subscribe"})
+            recv_message(conn)
+            while True:
+                yield recv_message(conn)
+        except (OSError, EOFError, ValueError):
+            return
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,228 @@
+"""IRQ Affinity Scanner Module.
+
+This module walks `HKLM\\SYSTEM\\CurrentControlSet\\Enum` in-process and ORs every
+`Affinity Policy\\AssignmentSetOverride` mask it finds into one pollution mask.
+
+Each key's last-write time is cached together with its subkey list and mask. A
+key whose last-write time is unchanged is not enumerated or read again. Every key
+is still opened on every scan: a key's last-write time only moves when its own
+values or direct subkeys change, not when something deeper in its subtree does,
+so an unchanged parent says nothing about its children. The cache saves the
+enumeration and value reads, which is why a warm scan costs about half a cold one.
+
+The cache is persisted for the next start, but only once enough keys have been
+re-read since the last save. Rewriting it costs more than re-reading a few
+changed keys, and an outdated entry is only ever a cache miss. Top-level
+subtrees are scanned in parallel.
+"""
+
+import json
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+ENUM_ROOT = r"SYSTEM\CurrentControlSet\Enum"
+POLICY_KEY = "Affinity Policy"
+POLICY_VALUE = "AssignmentSetOverride"
+
+class KeyInfo(NamedTuple):
+    """Result of reading one key. `subkeys`/`value` are None when the key was unchanged."""
+    last_write: int
+    subkeys: Optional[List[str]]
+    value: Any
+
+class RegistryAccess:
+    """Read-only view of an HKLM-rooted registry tree."""
+
+    def read_key(self, path: str, known_last_write: Optional[int] = None,
+                 value_name: Optional[str] = None) -> Optional[KeyInfo]:
+        """Reads a key in a single open.
+
+        Args:
+            path: Key path relative to HKLM.
+            known_last_write: If the key's last-write time equals this, subkeys and
+                value are not read.
+            value_name: Value to read alongside the subkeys, if any.
+
+        Returns:
+            A `KeyInfo`, or None if the key is missing or inaccessible.
+        """
+        raise NotImplementedError
+
+class WinRegistry(RegistryAccess):
+    """`RegistryAccess` backed by winreg."""
+
+    def read_key(self, path, known_last_write=None, value_name=None):
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, path, 0, winreg.KEY_READ) as key:
+                n_sub, _, last_write = winreg.QueryInfoKey(key)
+                if last_write == known_last_write:
+                    return KeyInfo(last_write, None, None)
+                subkeys = [winreg.EnumKey(key, i) for i in range(n_sub)]
+                value = None
+                if value_name:
+                    try: value = winreg.QueryValueEx(key, value_name)[0]
+                    except OSError: pass
+                return KeyInfo(last_write, subkeys, value)
+        except OSError:
+            return None
+
+def mask_of(value: Any) -> int:
+    """Decodes an AssignmentSetOverride value (little-endian bytes or integer)."""
+    if isinstance(value, (bytes, bytearray)): return int.from_bytes(value, "little")
+    if isinstance(value, int): return value
+    return 0
+
+class AffinityScanner:
+    """Cached, parallel walker for device interrupt affinity overrides.
+
+    Attributes:
+        registry: Registry access layer.
+        cache_path: JSON file the key cache is persisted to (None disables persistence).
+        workers: Number of subtrees scanned concurrently.
+        keys_read: Keys enumerated during the last scan (cache misses).
+        keys_seen: Keys visited during the last scan.
+        SAVE_FRACTION: Share of the tree that must have been re-read since the
+            last save before the cache is written again.
+    """
+    CACHE_VERSION = 1
+    SAVE_FRACTION = 0.05
+
+    def __init__(self, registry: Optional[RegistryAccess] = None, cache_path: Optional[str] = None,
+                 workers: int = 8, root: str = ENUM_ROOT):
+        self.registry = registry or WinRegistry()
+        self.cache_path = cache_path
+        self.workers = max(1, workers)
+        self.root = root
+        self.keys_read = 0
+        self.keys_seen = 0
+        # path -> [last_write, subkeys, mask]
+        self._cache: Dict[str, list] = self._load_cache()
+        self._unsaved = 0  # Keys re-read or dropped since the cache was last written
+
+    def _load_cache(self) -> Dict[str, list]:
+        if not self.cache_path or not os.path.exists(self.cache_path): return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                blob = json.load(f)
+            if blob.get("version") == self.CACHE_VERSION and blob.get("root") == self.root:
+                return blob["keys"]
+        except (ValueError, OSError, KeyError) as e:
+            print(f"[IrqScan] Cache load error: {e}")
+        return {}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path: return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path) or ".", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": self.CACHE_VERSION, "root": self.root, "keys": self._cache}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[IrqScan] Cache save error: {e}")
+
+    def _walk(self, start: str) -> Tuple[int, Dict[str, list], int, int]:
+        """Scans one subtree. Returns (mask, fresh cache entries, keys seen, keys read)."""
+        mask, fresh, seen, read = 0, {}, 0, 0
+        stack = [start]
+        while stack:
+            path = stack.pop()
+            cached = self._cache.get(path)
+            is_policy = path.endswith(POLICY_KEY)
+            info = self.registry.read_key(path, cached[0] if cached else None, POLICY_VALUE if is_policy else None)
+            if info is None: continue
+            seen += 1
+            if info.subkeys is None:
+                entry = cached
+            else:
+                read += 1
+                entry = [info.last_write, info.subkeys, mask_of(info.value) if is_policy else 0]
+            fresh[path] = entry
+            mask |= entry[2]
+            stack.extend(path + "\\" + name for name in entry[1])
+        return mask, fresh, seen, read
+
+    def scan(self) -> int:
+        """Walks the tree and returns the OR of all affinity override masks."""
+        root_info = self.registry.read_key(self.root)
+        if root_info is None: return 0
+        subtrees = [self.root + "\\" + name for name in root_info.subkeys]
+
+        mask, fresh, seen, read = 0, {}, 1, 1
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for sub_mask, sub_fresh, sub_seen, sub_read in pool.map(self._walk, subtrees):
+                mask |= sub_mask
+                fresh.update(sub_fresh)
+                seen += sub_seen
+                read += sub_read
+
+        self._unsaved += read - 1 + max(0, len(self._cache) - len(fresh))
+        self._cache = fresh
+        self.keys_seen, self.keys_read = seen, read
+        if self._unsaved > self.SAVE_FRACTION * seen:
+            self._save_cache()
+            self._unsaved = 0
+        return mask
+
+# --- SYNTHETIC REGISTRY ---
+
+class SyntheticRegistry(RegistryAccess):
+    """An in-memory registry tree for tests and benchmarks.
+
+    Attributes:
+        keys: path -> [last_write, subkey names, values dict].
+    """
+
+    def __init__(self):
+        self.keys: Dict[str, list] = {}
+        self._clock = 1
+
+    def add(self, path: str, values: Optional[Dict[str, Any]] = None) -> None:
+        parent, _, name = path.rpartition("\\")
+        if parent and parent not in self.keys: self.add(parent)
+        if path not in self.keys:
+            self.keys[path] = [self._tick(), [], {}]
+            if parent:
+                self.keys[parent][1].append(name)
+                self.keys[parent][0] = self._tick()
+        if values: self.touch(path, values)
+
+    def touch(self, path: str, values: Optional[Dict[str, Any]] = None) -> None:
+        entry = self.keys[path]
+        entry[0] = self._tick()
+        if values: entry[2].update(values)
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def read_key(self, path, known_last_write=None, value_name=None):
+        entry = self.keys.get(path)
+        if entry is None: return None
+        if entry[0] == known_last_write: return KeyInfo(entry[0], None, None)
+        return KeyInfo(entry[0], list(entry[1]), entry[2].get(value_name) if value_name else None)
+
+def build_synthetic_tree(n_keys: int = 100_000, policy_ratio: float = 0.02, seed: int = 3) -> SyntheticRegistry:
+    """Builds an Enum-shaped tree with roughly `n_keys` keys."""
+    rng = random.Random(seed)
+    reg = SyntheticRegistry()
+    reg.add(ENUM_ROOT)
+    buses = ["PCI", "USB", "HID", "ACPI", "SWD", "ROOT", "HDAUDIO", "BTHENUM"]
+    i = 0
+    while len(reg.keys) < n_keys:
+        inst = f"{ENUM_ROOT}\\{buses[i % len(buses)]}\\DEV_{i // 4:05X}\\{i:06d}"
+        reg.add(inst + "\\Properties")
+        if rng.random() < policy_ratio:
+            reg.add(inst + "\\Device Parameters\\Interrupt Management\\" + POLICY_KEY,
+                    {POLICY_VALUE: (1 << rng.randrange(128)).to_bytes(16, "little")})
+        else:
+            reg.add(inst + "\\Device Parameters")
+        i += 1
+    return reg
@@ -0,0 +1,193 @@
+"""Network Jitter Benchmark Module.
+
+This module measures round-trip latency to a nearby host with paced,
+timestamped echo probes and records the results in a compact log-bucketed
+(HDR-style) histogram.
+
+A probe counts as answered only when it comes back: as an ICMP echo reply, or
+from a UDP echo responder. ICMP errors such as port unreachable are rate limited
+by most hosts, so they say little about latency and are not used. A run that
+lost too many probes is not a measurement of the path; callers drop it by the
+"loss" field of its summary.
+"""
+
+import math
+import os
+import socket
+import struct
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+from src.probe import echo_request, open_icmp_socket, parse_echo_reply
+
+BURST_MAX_DURATION = 3.0  # Default cap on one run, in seconds: 200 probes at 10 ms plus their round trips
+
+class LatencyHistogram:
+    """Log-bucketed histogram of integer microsecond values.
+
+    Values below 2**sub_bits are stored exactly. Above that, each power of two is
+    split into 2**(sub_bits-1) buckets, which bounds the relative error to about
+    1 / 2**(sub_bits-1).
+
+    Attributes:
+        sub_bits: Precision bits per magnitude.
+        count: Number of recorded values.
+    """
+
+    def __init__(self, sub_bits: int = 7, max_value_us: int = 60_000_000):
+        self.sub_bits = sub_bits
+        self._half = 1 << (sub_bits - 1)
+        self.max_value_us = max_value_us
+        self._counts = array("Q", bytes(8 * (self._index(max_value_us) + 1)))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        magnitude = max(0, value.bit_length() - self.sub_bits)
+        return magnitude * self._half + (value >> magnitude)
+
+    def _upper(self, index: int) -> int:
+        """Highest value that maps to `index`."""
+        if index < 2 * self._half: return index
+        magnitude = index // self._half - 1
+        sub = index - magnitude * self._half
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, value_us: int) -> None:
+        value_us = min(max(0, int(value_us)), self.max_value_us)
+        self._counts[self._index(value_us)] += 1
+        if self.count == 0 or value_us < self.min: self.min = value_us
+        if value_us > self.max: self.max = value_us
+        self.count += 1
+        self.total += value_us
+
+    def percentile(self, pct: float) -> int:
+        """Returns the value at `pct` (0-100), to histogram precision."""
+        if not self.count: return 0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index, n in enumerate(self._counts):
+            seen += n
+            if seen >= rank: return min(self._upper(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for index, n in enumerate(other._counts):
+            if n: self._counts[index] += n
+        if other.count:
+            self.min = other.min if not self.count else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+class JitterBenchmark:
+    """Sends paced echo probes and summarizes the round-trip times.
+
+    Only real echoes count: ICMP echo replies by default, or the probe coming back
+    from a UDP echo responder when `port` is set. One probe is in flight at a time
+    and the next leaves `interval` seconds after the previous one, so the target
+    never sees more than 1 / `interval` probes per second. Unanswered probes are
+    counted, and the summary carries the loss rate.
+
+    Attributes:
+        host: Target address (normally the default gateway).
+        port: UDP echo port on the target, or None for ICMP echo.
+        samples: Maximum number of probes per run.
+        interval: Seconds between the start of two probes.
+        timeout: Seconds a single probe may wait before it counts as lost.
+        max_duration: Cap on the length of one run, in seconds. The last probe may
+            still wait `timeout` past it.
+    """
+    _PROBE = struct.Struct("!4sIQ")
+    _MAGIC = b"RSSJ"
+
+    def __init__(self, host: str, port: Optional[int] = None, samples: int = 200, interval: float = 0.01,
+                 timeout: float = 0.05, max_duration: float = BURST_MAX_DURATION):
+        self.host = host
+        self.port = port
+        self.samples = samples
+        self.interval = interval
+        self.timeout = timeout
+        self.max_duration = max_duration
+        self._ident = os.getpid() & 0xFFFF
+
+    def run(self) -> Dict[str, Any]:
+        """Runs one burst and returns its `summarize` dict.
+
+        Raises:
+            OSError: If no probe socket can be opened (ICMP needs privileges on some systems).
+        """
+        hist = LatencyHistogram()
+        lost = 0
+        jitter_sum, jitter_n, last_rtt = 0, 0, None
+        if self.port is None:
+            sock, kind = open_icmp_socket()
+        else:
+            sock, kind = socket.socket(socket.AF_INET, socket.SOCK_DGRAM), socket.SOCK_DGRAM
+            sock.connect((self.host, self.port))
+        with sock:
+            end = time.perf_counter() + self.max_duration
+            next_at = time.perf_counter()
+            for seq in range(self.samples):
+                wait = next_at - time.perf_counter()
+                if wait > 0: time.sleep(wait)
+                if time.perf_counter() > end: break
+                next_at = time.perf_counter() + self.interval
+                rtt_ns = self._probe(sock, kind, seq)
+                if rtt_ns is None:
+                    lost += 1
+                    continue
+                rtt_us = rtt_ns // 1000
+                hist.record(rtt_us)
+                if last_rtt is not None:
+                    jitter_sum += abs(rtt_us - last_rtt)
+                    jitter_n += 1
+                last_rtt = rtt_us
+        return summarize(hist, lost, jitter_sum / jitter_n if jitter_n else 0.0)
+
+    def _probe(self, sock: socket.socket, kind: int, seq: int) -> Optional[int]:
+        """Sends probe `seq` and waits for its echo. Returns the round trip in ns, or None if it was lost."""
+        sent = time.perf_counter_ns()
+        payload = self._PROBE.pack(self._MAGIC, seq, sent)
+        try:
+            if self.port is None: sock.sendto(echo_request(self._ident, seq & 0xFFFF, payload), (self.host, 0))
+            else: sock.send(payload)
+            deadline = time.perf_counter() + self.timeout
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0: return None
+                sock.settimeout(remaining)
+                if self.port is None:
+                    data, addr = sock.recvfrom(1024)
+                    reply = parse_echo_reply(data, kind) if addr[0] == self.host else None
+                    if reply is None: continue
+                    data = reply[1]
+                else:
+                    data = sock.recv(1024)
+                received = time.perf_counter_ns()
+                if len(data) < self._PROBE.size: continue
+                magic, echoed, _ = self._PROBE.unpack_from(data)
+                if magic == self._MAGIC and echoed == seq: return received - sent
+                # Anything else is a late echo of an earlier probe, or someone else's traffic
+        except OSError:  # Timed out, or the port is closed (nothing there echoes)
+            return None
+
+def summarize(hist: LatencyHistogram, lost: int = 0, jitter_us: float = 0.0) -> Dict[str, Any]:
+    """Condenses a histogram into the fields reported per run (all latencies in us, loss as a fraction of probes sent)."""
+    sent = hist.count + lost
+    return {
+        "count": hist.count, "lost": lost, "loss": round(lost / sent, 4) if sent else 0.0,
+        "p50_us": hist.percentile(50), "p99_us": hist.percentile(99), "p999_us": hist.percentile(99.9),
+        "max_us": hist.max, "mean_us": round(hist.mean(), 1), "jitter_us": round(jitter_us, 1),
+    }
+
+def format_summary(summary: Optional[Dict[str, Any]]) -> str:
+    if not summary or not summary["count"]: return "no samples"
+    return (f"p50 {summary['p50_us']}us p99 {summary['p99_us']}us p99.9 {summary['p999_us']}us "
+            f"max {summary['max_us']}us jitter {summary['jitter_us']}us ({summary['lost']} lost, {summary.get('loss', 0.0):.1%})")
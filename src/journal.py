@@ -0,0 +1,164 @@
+"""Network State Journal Module.
+
+This module keeps an append-only, fsync'd journal of the parameters that the
+surgeon changes, so the machine can be put back even if the process dies in the
+middle of a mode switch.
+
+Every entry is one compact JSON line:
+    {"o": {"a": {nic: {field: value}}, "t": {name: value}}}   original values, first touch only
+    {"b": seq, "m": mode, "u": {"a": {...}, "t": {...}}}      switch started, with its undo values
+    {"c": seq}                                               switch finished (verified or rolled back)
+
+A switch with a "b" entry and no matching "c" was interrupted. Its undo values
+are replayed on the next start. The originals are what `restore` goes back to.
+A torn last line (crash during the write) is dropped when the file is next opened.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from src.state import ApplyPlan
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, separators=(",", ":"))
+
+class SwitchJournal:
+    """Append-only record of original values and in-flight mode switches.
+
+    Attributes:
+        path: Journal file.
+        compact_after: Entries appended before the file is rewritten to its live state.
+    """
+
+    def __init__(self, path: str, compact_after: int = 256):
+        self.path = path
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._adapters: Dict[str, Dict[str, Any]] = {}
+        self._tcpip: Dict[str, Any] = {}
+        self._open: Dict[int, Tuple[str, ApplyPlan]] = {}
+        self._seq = 0
+        self._entries = 0
+        self._file = None
+        self._replay()
+
+    # --- Reading ---
+
+    def _replay(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        torn = False
+        for line in lines:
+            try: entry = json.loads(line)
+            except ValueError:
+                torn = True  # Crash during a write
+                continue
+            self._fold(entry)
+            self._entries += 1
+        if torn: self._compact()  # Don't append after a partial line
+
+    def _fold(self, entry: Dict[str, Any]) -> None:
+        if "o" in entry:
+            for nic, values in entry["o"].get("a", {}).items():
+                for key, value in values.items(): self._adapters.setdefault(nic, {}).setdefault(key, value)
+            for key, value in entry["o"].get("t", {}).items(): self._tcpip.setdefault(key, value)
+        if "b" in entry:
+            undo = entry.get("u", {})
+            self._open[entry["b"]] = (entry.get("m", ""), ApplyPlan(undo.get("a", {}), {}, undo.get("t", {}), {}))
+            self._seq = max(self._seq, entry["b"])
+        if "c" in entry:
+            self._open.pop(entry["c"], None)
+
+    def pending(self) -> Optional[Tuple[int, str, ApplyPlan]]:
+        """Returns (seq, mode, undo plan) of the newest interrupted switch, if any."""
+        with self._lock:
+            if not self._open: return None
+            seq = max(self._open)
+            mode, undo = self._open[seq]
+            return seq, mode, undo
+
+    def originals(self) -> ApplyPlan:
+        """The plan that puts every touched parameter back to its pre-Sentinel value."""
+        with self._lock:
+            return ApplyPlan({nic: dict(v) for nic, v in self._adapters.items() if v}, {}, dict(self._tcpip), {})
+
+    # --- Writing ---
+
+    def _append(self, entries) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(_dumps(e) + "\n" for e in entries))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._entries += len(entries)
+
+    def begin(self, mode: str, plan: ApplyPlan) -> int:
+        """Records the start of a switch with a single fsync'd append.
+
+        Values seen for the first time are stored as originals in the same write.
+
+        Args:
+            mode: Mode name, for logs.
+            plan: The plan about to be executed.
+
+        Returns:
+            The switch sequence number to pass to `commit`.
+        """
+        undo = plan.inverse()
+        with self._lock:
+            fresh_a: Dict[str, Dict[str, Any]] = {}
+            for nic, values in plan.previous.items():
+                known = self._adapters.get(nic, {})
+                new = {k: v for k, v in values.items() if v is not None and k not in known}
+                if new: fresh_a[nic] = new
+            fresh_t = {k: v for k, v in plan.tcpip_previous.items() if v is not None and k not in self._tcpip}
+
+            self._seq += 1
+            entries = []
+            if fresh_a or fresh_t: entries.append({"o": {"a": fresh_a, "t": fresh_t}})
+            entries.append({"b": self._seq, "m": mode, "u": {"a": undo.adapters, "t": undo.tcpip}})
+            self._append(entries)
+            for entry in entries: self._fold(entry)
+            return self._seq
+
+    def commit(self, seq: int) -> None:
+        """Marks a switch as finished (kept or rolled back) and compacts if due."""
+        with self._lock:
+            entry = {"c": seq}
+            self._append([entry])
+            self._fold(entry)
+            if self._entries >= self.compact_after: self._compact()
+
+    def reset(self) -> None:
+        """Forgets everything, e.g. after the originals have been restored."""
+        with self._lock:
+            self._adapters, self._tcpip, self._open = {}, {}, {}
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrites the file as its live state: originals plus open switches."""
+        entries = []
+        if self._adapters or self._tcpip: entries.append({"o": {"a": self._adapters, "t": self._tcpip}})
+        for seq, (mode, undo) in sorted(self._open.items()):
+            entries.append({"b": seq, "m": mode, "u": {"a": undo.adapters, "t": undo.tcpip}})
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(_dumps(e) + "\n" for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._entries = len(entries)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
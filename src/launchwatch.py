@@ -0,0 +1,107 @@
+"""Launch Watcher Module.
+
+This module reports game launches as soon as the process is created. The
+autopilot can then switch while the game is still loading, instead of waiting
+for it to show CPU load on the next 2 s poll.
+
+On Windows it subscribes to WMI `Win32_ProcessStartTrace` events (this needs
+admin rights, which the surgeon needs anyway). Where that is unavailable it
+falls back to diffing the PID list every `poll_interval` seconds. That costs one
+`psutil.pids()` call per poll plus one name lookup per new process.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import psutil
+
+from src.matcher import GameMatcher
+
+try:
+    import pythoncom
+    import wmi
+except ImportError:
+    wmi = None
+
+class LaunchEvent(NamedTuple):
+    """A matched process start. `detected` is the `time.monotonic()` at which it was seen."""
+    pid: int
+    name: str
+    detected: float
+    source: str  # "wmi" or "poll"
+
+def _process_name(pid: int) -> str:
+    return psutil.Process(pid).name()
+
+def _process_exe(pid: int) -> Optional[str]:
+    try: return psutil.Process(pid).exe()
+    except psutil.Error: return None
+
+class LaunchWatcher:
+    """Background thread that calls `on_launch` for every new process the matcher accepts.
+
+    Attributes:
+        poll_interval: Seconds between PID diffs when WMI events are unavailable.
+        source: "wmi" or "poll" once running, else None.
+    """
+
+    def __init__(self, on_launch: Callable[[LaunchEvent], None], matcher_fn: Callable[[], GameMatcher],
+                 poll_interval: float = 0.25, use_wmi: bool = True,
+                 pids_fn: Callable[[], Iterable[int]] = psutil.pids, name_fn: Callable[[int], str] = _process_name):
+        self.on_launch = on_launch
+        self.matcher_fn = matcher_fn
+        self.poll_interval = poll_interval
+        self.use_wmi = use_wmi and wmi is not None
+        self.pids_fn = pids_fn
+        self.name_fn = name_fn
+        self.source: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'LaunchWatcher':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="launch-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        if self.use_wmi:
+            try:
+                self._run_wmi()
+                return
+            except Exception as e:
+                print(f"[Launch] WMI start trace unavailable ({e}), polling PIDs instead")
+        self._run_poll()
+
+    def _run_wmi(self) -> None:
+        pythoncom.CoInitialize()
+        try:
+            watcher = wmi.WMI().watch_for(raw_wql="SELECT ProcessID, ProcessName FROM Win32_ProcessStartTrace")
+            self.source = "wmi"
+            while not self._stop.is_set():
+                try: event = watcher(timeout_ms=500)
+                except wmi.x_wmi_timed_out: continue
+                self._seen(int(event.ProcessID), str(event.ProcessName))
+        finally:
+            pythoncom.CoUninitialize()
+
+    def _run_poll(self) -> None:
+        self.source = "poll"
+        known = set(self.pids_fn())
+        while not self._stop.wait(self.poll_interval):
+            current = set(self.pids_fn())
+            for pid in current - known:
+                try: name = self.name_fn(pid)
+                except psutil.Error: continue
+                self._seen(pid, name)
+            known = current
+
+    def _seen(self, pid: int, name: str) -> None:
+        detected = time.monotonic()
+        matcher = self.matcher_fn()
+        path = _process_exe(pid) if matcher.needs_path else None
+        if matcher.match(name, path): self.on_launch(LaunchEvent(pid, name, detected, self.source))
@@ -0,0 +1,95 @@
+"""Game Matcher Module.
+
+This module compiles the `games_list` rules into a matcher that decides in
+constant time (in the number of rules) whether a process is a game.
+
+Rules are case-insensitive:
+    cs2.exe                        exact executable name
+    *-win64-shipping.exe           name wildcard (* and ?)
+    C:\\Games\\steamapps\\common\\*   full executable path wildcard (contains a slash)
+    !steamwebhelper.exe            exclusion, in any of the forms above
+
+Exact names go into a hash set. Wildcards of the common shapes `*suffix`,
+`prefix*` and `dir\\*` are indexed by their literal part, so a lookup only
+probes the name's own suffixes, prefixes or parent directories. Anything else
+is folded into one combined regular expression per kind.
+"""
+
+import fnmatch
+import re
+from typing import FrozenSet, Iterable, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+_WILDCARDS = re.compile(r"[*?\[]")
+
+def normalize_rule(rule: str) -> str:
+    """Lowercases a rule and uses backslashes as the only path separator."""
+    return rule.strip().lower().replace("/", "\\")
+
+class _RuleSet(NamedTuple):
+    exact: FrozenSet[str]
+    suffixes: FrozenSet[str]
+    prefixes: FrozenSet[str]
+    suffix_lengths: Tuple[int, ...]
+    prefix_lengths: Tuple[int, ...]
+    regex: Optional[Pattern]
+
+def _compile_rules(rules: Iterable[str]) -> _RuleSet:
+    exact, suffixes, prefixes, general = set(), set(), set(), []
+    for rule in rules:
+        if not _WILDCARDS.search(rule): exact.add(rule)
+        elif rule.startswith("*") and not _WILDCARDS.search(rule[1:]): suffixes.add(rule[1:])
+        elif rule.endswith("*") and not _WILDCARDS.search(rule[:-1]): prefixes.add(rule[:-1])
+        else: general.append(rule)
+    regex = re.compile("|".join(f"(?:{fnmatch.translate(r)})" for r in general)) if general else None
+    return _RuleSet(frozenset(exact), frozenset(suffixes), frozenset(prefixes),
+                    tuple(sorted({len(s) for s in suffixes})), tuple(sorted({len(p) for p in prefixes})), regex)
+
+def _matches(rules: _RuleSet, text: str) -> bool:
+    if text in rules.exact: return True
+    n = len(text)
+    for length in rules.suffix_lengths:
+        if length > n: break
+        if text[n - length:] in rules.suffixes: return True
+    for length in rules.prefix_lengths:
+        if length > n: break
+        if text[:length] in rules.prefixes: return True
+    return rules.regex is not None and rules.regex.match(text) is not None
+
+class GameMatcher:
+    """Compiled form of a rule list.
+
+    Attributes:
+        rules: The normalized source rules, in order.
+        needs_path: True if any rule looks at the executable path, so callers
+            only fetch paths when they can change the answer.
+    """
+
+    def __init__(self, rules: Sequence[str]):
+        self.rules = tuple(normalize_rule(r) for r in rules if r and r.strip())
+        include = [r for r in self.rules if not r.startswith("!")]
+        exclude = [r[1:] for r in self.rules if r.startswith("!")]
+        self._names = _compile_rules(r for r in include if "\\" not in r)
+        self._paths = _compile_rules(r for r in include if "\\" in r)
+        self._skip_names = _compile_rules(r for r in exclude if "\\" not in r)
+        self._skip_paths = _compile_rules(r for r in exclude if "\\" in r)
+        self.needs_path = any("\\" in r for r in self.rules)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        """Exact executable names included by the rules."""
+        return self._names.exact
+
+    def match(self, name: str, path: Optional[str] = None) -> bool:
+        """Decides whether a process is a game.
+
+        Args:
+            name: Executable name, any case.
+            path: Full executable path, if known. Path rules never match without it.
+        """
+        name = name.lower()
+        path = normalize_rule(path) if path else None
+        if _matches(self._skip_names, name) or (path and _matches(self._skip_paths, path)): return False
+        return _matches(self._names, name) or (path is not None and _matches(self._paths, path))
@@ -0,0 +1,230 @@
+"""Metrics Module.
+
+This module keeps counters, gauges and histograms for fleet monitoring and
+exposes them in the Prometheus text format (version 0.0.4):
+    * over HTTP at http://127.0.0.1:<metrics_port>/metrics while the daemon runs,
+    * as a snapshot file written when the daemon exits.
+
+Metrics are created once at import time in the modules that update them.
+Updating one takes a single uncontended lock owned by that metric, so the hot
+loop never waits on a scrape. `parse_exposition` turns the text back into
+numbers, for scrapers and checks.
+"""
+
+import bisect
+import math
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value): return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if not labels and not self.label_names: return ()
+        try:
+            if len(labels) == len(self.label_names): return tuple([labels[n] for n in self.label_names])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {} if labels else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock: values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in values]
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock: self._values[key] = float(value)
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `le` buckets, plus their sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {} if labels else {(): self._empty()}
+
+    def _empty(self) -> List[float]:
+        return [0.0] * (len(self.buckets) + 3)  # Per-bucket counts, +Inf, sum, count
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None: row = self._values[key] = self._empty()
+            row[slot] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        row = self._values.get(self._key(labels))
+        return row[-1] if row else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock: values = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in values:
+            running = 0.0
+            for bound, n in zip(self.buckets + (math.inf,), row):
+                running += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {_format_value(running)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {_format_value(row[-1])}")
+        return lines
+
+class Registry:
+    """A named set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric): raise ValueError(f"{metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        """The whole registry in Prometheus text format."""
+        with self._lock: metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+    def snapshot(self, path: str) -> None:
+        """Writes `render()` to `path` atomically (temp file + rename)."""
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f: f.write(self.render())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Metrics] Snapshot error: {e}")
+
+REGISTRY = Registry()
+
+# --- Exposition ---
+
+class MetricsServer:
+    """Serves a registry at /metrics on a background thread.
+
+    Attributes:
+        address: (host, port) actually bound. Port 0 picks a free one.
+    """
+
+    def __init__(self, registry: Registry = REGISTRY, host: str = "127.0.0.1", port: int = 9464):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass  # Scrapes are not worth a log line
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address[:2]
+
+    def start(self) -> 'MetricsServer':
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def parse_exposition(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Parses Prometheus text format into {(sample name, sorted label pairs): value}.
+
+    Raises:
+        ValueError: On a line that is neither a comment nor a valid sample.
+    """
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"): continue
+        match = _SAMPLE.match(line)
+        if not match: raise ValueError(f"bad exposition line: {line!r}")
+        name, _, labels, value = match.groups()
+        pairs = tuple(sorted((k, v.encode().decode("unicode_escape")) for k, v in _LABEL.findall(labels or "")))
+        samples[(name, pairs)] = float(value)
+    return samples
+
+def scrape(url: str, timeout: float = 2.0) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Fetches and parses a /metrics endpoint."""
+    from urllib.request import urlopen
+    with urlopen(url, timeout=timeout) as response:
+        return parse_exposition(response.read().decode("utf-8"))
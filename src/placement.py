@@ -0,0 +1,186 @@
+"""Placement Controller Module.
+
+This module closes the loop between measured core load and the RSS window. The
+gap finder only knows which cores the registry says are polluted. While a game
+runs, the controller watches the real per-core interrupt, DPC and user load. It
+moves the window only when a clearly cooler one exists.
+
+A move needs three things:
+    * the current window holds a busy core (one that was busy within `memory`
+      seconds, so load that hops between cores is avoided as a whole),
+    * the best alternative is cooler by more than `threshold` percentage points,
+    * both stay true for `confirm` evaluations in a row. An improvement of k
+      thresholds counts as k evaluations, so a clear-cut case moves at once
+      while a marginal one still has to persist.
+Load that moves tends to land on nearby cores, so the new window is first sought
+at least one window width away from every busy core, and only next to them if
+nothing else is clean. After a move, the cooldown blocks any move onto a core
+busy within `memory` seconds. The cores just left are among them, so the window
+cannot bounce back, but it can still escape load that follows it.
+The RSS window heats its own cores with DPCs, so a freshly moved window always
+looks a little worse than the cores it left. The threshold has to stay above
+that self-load, or the controller would chase its own tail.
+"""
+
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.gaps import best_gap, mask_from_indices
+
+Window = Tuple[int, int]  # (base, size)
+
+class Migration(NamedTuple):
+    """A decision to move. `busy_mask` is the bitset of cores the new placement must avoid: the busy ones, and their neighbours if that left room."""
+    busy_mask: int
+    windows: List[Window]
+    gain: float
+
+def _overlaps(mask: int, windows: Sequence[Window]) -> bool:
+    return any(mask >> base & ((1 << size) - 1) for base, size in windows)
+
+def _widen(mask: int, reach: int, n: int) -> int:
+    """`mask` plus every core within `reach` positions of one of its cores, limited to `n` cores."""
+    out = mask
+    for d in range(1, reach + 1): out |= (mask << d) | (mask >> d)
+    return out & ((1 << n) - 1)
+
+def window_load(load: Sequence[float], window: Window) -> float:
+    """Mean load of the cores in `window`, in percent."""
+    base, size = window
+    cores = load[base:base + size]
+    return sum(cores) / len(cores) if cores else 0.0
+
+class PlacementController:
+    """Decides when the RSS window should move away from loaded cores.
+
+    Attributes:
+        busy: Load (percent of one core) from which a core counts as busy.
+        threshold: Minimum improvement, in percentage points, worth a move.
+        confirm: Consecutive evaluations the improvement must hold, counting an
+            improvement of k thresholds as k evaluations.
+        cooldown: Seconds after a move during which the window only moves to cores
+            that were not busy within `memory` seconds.
+        window: Seconds of telemetry each evaluation should average over.
+        memory: Seconds a core stays busy after its load drops below `busy`.
+        keep_clear: Seek the new window one window width away from busy cores first.
+        switches: Moves made so far.
+    """
+
+    def __init__(self, busy: float = 25.0, threshold: float = 15.0, confirm: int = 3, cooldown: float = 30.0,
+                 window: float = 5.0, memory: float = 60.0, keep_clear: bool = True, clock: Callable[[], float] = time.monotonic):
+        self.busy = busy
+        self.threshold = threshold
+        self.confirm = confirm
+        self.cooldown = cooldown
+        self.window = window
+        self.memory = memory
+        self.keep_clear = keep_clear
+        self.clock = clock
+        self.switches = 0
+        self._streak = 0
+        self._last_move: Optional[float] = None
+        self._hot_at: Dict[int, float] = {}  # Core -> last time it was busy
+
+    def reset(self) -> None:
+        """Forgets the streak, the cooldown and the busy history, e.g. when gaming mode ends."""
+        self._streak = 0
+        self._last_move = None
+        self._hot_at = {}
+
+    def busy_mask(self, load: Sequence[float]) -> int:
+        """Bitset of cores busy now or within the last `memory` seconds."""
+        now = self.clock()
+        for c, value in enumerate(load):
+            if value >= self.busy: self._hot_at[c] = now
+        self._hot_at = {c: t for c, t in self._hot_at.items() if now - t <= self.memory}
+        return mask_from_indices(self._hot_at)
+
+    def evaluate(self, load: Sequence[float], current: Sequence[Window],
+                 propose: Callable[[int], Sequence[Window]]) -> Optional[Migration]:
+        """Runs one control step.
+
+        Args:
+            load: Per-core load in percent, averaged over `window` seconds.
+            current: Windows in use (one per adapter).
+            propose: Returns the windows the gap logic would pick when the cores in
+                the given bitset are excluded. Only called when a move is possible.
+                It may fall back to excluded cores when nothing else fits.
+
+        Returns:
+            A `Migration` when the placement should change, else None.
+        """
+        hot = self.busy_mask(load)
+        if not current or not _overlaps(hot, current):
+            self._streak = 0
+            return None
+        since = self.clock() - self._last_move if self._last_move is not None else None
+        cooling = since is not None and since < self.cooldown
+        if cooling and since > self.memory: return None  # The cores left are no longer remembered as busy
+
+        avoid = _widen(hot, max(size for _, size in current), len(load)) if self.keep_clear else hot
+        candidates = list(propose(avoid))
+        if avoid != hot and (not candidates or _overlaps(avoid, candidates)):
+            avoid = hot
+            candidates = list(propose(hot))
+        if not candidates:
+            self._streak = 0
+            return None
+        if cooling and _overlaps(hot, candidates): return None
+        gain = max(window_load(load, w) for w in current) - max(window_load(load, w) for w in candidates)
+        if gain <= self.threshold:
+            self._streak = 0
+            return None
+        self._streak += int(gain // self.threshold) if self.threshold > 0 else 1
+        if self._streak < self.confirm: return None
+
+        self._streak = 0
+        self._last_move = self.clock()
+        self.switches += 1
+        return Migration(avoid, candidates, gain)
+
+# --- SIMULATION ---
+
+class SimResult(NamedTuple):
+    switches: int
+    settled_at: Optional[int]  # Step of the last move, None if it never moved
+    hot_steps: int  # Steps during which the window sat on a core busy in the underlying trace
+    mean_load: float  # Mean underlying load of the window cores
+
+def simulate(trace: Sequence[Sequence[float]], controller: PlacementController, start: Window,
+             clean_mask: Optional[int] = None, self_load: float = 5.0, dt: float = 1.0) -> SimResult:
+    """Replays a synthetic load trace through the controller on a virtual clock.
+
+    Args:
+        trace: Per-step, per-core background load in percent.
+        controller: Controller under test. Its clock is replaced by the virtual one.
+        start: Initial window.
+        clean_mask: Cores the gap logic may use. Defaults to all of them.
+        self_load: DPC load the window adds to its own cores.
+        dt: Seconds per step.
+    """
+    n = len(trace[0])
+    clean_mask = ((1 << n) - 1) if clean_mask is None else clean_mask
+    now = [0.0]
+    controller.clock = lambda: now[0]
+    span = max(1, int(controller.window / dt))
+    window, history = start, []
+    switches, settled_at, hot_steps, total = 0, None, 0, 0.0
+
+    def propose(hot: int) -> List[Window]:
+        gap = best_gap((clean_mask & ~hot) or clean_mask, n)
+        return [(gap.base, gap.size)] if gap else []
+
+    for step, background in enumerate(trace):
+        now[0] = step * dt
+        base, size = window
+        seen = [value + (self_load if base <= c < base + size else 0.0) for c, value in enumerate(background)]
+        history = (history + [seen])[-span:]
+        load = [sum(col) / len(history) for col in zip(*history)]
+        total += window_load(background, window)
+        if any(value >= controller.busy for value in background[base:base + size]): hot_steps += 1
+
+        move = controller.evaluate(load, [window], propose)
+        if move is not None and move.windows[0] != window:
+            window = move.windows[0]
+            switches, settled_at = switches + 1, step
+    return SimResult(switches, settled_at, hot_steps, total / len(trace))
@@ -0,0 +1,180 @@
+"""Connectivity Probe Module.
+
+This module checks that the gateway is still reachable after a mode switch, from
+inside the process and without a fixed settle delay.
+
+Each attempt tries ICMP echo (when the process may open an ICMP socket), then TCP
+connects, then a UDP probe to a closed port. A TCP reset or an ICMP port
+unreachable still proves the path works. Attempts are repeated with a short
+backoff until one succeeds or the deadline passes with enough failures.
+"""
+
+import errno
+import os
+import socket
+import struct
+import time
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+UDP_PROBE_PORT = 33434
+_REFUSED = {errno.ECONNREFUSED, getattr(errno, "WSAECONNREFUSED", 10061), getattr(errno, "WSAECONNRESET", 10054), errno.ECONNRESET}
+
+class ProbeResult(NamedTuple):
+    """Outcome of `ConnectivityProbe.verify`."""
+    ok: bool
+    elapsed_ms: float
+    attempts: int
+    failures: int
+    method: Optional[str]
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2: data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def open_icmp_socket() -> Tuple[socket.socket, int]:
+    """Opens an ICMP socket, unprivileged (datagram) where the OS allows it, else raw.
+
+    Returns:
+        The socket and its type, `socket.SOCK_DGRAM` or `socket.SOCK_RAW`.
+
+    Raises:
+        OSError: If the process may open neither.
+    """
+    error: Optional[OSError] = None
+    for kind in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            return socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP), kind
+        except OSError as e:
+            error = e
+    raise error
+
+def echo_request(ident: int, seq: int, payload: bytes) -> bytes:
+    """Builds an ICMP echo request."""
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, _checksum(header + payload), ident, seq) + payload
+
+def parse_echo_reply(data: bytes, kind: int) -> Optional[Tuple[int, bytes]]:
+    """Returns (sequence number, payload) of an ICMP echo reply, or None for any other packet.
+
+    Args:
+        data: What the socket received. Raw sockets include the IP header.
+        kind: Type of the socket it came from.
+    """
+    if kind == socket.SOCK_RAW and data: data = data[(data[0] & 0x0F) * 4:]
+    if len(data) < 8 or data[0] != ICMP_ECHO_REPLY: return None
+    return struct.unpack_from("!H", data, 6)[0], data[8:]
+
+class ConnectivityProbe:
+    """Polls a host until it answers or the verification deadline runs out.
+
+    Attributes:
+        host: IPv4 address to probe.
+        tcp_ports: Ports tried with a TCP connect (a refusal counts as reachable).
+        udp_port: Port for the UDP probe (None disables it).
+        timeout: Seconds each individual probe may wait.
+        deadline: Seconds `verify` keeps trying before it may report failure.
+        max_failures: Failed attempts required before `verify` reports failure.
+        use_icmp: Try ICMP echo first when the OS allows it.
+        source: Optional local address to bind to, for per-adapter checks.
+    """
+
+    def __init__(self, host: str, tcp_ports: Sequence[int] = (53, 443, 80), udp_port: Optional[int] = UDP_PROBE_PORT,
+                 timeout: float = 0.3, deadline: float = 5.0, max_failures: int = 3, use_icmp: bool = True,
+                 source: Optional[str] = None, clock: Callable[[], float] = time.perf_counter):
+        self.host = host
+        self.tcp_ports = tuple(tcp_ports)
+        self.udp_port = udp_port
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_failures = max_failures
+        self.use_icmp = use_icmp
+        self.source = source
+        self.clock = clock
+        self.initial_delay = 0.05
+        self.max_delay = 0.5
+        self._last_method: Optional[str] = None
+        self._icmp_denied = False
+        self._seq = 0
+
+    # --- Single probes ---
+
+    def _icmp(self) -> bool:
+        if self._icmp_denied: return False
+        try:
+            sock, kind = open_icmp_socket()
+        except OSError:
+            self._icmp_denied = True
+            return False
+        with sock:
+            sock.settimeout(self.timeout)
+            if self.source: sock.bind((self.source, 0))
+            self._seq = (self._seq + 1) & 0xFFFF
+            sock.sendto(echo_request(os.getpid() & 0xFFFF, self._seq, b"rss-sentinel"), (self.host, 0))
+            end = self.clock() + self.timeout
+            while self.clock() < end:
+                data, addr = sock.recvfrom(1024)
+                if addr[0] != self.host: continue
+                if parse_echo_reply(data, kind) is not None:
+                    return True
+        return False
+
+    def _tcp(self, port: int) -> bool:
+        try:
+            with socket.create_connection((self.host, port), timeout=self.timeout,
+                                          source_address=(self.source, 0) if self.source else None):
+                return True
+        except OSError as e:
+            return e.errno in _REFUSED
+
+    def _udp(self) -> bool:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.settimeout(self.timeout)
+                if self.source: sock.bind((self.source, 0))
+                sock.connect((self.host, self.udp_port))
+                sock.send(b"rss-sentinel")
+                sock.recv(64)
+                return True
+        except OSError as e:
+            return e.errno in _REFUSED
+
+    def probe_once(self) -> Optional[str]:
+        """Runs one attempt. Returns the name of the method that got through, or None."""
+        methods = []
+        if self.use_icmp: methods.append(("icmp", self._icmp))
+        methods.extend((f"tcp/{p}", lambda p=p: self._tcp(p)) for p in self.tcp_ports)
+        if self.udp_port: methods.append(("udp", self._udp))
+        methods.sort(key=lambda m: m[0] != self._last_method)  # Last winner first
+        for name, fn in methods:
+            try:
+                if fn():
+                    self._last_method = name
+                    return name
+            except (OSError, socket.timeout):
+                continue
+        return None
+
+    def verify(self) -> ProbeResult:
+        """Polls until the host answers, with a short backoff between attempts.
+
+        Returns success on the first answer. Reports failure only once the deadline
+        has passed and at least `max_failures` attempts have failed.
+        """
+        start = self.clock()
+        delay = self.initial_delay
+        attempts = failures = 0
+        while True:
+            attempts += 1
+            method = self.probe_once()
+            if method:
+                return ProbeResult(True, (self.clock() - start) * 1000, attempts, failures, method)
+            failures += 1
+            if failures >= self.max_failures and self.clock() - start >= self.deadline:
+                return ProbeResult(False, (self.clock() - start) * 1000, attempts, failures, None)
+            time.sleep(delay)
+            delay = min(delay * 1.5, self.max_delay)
@@ -0,0 +1,169 @@
+"""Process Watcher Module.
+
+This module keeps an incrementally maintained table of running processes so the
+autopilot does not have to walk and lowercase every process on each tick.
+
+Only PIDs that appeared or exited since the previous tick are looked up, each
+new process is run through the game matcher once, and CPU usage is derived from
+`cpu_times` deltas across ticks instead of a blocking `cpu_percent(interval=...)`
+sample.
+
+Windows hands freed PIDs to new processes. A PID that belongs to someone else
+now is treated as an exit plus a new process. Checking for that takes a
+creation time query per PID (`is_running()`), so a tick checks only the games
+and a rotating `sweep` of the other PIDs, and `name_of` checks the one entry it
+returns. A game that starts on a reused PID is caught by the sweep within
+len/sweep ticks, and sooner by `src.launchwatch`.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import psutil
+
+from src.matcher import GameMatcher
+
+class _Entry:
+    __slots__ = ("proc", "name", "game", "cpu_total", "cpu_ts", "cpu_pct")
+
+    def __init__(self, proc, name: str):
+        self.proc = proc
+        self.name = name
+        self.game = False
+        self.cpu_total: Optional[float] = None
+        self.cpu_ts: float = 0.0
+        self.cpu_pct: float = 0.0
+
+class ProcessWatcher:
+    """PID -> cached `Process` table, diffed against the live PID list.
+
+    Attributes:
+        pids_fn: Returns the current PIDs (defaults to `psutil.pids`).
+        process_factory: Builds a `Process`-like handle for a PID.
+        clock: Monotonic clock used for CPU deltas.
+        sweep: Non-game PIDs checked for reuse per tick.
+    """
+
+    def __init__(self, pids_fn: Callable[[], Iterable[int]] = psutil.pids,
+                 process_factory: Callable[[int], object] = psutil.Process,
+                 clock: Callable[[], float] = time.monotonic, sweep: int = 32):
+        self.pids_fn = pids_fn
+        self.process_factory = process_factory
+        self.clock = clock
+        self.sweep = sweep
+        self._procs: Dict[int, _Entry] = {}
+        self._games: Set[int] = set()
+        self._rotation: "deque[int]" = deque()  # Known PIDs in sweep order; exited ones are dropped when reached
+        self._rotating: Set[int] = set()
+        self.matcher: Optional[GameMatcher] = None
+
+    def __len__(self) -> int:
+        return len(self._procs)
+
+    def tick(self) -> Tuple[Set[int], Set[int]]:
+        """Synchronizes the table with the live PID list.
+
+        Returns:
+            A (new_pids, exited_pids) tuple. A reused PID is in both. PIDs that
+            vanished before they could be inspected are left out of `new_pids`.
+        """
+        current = set(self.pids_fn())
+        known = self._procs.keys()
+        reused = {pid for pid in self._reuse_candidates(current) if not self._running(self._procs[pid])}
+        exited = (known - current) | reused
+        new = (current - known) | reused
+
+        for pid in exited:
+            del self._procs[pid]
+            self._games.discard(pid)
+
+        added = set()
+        for pid in new:
+            try:
+                proc = self.process_factory(pid)
+                name = (proc.name() or "").lower()
+            except psutil.Error:
+                continue
+            entry = self._procs[pid] = _Entry(proc, name)
+            self._classify(pid, entry)
+            if pid not in self._rotating:
+                self._rotating.add(pid)
+                self._rotation.append(pid)
+            added.add(pid)
+        return added, exited
+
+    def _reuse_candidates(self, current: Set[int]) -> Set[int]:
+        """Known PIDs to check for reuse this tick: every game, plus the next `sweep` others."""
+        picked = self._games & current
+        for _ in range(min(self.sweep, len(self._rotation))):
+            pid = self._rotation.popleft()
+            if pid not in self._procs:
+                self._rotating.discard(pid)
+                continue
+            self._rotation.append(pid)
+            if pid in current: picked.add(pid)
+        return picked
+
+    @staticmethod
+    def _running(entry: _Entry) -> bool:
+        try: return entry.proc.is_running()
+        except psutil.Error: return False
+
+    def _classify(self, pid: int, entry: _Entry) -> None:
+        path = None
+        if self.matcher is not None and self.matcher.needs_path:
+            try: path = entry.proc.exe()
+            except psutil.Error: pass
+        entry.game = self.matcher is not None and self.matcher.match(entry.name, path)
+        if entry.game: self._games.add(pid)
+        else: self._games.discard(pid)
+
+    def set_matcher(self, matcher: GameMatcher) -> None:
+        """Switches to a new rule set, re-classifying known processes only when it changed."""
+        if matcher is self.matcher: return
+        self.matcher = matcher
+        for pid, entry in self._procs.items(): self._classify(pid, entry)
+
+    def game_pids(self) -> List[int]:
+        return list(self._games)
+
+    def name_of(self, pid: int) -> Optional[str]:
+        """Name of the process now holding `pid`, as of the last tick. None once the PID was handed to another process."""
+        entry = self._procs.get(pid)
+        return entry.name if entry and self._running(entry) else None
+
+    def cpu_percent(self, pid: int) -> Optional[float]:
+        """Returns CPU usage (percent of one core) since the previous call for `pid`.
+
+        The first call for a PID returns its lifetime average, so a freshly seen
+        process can be judged without waiting for a second sample.
+        """
+        entry = self._procs.get(pid)
+        if entry is None: return None
+        try:
+            times = entry.proc.cpu_times()
+            total = times.user + times.system
+            now = self.clock()
+            if entry.cpu_total is None:
+                elapsed = time.time() - entry.proc.create_time()
+                pct = (total / elapsed * 100.0) if elapsed > 0 else 0.0
+            else:
+                elapsed = now - entry.cpu_ts
+                pct = ((total - entry.cpu_total) / elapsed * 100.0) if elapsed > 0 else 0.0
+        except psutil.Error:
+            return None
+        entry.cpu_total, entry.cpu_ts, entry.cpu_pct = total, now, pct
+        return pct
+
+    def active_game(self, threshold: float) -> Optional[str]:
+        """Name of a process accepted by the matcher that uses more than `threshold` percent CPU, if any."""
+        for pid in list(self._games):
+            pct = self.cpu_percent(pid)
+            if pct is not None and pct > threshold:
+                return self._procs[pid].name
+        return None
+
+    def game_usage(self) -> List[Tuple[int, str, float]]:
+        """(pid, name, CPU percent) of every game, as of its last `cpu_percent` call. Samples nothing."""
+        return [(pid, self._procs[pid].name, self._procs[pid].cpu_pct) for pid in self._games]
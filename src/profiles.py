@@ -0,0 +1,137 @@
+"""Game Profile Module.
+
+This module remembers the RSS settings that work best for each game, together
+with the latency measurements behind them. The autopilot applies a game's
+profile the moment the game is detected.
+
+With tuning enabled, each gaming session may try one neighbouring setting
+(another queue count and/or interrupt moderation). A candidate is measured over
+`trials` sessions. It replaces the current best only when its mean jitter is
+lower by more than `margin`; otherwise it is marked as rejected and not tried
+again. Trial sessions alternate with sessions on the current best, so both sides
+of the comparison are measured under similar conditions.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+PROFILES_VERSION = 1
+MAX_EVIDENCE = 10  # Measurements kept per game and setting
+
+class RssSettings(NamedTuple):
+    """One Gaming Mode configuration."""
+    base: int
+    queues: int
+    profile: str
+    im: str
+
+    @property
+    def key(self) -> str:
+        """Identity for tuning. The base is left out because it follows the gap finder."""
+        return f"{self.queues}q/{self.profile}/IM {self.im}"
+
+def _mean_jitter(evidence: List[Dict[str, Any]]) -> float:
+    return sum(e["jitter_us"] for e in evidence) / len(evidence)
+
+class ProfileStore:
+    """Per-executable RSS profiles, persisted as JSON.
+
+    Attributes:
+        path: File holding the profiles.
+        trials: Sessions a setting is measured before it is compared.
+        margin: Relative jitter improvement a candidate needs to win (0.1 = 10 %).
+    """
+
+    def __init__(self, path: str, trials: int = 3, margin: float = 0.1):
+        self.path = path
+        self.trials = trials
+        self.margin = margin
+        self._games: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == PROFILES_VERSION: self._games = data.get("games", {})
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError): print(f"[Profiles] Ignoring {self.path}: {e}")
+
+    def save(self) -> None:
+        """Writes the store atomically (temp file + rename)."""
+        with self._lock:
+            payload = json.dumps({"version": PROFILES_VERSION, "games": self._games}, indent=2)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f: f.write(payload)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[Profiles] Save error: {e}")
+
+    def __contains__(self, exe: str) -> bool:
+        return exe.lower() in self._games
+
+    def get(self, exe: str) -> Optional[RssSettings]:
+        """The best known settings for `exe`, or None if it has no profile yet."""
+        with self._lock:
+            entry = self._games.get(exe.lower())
+            return RssSettings(*entry["best"]) if entry else None
+
+    def evidence(self, exe: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Setting key -> recent measurements for `exe`."""
+        with self._lock:
+            entry = self._games.get(exe.lower())
+            return {k: list(v) for k, v in entry["evidence"].items()} if entry else {}
+
+    def choose(self, exe: str, default: RssSettings, candidates: Iterable[RssSettings] = ()) -> Tuple[RssSettings, bool]:
+        """Picks the settings for a new session.
+
+        Args:
+            exe: Game executable name.
+            default: Settings for a game without a profile (becomes its first profile).
+            candidates: Settings the tuner may try. Empty disables tuning.
+
+        Returns:
+            (settings, is_trial). A trial is a candidate being measured against the best.
+        """
+        with self._lock:
+            entry = self._games.setdefault(exe.lower(), {"best": list(default), "evidence": {}, "rejected": [], "sessions": 0})
+            entry["sessions"] = entry.get("sessions", 0) + 1
+            best = RssSettings(*entry["best"])
+            if len(entry["evidence"].get(best.key, [])) < self.trials or entry["sessions"] % 2: return best, False
+            for candidate in candidates:
+                if candidate.key == best.key or candidate.key in entry["rejected"]: continue
+                if len(entry["evidence"].get(candidate.key, [])) < self.trials: return candidate, True
+            return best, False
+
+    def record(self, exe: str, settings: RssSettings, summary: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Stores one session's measurement and settles the comparison once a candidate has enough trials.
+
+        Returns:
+            A log line when the profile changed or a candidate was rejected, else None.
+        """
+        if not summary or not summary.get("count"): return None
+        message = None
+        with self._lock:
+            entry = self._games.setdefault(exe.lower(), {"best": list(settings), "evidence": {}, "rejected": [], "sessions": 0})
+            runs = entry["evidence"].setdefault(settings.key, [])
+            runs.append({"jitter_us": summary["jitter_us"], "p99_us": summary["p99_us"], "at": round(time.time())})
+            del runs[:-MAX_EVIDENCE]
+
+            best = RssSettings(*entry["best"])
+            if settings.key != best.key and len(runs) >= self.trials:
+                mine, theirs = _mean_jitter(runs[-self.trials:]), _mean_jitter(entry["evidence"][best.key][-self.trials:])
+                if mine < theirs * (1 - self.margin):
+                    entry["best"] = list(settings)
+                    message = f"{exe}: {settings.key} wins ({mine:.0f}us vs {theirs:.0f}us jitter), now the profile"
+                else:
+                    entry["rejected"].append(settings.key)
+                    message = f"{exe}: {settings.key} rejected ({mine:.0f}us vs {theirs:.0f}us jitter)"
+            elif settings.key == best.key:
+                entry["best"] = list(settings)  # Keep the latest base the settings were applied with
+        self.save()
+        return message
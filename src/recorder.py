@@ -0,0 +1,305 @@
+"""Session Recorder Module.
+
+This module keeps a compact record of what the autopilot saw and did on every
+tick, for weeks: the mode, matched games and their CPU use, per-core load, and
+apply events. Tuning (see `src.simulator`) and post-mortems read it back.
+
+Storage is columnar and append-only, with one directory per UTC day:
+    sessions/2026-10-17/meta.json      column layout, day start, core count
+    sessions/2026-10-17/<column>.bin   fixed-width rows, one file per column
+    sessions/2026-10-17/names.jsonl    pid -> executable name, once per game
+A tick costs about 40 bytes plus one byte per core, roughly 2 MB a day at the
+2 s tick. Rows are buffered in `array`s and appended every `flush_every` ticks.
+Segments older than `retention_days` are deleted when a new day starts.
+
+Readers memory-map the column files. They get NumPy views when NumPy is
+installed and `memoryview` casts otherwise; neither parses anything. After a
+crash, columns may differ in length. Reader and writer both use the shortest,
+so a torn row is never seen.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import psutil
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RECORDING_VERSION = 1
+GAME_SLOTS = 4  # Games recorded per tick, busiest first
+
+MODES = ("UNKNOWN", "DESKTOP", "GAMING", "MANUAL")
+FLAG_SWITCH = 1    # A mode switch was applied during the tick
+FLAG_FAILED = 2    # An apply was rolled back
+FLAG_LAUNCH = 4    # The switch was triggered by a process start
+FLAG_FORCED = 8    # A client pinned the mode
+
+# name -> (array typecode, NumPy type, values per row; 0 = one per core, scale)
+COLUMNS: Dict[str, Tuple[str, str, int, float]] = {
+    "t_ms": ("I", "u4", 1, 1.0),                 # Milliseconds since the segment's UTC midnight
+    "mode": ("B", "u1", 1, 1.0),                 # Index into MODES
+    "flags": ("B", "u1", 1, 1.0),
+    "apply_ms": ("H", "u2", 1, 1.0),
+    "game_pid": ("I", "u4", GAME_SLOTS, 1.0),    # 0 = empty slot
+    "game_cpu": ("H", "u2", GAME_SLOTS, 10.0),   # Tenths of a percent of one core
+    "core_load": ("B", "u1", 0, 2.0),            # Half percents
+}
+
+def _day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+def _day_start(day: str) -> float:
+    return datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+class CoreLoad:
+    """Busy percent per logical processor since the previous call, from psutil's per-CPU times."""
+
+    def __init__(self):
+        self._last = None
+
+    def __call__(self) -> List[float]:
+        now = [(sum(t) - t.idle, sum(t)) for t in psutil.cpu_times(percpu=True)]
+        last, self._last = self._last, now
+        if last is None or len(last) != len(now): return [0.0] * len(now)
+        return [100.0 * (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0 for (b0, t0), (b1, t1) in zip(last, now)]
+
+# --- Writing ---
+
+class SessionRecorder:
+    """Appends one row per tick to the day's segment.
+
+    Attributes:
+        directory: Root holding the day directories.
+        retention_days: Segments kept, today included.
+        flush_every: Ticks buffered in memory between appends.
+    """
+
+    def __init__(self, directory: str, retention_days: int = 30, flush_every: int = 30,
+                 load_fn: Optional[Callable[[], Sequence[float]]] = None, clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.flush_every = flush_every
+        self.load_fn = load_fn or CoreLoad()
+        self.clock = clock
+        self.day: Optional[str] = None
+        self._start = 0.0
+        self._cores = 0
+        self._files: Dict[str, Any] = {}
+        self._buffers: Dict[str, array] = {}
+        self._rows = 0
+        self._names: Dict[int, str] = {}
+        self._new_names: List[Tuple[int, str]] = []
+
+    def record(self, mode: str, games: Sequence[Tuple[int, str, float]] = (), apply_ms: float = 0.0, flags: int = 0) -> None:
+        """Buffers one tick.
+
+        Args:
+            mode: The autopilot's current mode.
+            games: (pid, name, cpu percent of one core) for every matched game.
+            apply_ms: Time spent applying settings during the tick.
+            flags: FLAG_* bits.
+        """
+        now = self.clock()
+        load = self.load_fn()
+        if self.day != _day_of(now): self._roll(now, len(load))
+        buf = self._buffers
+        buf["t_ms"].append(int((now - self._start) * 1000))
+        buf["mode"].append(MODES.index(mode) if mode in MODES else 0)
+        buf["flags"].append(flags & 0xFF)
+        buf["apply_ms"].append(min(int(apply_ms), 0xFFFF))
+        top = sorted(games, key=lambda g: -g[2])[:GAME_SLOTS]
+        for pid, name, _ in top:
+            if pid not in self._names:
+                self._names[pid] = name
+                self._new_names.append((pid, name))
+        top += [(0, "", 0.0)] * (GAME_SLOTS - len(top))
+        buf["game_pid"].extend([pid for pid, _, _ in top])
+        buf["game_cpu"].extend([min(int(cpu * 10), 0xFFFF) for _, _, cpu in top])
+        cores = self._cores
+        load = list(load[:cores]) + [0.0] * (cores - len(load))
+        buf["core_load"].extend([min(int(v * 2), 0xFF) for v in load])
+        self._rows += 1
+        if self._rows >= self.flush_every: self.flush()
+
+    def _roll(self, now: float, cores: int) -> None:
+        self.close()
+        self.day = _day_of(now)
+        self._start = _day_start(self.day)
+        path = os.path.join(self.directory, self.day)
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        try:
+            with open(meta_path, "r") as f: meta = json.load(f)
+            self._cores = meta["cores"]
+            _truncate(path, meta, _rows(path, meta))  # Drop a row torn by a crash
+            self._names = _read_names(path)
+        except (OSError, ValueError, KeyError):
+            self._cores = cores
+            self._names = {}
+            meta = {"version": RECORDING_VERSION, "day": self.day, "start": self._start, "cores": cores,
+                    "byteorder": sys.byteorder, "game_slots": GAME_SLOTS,
+                    "columns": {name: [typ, width or cores, scale] for name, (_, typ, width, scale) in COLUMNS.items()}}
+            with open(meta_path, "w") as f: json.dump(meta, f, indent=2)
+        self._buffers = {name: array(code) for name, (code, _, _, _) in COLUMNS.items()}
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "ab") for name in COLUMNS}
+        self._files["names"] = open(os.path.join(path, "names.jsonl"), "a", encoding="utf-8")
+        self.prune(now)
+
+    def flush(self) -> None:
+        """Appends the buffered rows to the segment."""
+        if not self._files: return
+        try:
+            for name, buf in self._buffers.items():
+                if buf:
+                    self._files[name].write(buf.tobytes())
+                    del buf[:]
+            for pid, name in self._new_names: self._files["names"].write(json.dumps({"pid": pid, "name": name}) + "\n")
+            self._new_names = []
+            for f in self._files.values(): f.flush()
+        except OSError as e:
+            print(f"[Recorder] Write error: {e}")
+        self._rows = 0
+
+    def close(self) -> None:
+        self.flush()
+        for f in self._files.values(): f.close()
+        self._files = {}
+
+    def prune(self, now: Optional[float] = None) -> List[str]:
+        """Deletes segments older than `retention_days`. Returns the days removed."""
+        cutoff = _day_of((now or self.clock()) - self.retention_days * 86400)
+        removed = [day for day in list_days(self.directory) if day <= cutoff]
+        for day in removed: shutil.rmtree(os.path.join(self.directory, day), ignore_errors=True)
+        return removed
+
+# --- Reading ---
+
+def list_days(directory: str) -> List[str]:
+    """Recorded days, oldest first."""
+    try: entries = os.listdir(directory)
+    except OSError: return []
+    return sorted(d for d in entries if len(d) == 10 and os.path.isfile(os.path.join(directory, d, "meta.json")))
+
+def _row_bytes(meta: Dict[str, Any], name: str) -> int:
+    typ, width, _ = meta["columns"][name]
+    return int(typ[1:]) * width
+
+def _rows(path: str, meta: Dict[str, Any]) -> int:
+    sizes = []
+    for name in meta["columns"]:
+        try: sizes.append(os.path.getsize(os.path.join(path, f"{name}.bin")) // _row_bytes(meta, name))
+        except OSError: sizes.append(0)
+    return min(sizes) if sizes else 0
+
+def _truncate(path: str, meta: Dict[str, Any], rows: int) -> None:
+    for name in meta["columns"]:
+        file = os.path.join(path, f"{name}.bin")
+        if os.path.exists(file) and os.path.getsize(file) > rows * _row_bytes(meta, name):
+            with open(file, "r+b") as f: f.truncate(rows * _row_bytes(meta, name))
+
+def _read_names(path: str) -> Dict[int, str]:
+    names = {}
+    try:
+        with open(os.path.join(path, "names.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                try: record = json.loads(line)
+                except ValueError: continue  # Torn last line
+                names[record["pid"]] = record["name"]
+    except OSError:
+        pass
+    return names
+
+class Segment:
+    """One recorded day, memory-mapped read-only.
+
+    Attributes:
+        day: "YYYY-MM-DD" (UTC).
+        start: Unix time of the day's midnight; row times are `start + t_ms / 1000`.
+        rows: Complete rows.
+        names: pid -> executable name of the games seen that day.
+    """
+
+    def __init__(self, directory: str, day: str):
+        self.path = os.path.join(directory, day)
+        with open(os.path.join(self.path, "meta.json"), "r") as f: self.meta = json.load(f)
+        self.day = day
+        self.start = self.meta["start"]
+        self.cores = self.meta["cores"]
+        self.rows = _rows(self.path, self.meta)
+        self.names = _read_names(self.path)
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def column(self, name: str):
+        """Raw values of a column without copying: a (rows, width) NumPy array, or a flat memoryview without NumPy."""
+        typ, width, _ = self.meta["columns"][name]
+        size = self.rows * width * int(typ[1:])
+        if name not in self._maps and size:
+            with open(os.path.join(self.path, f"{name}.bin"), "rb") as f:
+                self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if np is not None:
+            order = "<" if self.meta["byteorder"] == "little" else ">"
+            if not size: return np.zeros((0, width), dtype=order + typ)
+            return np.frombuffer(self._maps[name], dtype=order + typ, count=self.rows * width).reshape(self.rows, width)
+        code = next(c for c, t, _, _ in COLUMNS.values() if t == typ)
+        if not size: return memoryview(array(code))
+        return memoryview(self._maps[name])[:size].cast(code)
+
+    def values(self, name: str) -> list:
+        """A column as a flat list of raw values, row by row."""
+        column = self.column(name)
+        return column.ravel().tolist() if np is not None else column.tolist()
+
+    def scaled(self, name: str):
+        """A column in its natural unit (percent, milliseconds). Needs NumPy."""
+        return self.column(name) / self.meta["columns"][name][2]
+
+    def close(self) -> None:
+        for m in self._maps.values():
+            try: m.close()
+            except BufferError: pass  # Views still alive; the map closes with them
+        self._maps = {}
+
+    def __enter__(self) -> 'Segment': return self
+    def __exit__(self, *exc) -> None: self.close()
+
+def segments(directory: str, days: Optional[Sequence[str]] = None) -> Iterator[Segment]:
+    """Opens each recorded day in turn (all of them by default)."""
+    for day in days if days is not None else list_days(directory):
+        with Segment(directory, day) as segment: yield segment
+
+def summarize(directory: str) -> Dict[str, Any]:
+    """Mode time, switches, apply time and mean core load per mode over all segments. Needs NumPy."""
+    if np is None: raise RuntimeError("summarize needs NumPy")
+    ticks = {mode: 0 for mode in MODES}
+    load = {mode: None for mode in MODES}
+    switches = failures = 0
+    apply_ms = 0.0
+    rows = 0
+    for seg in segments(directory):
+        if not seg.rows: continue
+        rows += seg.rows
+        mode = seg.column("mode")[:, 0]
+        flags = seg.column("flags")[:, 0]
+        switches += int(np.count_nonzero(flags & FLAG_SWITCH))
+        failures += int(np.count_nonzero(flags & FLAG_FAILED))
+        apply_ms += float(seg.column("apply_ms").sum(dtype=np.float64))
+        core_load = seg.column("core_load")
+        for i, name in enumerate(MODES):
+            selected = mode == i
+            n = int(np.count_nonzero(selected))
+            if not n: continue
+            ticks[name] += n
+            total = core_load[selected].sum(axis=0, dtype=np.float64) / 2.0
+            load[name] = total if load[name] is None or len(load[name]) != len(total) else load[name] + total
+    return {"rows": rows, "ticks": ticks, "switches": switches, "failures": failures, "apply_s": apply_ms / 1000,
+            "core_load": {m: [round(v / ticks[m], 1) for v in load[m]] for m in MODES if load[m] is not None}}
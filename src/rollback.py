@@ -0,0 +1,123 @@
+"""Rollback Plan Module.
+
+This module turns "put the network back" into a plan that is ready before it
+is needed. The plan holds the PowerShell commands for every adapter, already
+rendered, plus the Tcpip registry values. Running it starts with the registry
+writes, then hands each adapter's commands to its own warm shell worker, all
+at once. Nothing is read, diffed or spawned on the way.
+
+The surgeon prepares a plan before every apply and hands it to the watchdog
+(see `src.watchdog`), which runs it if Sentinel dies. This module imports only
+the shell layer, so the watchdog stays small.
+
+The time to issue the plan is what this module controls, and it stays well
+under 100 ms. The adapter driver restarts the NIC to pick up RSS changes, and
+that takes as long as the driver needs.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from src.shell import ShellError, ShellPool
+from src.state import ApplyPlan
+
+TCPIP_PARAMS_KEY = r"SYSTEM\CurrentControlSet\Services\Tcpip\Parameters"
+
+def ps_quote(value: str) -> str:
+    """Quotes `value` as a PowerShell single-quoted string."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def adapter_commands(name: str, changes: Dict[str, Any]) -> List[str]:
+    """The NetAdapter cmdlets that apply `changes` (AdapterState fields) to adapter `name`."""
+    nic = ps_quote(name)
+    rss_args = []
+    if "base_group" in changes: rss_args.append(f"-BaseProcessorGroup {int(changes['base_group'])}")
+    if "base_proc" in changes: rss_args.append(f"-BaseProcessorNumber {int(changes['base_proc'])}")
+    if "max_procs" in changes: rss_args.append(f"-MaxProcessors {int(changes['max_procs'])}")
+    if "profile" in changes: rss_args.append(f"-Profile {ps_quote(changes['profile'])}")
+    commands = []
+    if rss_args: commands.append(f"Set-NetAdapterRss -Name {nic} " + " ".join(rss_args))
+    if "queues" in changes: commands.append(f"Set-NetAdapterRss -Name {nic} -NumberOfReceiveQueues {int(changes['queues'])}")
+    if "interrupt_mod" in changes:
+        commands.append(f"Set-NetAdapterAdvancedProperty -Name {nic} -DisplayName 'Interrupt Moderation' -DisplayValue {ps_quote(changes['interrupt_mod'])}")
+    return commands
+
+def write_tcpip_registry(values: Dict[str, int]) -> bool:
+    """Writes Tcpip\\Parameters DWORD values."""
+    import winreg
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, TCPIP_PARAMS_KEY, 0, winreg.KEY_WRITE) as key:
+            for name, val in values.items(): winreg.SetValueEx(key, name, 0, winreg.REG_DWORD, val)
+        return True
+    except OSError: return False
+
+class RollbackPlan(NamedTuple):
+    """Pre-rendered commands that restore the network.
+
+    Attributes:
+        label: What the plan undoes, for logs.
+        scripts: Adapter name -> PowerShell commands, run in order.
+        tcpip: Tcpip\\Parameters values to write.
+        prepared_at: Unix time the plan was built.
+    """
+    label: str
+    scripts: Dict[str, List[str]]
+    tcpip: Dict[str, int]
+    prepared_at: float
+
+    @property
+    def empty(self) -> bool:
+        return not self.scripts and not self.tcpip
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RollbackPlan':
+        return cls(data["label"], {k: list(v) for k, v in data["scripts"].items()}, dict(data["tcpip"]), data["prepared_at"])
+
+def prepare(target: ApplyPlan, label: str) -> RollbackPlan:
+    """Renders the changes of `target` (e.g. `SwitchJournal.originals()`) into a plan."""
+    scripts = {nic: adapter_commands(nic, changes) for nic, changes in target.adapters.items()}
+    return RollbackPlan(label, {nic: cmds for nic, cmds in scripts.items() if cmds}, dict(target.tcpip), time.time())
+
+class RollbackResult(NamedTuple):
+    """Outcome of `RollbackRunner.run`. `dispatched_ms` is when every adapter's commands were on their way to a worker."""
+    ok: bool
+    dispatched_ms: float
+    done_ms: float
+    failed: List[str]
+
+class RollbackRunner:
+    """Runs plans through a shell pool kept warm for this purpose.
+
+    Attributes:
+        pool: Workers the adapter commands run on, one adapter per worker.
+        write_tcpip: Writes Tcpip values (the registry by default).
+    """
+
+    def __init__(self, pool: Optional[ShellPool] = None, write_tcpip: Callable[[Dict[str, int]], bool] = write_tcpip_registry):
+        self.pool = pool or ShellPool(size=2)
+        self.write_tcpip = write_tcpip
+
+    def warm(self, adapters: int) -> None:
+        """Starts enough workers for `adapters` adapters before they are needed."""
+        self.pool.warm(adapters)
+
+    def run(self, plan: RollbackPlan, timeout: float = 30.0) -> RollbackResult:
+        t0 = time.perf_counter()
+        failed: List[str] = []
+        if plan.tcpip and not self.write_tcpip(plan.tcpip): failed.append("Tcpip")
+        results: Dict[str, bool] = {}
+
+        def run_one(nic: str, commands: Sequence[str]) -> None:
+            try: results[nic] = all(r.ok for r in self.pool.run_batch(commands, timeout))
+            except ShellError: results[nic] = False
+
+        threads = [threading.Thread(target=run_one, args=item, daemon=True) for item in plan.scripts.items()]
+        for t in threads: t.start()
+        dispatched_ms = (time.perf_counter() - t0) * 1000
+        for t in threads: t.join(timeout)
+        failed += [nic for nic in plan.scripts if not results.get(nic)]
+        return RollbackResult(not failed, dispatched_ms, (time.perf_counter() - t0) * 1000, failed)
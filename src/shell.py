@@ -0,0 +1,230 @@
+"""Persistent Shell Worker Module.
+
+This module keeps long-lived PowerShell processes around so that the surgeon
+does not pay a cold interpreter spawn for every cmdlet it runs.
+
+Wire protocol (one line per frame, UTF-8):
+    request:  "<id> <b64 script> [<b64 script> ...]"
+    response: "<id> <ok>:<b64 output> [<ok>:<b64 output> ...]"
+
+Every script in a request frame is executed in order and gets its own result,
+which is what lets several cmdlets share a single round trip. Any interpreter
+that speaks this protocol can stand in for PowerShell (see `ShellWorker.argv`).
+"""
+
+import atexit
+import base64
+import itertools
+import queue
+import subprocess
+import threading
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.tracing import traced
+
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+BOOTSTRAP_SCRIPT = r"""
+$ErrorActionPreference = 'Stop'
+$ProgressPreference = 'SilentlyContinue'
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    $parts = $line.Split(' ')
+    $reply = @($parts[0])
+    for ($i = 1; $i -lt $parts.Length; $i++) {
+        $code = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($parts[$i]))
+        try {
+            $out = Invoke-Expression $code 2>&1 | Out-String
+            $ok = 1
+        } catch {
+            $out = $_ | Out-String
+            $ok = 0
+        }
+        $reply += "$ok" + ':' + [Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes($out))
+    }
+    [Console]::Out.WriteLine($reply -join ' ')
+    [Console]::Out.Flush()
+}
+"""
+
+def powershell_argv() -> List[str]:
+    """Returns the command line that starts a PowerShell worker."""
+    encoded = base64.b64encode(BOOTSTRAP_SCRIPT.encode("utf-16-le")).decode("ascii")
+    return ["powershell", "-NoProfile", "-NoLogo", "-NonInteractive",
+            "-ExecutionPolicy", "Bypass", "-EncodedCommand", encoded]
+
+class ShellError(Exception):
+    """Raised when a worker cannot complete a request."""
+
+class ShellTimeout(ShellError):
+    """Raised when a request exceeds its timeout. The worker is killed."""
+
+class ShellNotSent(ShellError):
+    """Raised when the worker was gone before the request reached it. Nothing ran, so a retry is safe."""
+
+class ShellResult(NamedTuple):
+    """Outcome of a single script inside a request frame."""
+    ok: bool
+    output: str
+
+class ShellWorker:
+    """A single long-lived interpreter speaking the framed protocol.
+
+    Attributes:
+        argv: Command line used to (re)spawn the interpreter.
+        timeout: Default per-request timeout in seconds.
+        spawns: Number of times the interpreter has been started.
+    """
+
+    def __init__(self, argv: Optional[Sequence[str]] = None, timeout: float = 30.0):
+        self.argv: List[str] = list(argv) if argv else powershell_argv()
+        self.timeout = timeout
+        self.spawns = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._replies: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @traced("shell.spawn", cat="shell")
+    def _spawn(self) -> None:
+        self._kill()
+        self._replies = queue.Queue()
+        self._proc = subprocess.Popen(
+            self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", bufsize=1, creationflags=CREATE_NO_WINDOW)
+        self.spawns += 1
+        threading.Thread(target=self._read_loop, args=(self._proc, self._replies), daemon=True).start()
+
+    @staticmethod
+    def _read_loop(proc: subprocess.Popen, replies: "queue.Queue[Optional[str]]") -> None:
+        try:
+            for line in proc.stdout:
+                replies.put(line.rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass
+        replies.put(None)
+
+    def _kill(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None: return
+        try:
+            proc.kill()
+            proc.wait(timeout=2)
+        except Exception: pass
+
+    def _roundtrip(self, scripts: Sequence[str], timeout: float) -> List[ShellResult]:
+        if not self.alive:
+            self._spawn()
+        req_id = str(next(self._ids))
+        frame = " ".join([req_id] + [base64.b64encode(s.encode("utf-8")).decode("ascii") for s in scripts])
+        try:
+            self._proc.stdin.write(frame + "\n")
+            self._proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            self._kill()
+            raise ShellNotSent(f"worker pipe closed: {e}")
+
+        while True:
+            try:
+                line = self._replies.get(timeout=timeout)
+            except queue.Empty:
+                self._kill()
+                raise ShellTimeout(f"request {req_id} timed out after {timeout}s")
+            if line is None:
+                self._kill()
+                raise ShellError(f"worker exited during request {req_id}")
+            parts = line.split(" ")
+            if parts[0] != req_id:
+                continue  # Banner noise or a stale reply
+            try:
+                results = []
+                for item in parts[1:]:
+                    ok, _, payload = item.partition(":")
+                    results.append(ShellResult(ok == "1", base64.b64decode(payload, validate=True).decode("utf-8", "replace")))
+                if len(results) != len(scripts): raise ValueError(f"{len(results)} results for {len(scripts)} scripts")
+            except ValueError as e:
+                self._kill()  # Whatever it writes next cannot be matched to a request any more
+                raise ShellError(f"malformed reply for request {req_id}: {e}")
+            return results
+
+    def run_batch(self, scripts: Sequence[str], timeout: Optional[float] = None) -> List[ShellResult]:
+        """Runs several scripts in one round trip.
+
+        A worker that was gone before the frame reached it is respawned and the
+        batch is retried once. Nothing is retried once the frame is sent: the
+        scripts may have run, and a timeout may be their own doing. The worker
+        is killed after a timeout, a crash or a malformed reply, and the next
+        request starts a fresh one.
+
+        Args:
+            scripts: Script sources, executed in order.
+            timeout: Seconds to wait for the whole frame. Defaults to `self.timeout`.
+
+        Returns:
+            One `ShellResult` per script.
+        """
+        if not scripts: return []
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            try:
+                return self._roundtrip(scripts, timeout)
+            except ShellNotSent:
+                return self._roundtrip(scripts, timeout)
+
+    def run(self, script: str, timeout: Optional[float] = None) -> ShellResult:
+        """Runs a single script and returns its result."""
+        return self.run_batch([script], timeout)[0]
+
+    def warm(self) -> None:
+        """Starts the interpreter now instead of on the first request."""
+        with self._lock:
+            if not self.alive: self._spawn()
+
+    def close(self) -> None:
+        with self._lock:
+            self._kill()
+
+class ShellPool:
+    """A small pool of `ShellWorker` instances, spawned on first use.
+
+    Attributes:
+        size: Maximum number of concurrent workers.
+        timeout: Default per-request timeout of every worker, in seconds.
+    """
+
+    def __init__(self, size: int = 2, argv: Optional[Sequence[str]] = None, timeout: float = 30.0):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._workers = [ShellWorker(argv, timeout) for _ in range(self.size)]
+        self._idle: "queue.LifoQueue[ShellWorker]" = queue.LifoQueue()  # Reuse warm workers first
+        for w in self._workers: self._idle.put(w)
+        atexit.register(self.close)
+
+    @traced("shell.run_batch", cat="shell")
+    def run_batch(self, scripts: Sequence[str], timeout: Optional[float] = None) -> List[ShellResult]:
+        worker = self._idle.get()
+        try:
+            return worker.run_batch(scripts, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def run(self, script: str, timeout: Optional[float] = None) -> ShellResult:
+        return self.run_batch([script], timeout)[0]
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Starts up to `count` workers (all by default) ahead of their first request.
+
+        The workers are taken from the idle stack, so the ones started are the ones handed out next.
+        """
+        taken = [self._idle.get() for _ in range(min(count or self.size, self.size))]
+        for w in taken: w.warm()
+        for w in reversed(taken): self._idle.put(w)
+
+    def close(self) -> None:
+        for w in self._workers: w.close()
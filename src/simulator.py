@@ -0,0 +1,424 @@
+"""Policy Simulator Module.
+
+This module replays process-activity traces through the real `RSSAutopilot`
+decision logic, so the hysteresis delay, the CPU threshold and the tick
+interval can be tuned without playing a single game.
+
+The autopilot runs unmodified. Only the things around it are swapped out:
+    * a virtual clock that jumps from tick to tick instead of sleeping,
+    * a process table that plays the trace back into the real `ProcessWatcher`,
+    * a surgeon whose applies cost virtual seconds instead of PowerShell calls,
+    * an in-memory config that never touches rss_config.json.
+Game launches reach the autopilot through `_on_launch`, as they would from
+`src.launchwatch`, and wake it for an immediate tick.
+
+A trace is a time-ordered list of `Activity` records (synthetic, JSON lines, or
+converted from `src.recorder` segments by `load_recording`). Each record is a change
+in one process's CPU use, and `cpu=None` marks its exit. A game "should" be
+in Gaming Mode from its launch until its exit. Each report weighs the policy
+against that:
+    late_s    seconds a game was running outside Gaming Mode,
+    linger_s  seconds spent in Gaming Mode with no game running,
+    flaps     switches that came within `flap_window` seconds of the previous one,
+    apply_s   virtual seconds spent applying settings.
+
+`sweep` runs every combination of a parameter grid over the traces in a
+process pool.
+"""
+
+import argparse
+import bisect
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.config import ConfigManager
+from src.daemon import RSSAutopilot
+from src.launchwatch import LaunchEvent
+from src.procwatch import ProcessWatcher
+from src.recorder import GAME_SLOTS, segments
+
+class Activity(NamedTuple):
+    """From time `t` on, process `pid` uses `cpu` percent of one core. None means it exited."""
+    t: float
+    pid: int
+    name: str
+    cpu: Optional[float]
+
+class PolicyParams(NamedTuple):
+    """One set of autopilot tunables plus the costs of the simulated environment."""
+    hysteresis: float = 60.0      # RSSAutopilot.HYSTERESIS_DELAY
+    cpu_threshold: float = 5.0    # RSSAutopilot.CPU_THRESHOLD
+    tick: float = 2.0             # RSSAutopilot.TICK_INTERVAL
+    launch_events: bool = True    # Whether the launch watcher reports process starts
+    launch_delay: float = 0.25    # Process start to launch event (PID poll interval)
+    apply_cost: float = 1.5       # Seconds one safe_apply_mode takes
+
+class SimReport(NamedTuple):
+    """Outcome of one or more replays. Reports add up field by field (see `combine`)."""
+    duration_s: float
+    ticks: int
+    switches: int
+    flaps: int
+    late_s: float
+    linger_s: float
+    apply_s: float
+    wall_s: float
+
+    @property
+    def wrong_s(self) -> float:
+        """Seconds in the wrong mode, either way."""
+        return self.late_s + self.linger_s
+
+    @property
+    def speedup(self) -> float:
+        """Simulated seconds per wall-clock second."""
+        return self.duration_s / self.wall_s if self.wall_s > 0 else math.inf
+
+def combine(reports: Iterable[SimReport]) -> SimReport:
+    return SimReport(*(sum(values) for values in zip(*reports)))
+
+# --- Simulated environment ---
+
+_CpuTimes = namedtuple("_CpuTimes", "user system")
+
+class _Clock:
+    __slots__ = ("now",)
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class _SimProcess:
+    """A `psutil.Process` stand-in whose CPU time integrates the trace over virtual time."""
+    __slots__ = ("pid", "_name", "_clock", "_born", "_cpu", "_total", "_since", "alive")
+
+    def __init__(self, pid: int, name: str, clock: _Clock, cpu: float):
+        self.pid = pid
+        self._name = name
+        self._clock = clock
+        self._born = clock.now
+        self._cpu = cpu
+        self._total = 0.0
+        self._since = clock.now
+        self.alive = True
+
+    def _advance(self, t: float) -> None:
+        if t > self._since:
+            self._total += (t - self._since) * self._cpu / 100.0
+            self._since = t
+
+    def set_cpu(self, t: float, cpu: float) -> None:
+        self._advance(t)
+        self._cpu = cpu
+
+    def name(self) -> str: return self._name
+    def exe(self) -> str: return f"C:\\Games\\{self._name}"
+    def create_time(self) -> float: return time.time() - (self._clock.now - self._born)
+    def is_running(self) -> bool: return self.alive
+
+    def cpu_times(self) -> _CpuTimes:
+        self._advance(self._clock.now)
+        return _CpuTimes(self._total, 0.0)
+
+class _SimTable:
+    """The process table as of the last replayed `Activity`."""
+
+    def __init__(self, trace: Sequence[Activity], clock: _Clock):
+        self.trace = trace
+        self.clock = clock
+        self.procs: Dict[int, _SimProcess] = {}
+        self._next = 0
+
+    def replay(self, until: float) -> None:
+        trace, procs = self.trace, self.procs
+        while self._next < len(trace) and trace[self._next].t <= until:
+            t, pid, name, cpu = trace[self._next]
+            self._next += 1
+            proc = procs.get(pid)
+            if cpu is None:
+                if proc is not None: procs.pop(pid).alive = False
+            elif proc is None: procs[pid] = _SimProcess(pid, name, self.clock, cpu)
+            else: proc.set_cpu(t, cpu)
+
+    def pids(self) -> List[int]:
+        return list(self.procs)
+
+class _Probe:
+    deadline = 5.0
+    max_failures = 3
+
+class _SimSurgeon:
+    """Just enough of `KernelSurgeon` for the autopilot: a flat topology and applies that cost time."""
+
+    def __init__(self, clock: _Clock, apply_cost: float, physical: int = 8, logical: int = 16):
+        self.clock = clock
+        self.apply_cost = apply_cost
+        self.topology = {"physical": physical, "logical": logical, "p_cores": physical}
+        self.data_dir = os.path.join(tempfile.gettempdir(), "rss-sentinel-sim")  # Never written: tuning is off
+        self.gateway_ip = "127.0.0.1"
+        self.target_adapters = ["Ethernet"]
+        self.hardware_version = 0
+        self.polluted_cores: List[int] = []
+        self.busy_mask = 0
+        self.last_apply_report = None
+        self.probe = _Probe()
+        self.timeline: List[Tuple[float, str]] = [(0.0, "DESKTOP")]
+        self.apply_s = 0.0
+
+    def get_topology_info(self) -> Dict[str, Any]: return self.topology
+    def progress(self) -> None: pass
+    def is_clean_window(self, base: int, size: int) -> bool: return True
+
+    def calculate_best_gap(self, sizes: Tuple[int, ...] = (4, 2, 1)) -> Tuple[int, int]:
+        size = next((s for s in sizes if s < self.topology["logical"]), 1)
+        return self.topology["logical"] - size, size
+
+    def safe_apply_mode(self, base, max_p, profile, im_mode, queues, mode_name, per_adapter=None) -> bool:
+        self.clock.now += self.apply_cost
+        self.apply_s += self.apply_cost
+        if mode_name != self.timeline[-1][1]: self.timeline.append((self.clock.now, mode_name))
+        return True
+
+class _SimConfig:
+    """A frozen `ConfigManager` stand-in: defaults plus overrides, never reloaded."""
+
+    def __init__(self, overrides: Optional[Dict[str, Any]] = None):
+        self._data = {**ConfigManager.DEFAULT_CONFIG, "bench_enabled": False, "placement_enabled": False,
+                      "profile_tuning": False, **(overrides or {})}
+        self._data["games_list"] = tuple(self._data["games_list"])
+        self.version = 1
+
+    def get(self, key: str) -> Any: return self._data.get(key)
+    def reload(self) -> bool: return False
+    def as_dict(self) -> Dict[str, Any]: return dict(self._data)
+
+class _Discard(io.TextIOBase):
+    def write(self, text: str) -> int: return len(text)
+
+class _NoLaunches:
+    def start(self): return self
+    def stop(self): pass
+
+# --- Replay ---
+
+def _wanted(trace: Sequence[Activity], matcher) -> List[Tuple[float, bool]]:
+    """Steps of the ground truth: True while at least one game process is alive."""
+    steps, alive = [(0.0, False)], set()
+    for t, pid, name, cpu in trace:
+        if cpu is None: alive.discard(pid)
+        elif pid not in alive and matcher.match(name): alive.add(pid)
+        else: continue
+        if bool(alive) != steps[-1][1]: steps.append((t, bool(alive)))
+    return steps
+
+def _mismatch(wanted: List[Tuple[float, bool]], actual: List[Tuple[float, str]], end: float) -> Tuple[float, float]:
+    """Integrates (late, linger) seconds over two step functions."""
+    times = sorted({t for t, _ in wanted} | {t for t, _ in actual} | {end})
+    wanted_t, actual_t = [t for t, _ in wanted], [t for t, _ in actual]
+    late = linger = 0.0
+    for start, stop in zip(times, times[1:]):
+        if start >= end: break
+        want = wanted[bisect.bisect_right(wanted_t, start) - 1][1]
+        gaming = actual[bisect.bisect_right(actual_t, start) - 1][1] == "GAMING"
+        if want and not gaming: late += min(stop, end) - start
+        elif gaming and not want: linger += min(stop, end) - start
+    return late, linger
+
+def run(trace: Sequence[Activity], params: PolicyParams = PolicyParams(), duration: Optional[float] = None,
+        flap_window: float = 60.0, config: Optional[Dict[str, Any]] = None) -> SimReport:
+    """Replays one trace through a fresh autopilot.
+
+    Args:
+        trace: Activity records ordered by time.
+        params: Tunables and environment costs.
+        duration: Seconds to simulate. Defaults to the last record plus the
+            hysteresis delay and a minute, so lingering after the last exit counts.
+        flap_window: A switch this soon after the previous one counts as a flap.
+        config: Config overrides, e.g. a custom `games_list`.
+    """
+    wall0 = time.perf_counter()
+    end = duration if duration is not None else (trace[-1].t if trace else 0.0) + params.hysteresis + 60.0
+    clock = _Clock()
+    table = _SimTable(trace, clock)
+    surgeon = _SimSurgeon(clock, params.apply_cost)
+    watcher = ProcessWatcher(table.pids, table.procs.__getitem__, clock)
+    autopilot = RSSAutopilot(surgeon, _SimConfig(config), watcher=watcher, launches=_NoLaunches())
+    autopilot.HYSTERESIS_DELAY = params.hysteresis
+    autopilot.CPU_THRESHOLD = params.cpu_threshold
+    autopilot.TICK_INTERVAL = params.tick
+    autopilot.current_mode = "DESKTOP"  # The service has been running for a while
+    matcher = autopilot._games()
+
+    launches: List[Tuple[float, int, str]] = []
+    if params.launch_events:
+        seen = set()
+        for t, pid, name, cpu in trace:
+            if cpu is not None and pid not in seen:
+                seen.add(pid)
+                if matcher.match(name): launches.append((t + params.launch_delay, pid, name))
+    launches.reverse()  # Popped from the end
+
+    ticks, next_tick = 0, 0.0
+    with contextlib.redirect_stdout(_Discard()):  # The autopilot logs every switch
+        while True:
+            due = min(next_tick, launches[-1][0] if launches else math.inf)
+            if due > end: break
+            clock.now = max(clock.now, due)  # An apply may have run past the due time
+            table.replay(clock.now)
+            while launches and launches[-1][0] <= clock.now:
+                _, pid, name = launches.pop()
+                if pid in table.procs: autopilot._on_launch(LaunchEvent(pid, name, time.monotonic(), "sim"))
+            autopilot.tick()
+            ticks += 1
+            next_tick = clock.now + params.tick
+
+    switch_times = [t for t, _ in surgeon.timeline[1:]]
+    flaps = sum(1 for a, b in zip(switch_times, switch_times[1:]) if b - a < flap_window)
+    late, linger = _mismatch(_wanted(trace, matcher), surgeon.timeline, end)
+    return SimReport(end, ticks, len(switch_times), flaps, late, linger, surgeon.apply_s, time.perf_counter() - wall0)
+
+# --- Batch mode ---
+
+_worker_traces: List[List[Activity]] = []
+
+def _init_worker(traces: List[List[Activity]]) -> None:
+    global _worker_traces
+    _worker_traces = traces
+
+def _run_all(params: PolicyParams) -> SimReport:
+    return combine(run(trace, params) for trace in _worker_traces)
+
+def grid(**axes: Sequence[Any]) -> List[PolicyParams]:
+    """Every combination of the given `PolicyParams` fields, e.g. grid(hysteresis=(30, 60), tick=(1, 2))."""
+    return [PolicyParams(**dict(zip(axes, values))) for values in itertools.product(*axes.values())]
+
+def sweep(traces: List[List[Activity]], params: Sequence[PolicyParams], workers: Optional[int] = None) -> List[Tuple[PolicyParams, SimReport]]:
+    """Replays all traces under each parameter set across a process pool.
+
+    Returns:
+        (params, combined report) pairs in the order of `params`.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(traces,)) as pool:
+        reports = list(pool.map(_run_all, params))
+    return list(zip(params, reports))
+
+def format_table(results: Sequence[Tuple[PolicyParams, SimReport]]) -> str:
+    """Results as a text table, fewest seconds in the wrong mode first."""
+    lines = [f"{'hyst':>5} {'thr%':>5} {'tick':>5} {'launch':>6} | {'switch':>6} {'flaps':>5} "
+             f"{'late s':>8} {'linger s':>8} {'apply s':>8}"]
+    for p, r in sorted(results, key=lambda pr: (pr[1].wrong_s + pr[1].apply_s, pr[1].flaps)):
+        lines.append(f"{p.hysteresis:>5.0f} {p.cpu_threshold:>5.1f} {p.tick:>5.1f} {'yes' if p.launch_events else 'no':>6} | "
+                     f"{r.switches:>6} {r.flaps:>5} {r.late_s:>8.0f} {r.linger_s:>8.0f} {r.apply_s:>8.0f}")
+    return "\n".join(lines)
+
+# --- Traces ---
+
+def save_trace(trace: Sequence[Activity], path: str) -> None:
+    """Writes a trace as JSON lines ({"t", "pid", "name", "cpu"} per record)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in trace: f.write(json.dumps(record._asdict()) + "\n")
+
+def load_trace(path: str) -> List[Activity]:
+    with open(path, "r", encoding="utf-8") as f:
+        trace = [Activity(**json.loads(line)) for line in f if line.strip()]
+    trace.sort(key=lambda a: a.t)
+    return trace
+
+def load_recording(directory: str, days: Optional[Sequence[str]] = None) -> List[Activity]:
+    """Turns recorded ticks into a trace, with time 0 at the first row.
+
+    Only matched games were recorded, so the trace holds no background processes.
+    A game exits when it drops out of the recorded slots.
+    """
+    trace: List[Activity] = []
+    origin: Optional[float] = None
+    alive: Dict[int, float] = {}
+    for seg in segments(directory, days):
+        if not seg.rows: continue
+        times, pids, cpus = seg.values("t_ms"), seg.values("game_pid"), seg.values("game_cpu")
+        if origin is None: origin = seg.start + times[0] / 1000
+        for row, t_ms in enumerate(times):
+            t = seg.start + t_ms / 1000 - origin
+            slots = range(row * GAME_SLOTS, (row + 1) * GAME_SLOTS)
+            current = {pids[i]: cpus[i] / 10 for i in slots if pids[i]}
+            for pid in [p for p in alive if p not in current]:
+                trace.append(Activity(t, pid, seg.names.get(pid, ""), None))
+                del alive[pid]
+            for pid, cpu in current.items():
+                if alive.get(pid) != cpu:
+                    trace.append(Activity(t, pid, seg.names.get(pid, f"pid{pid}"), cpu))
+                    alive[pid] = cpu
+    return trace
+
+def synthetic_trace(hours: float = 24.0, seed: int = 0,
+                    games: Sequence[str] = ("cs2.exe", "r5apex.exe", "valorant-win64-shipping.exe")) -> List[Activity]:
+    """A day of gaming sessions with the patterns that make switching hard.
+
+    Games load below the CPU threshold for up to a minute and drop below it in
+    menus or while alt-tabbed. Some crash and are restarted within seconds.
+    Desktop applications keep running in the background throughout.
+    """
+    rng = random.Random(seed)
+    end = hours * 3600
+    trace: List[Activity] = []
+    pids = itertools.count(1000, 4)
+    for name in ("explorer.exe", "chrome.exe", "discord.exe", "obs64.exe"):
+        pid, t = next(pids), 0.0
+        while t < end:
+            trace.append(Activity(t, pid, name, rng.uniform(0, 25)))
+            t += rng.expovariate(1 / 300)
+
+    t, game = rng.uniform(300, 3600), None
+    while t < end:
+        restart = game is not None
+        game = game if restart else rng.choice(games)
+        pid = next(pids)
+        trace.append(Activity(t, pid, game, rng.uniform(0.5, 4.0)))  # Loading
+        t += rng.uniform(15, 90)
+        stop = t + (rng.uniform(60, 1800) if restart else rng.uniform(600, 7200))
+        while t < stop:
+            trace.append(Activity(t, pid, game, rng.uniform(40, 180)))
+            t += rng.uniform(60, 900)
+            if rng.random() < 0.4:  # Menu or alt-tab
+                trace.append(Activity(t, pid, game, rng.uniform(0.5, 4.0)))
+                t += rng.expovariate(1 / 90)
+        trace.append(Activity(t, pid, game, None))
+        if rng.random() < 0.2:
+            t += rng.uniform(5, 40)
+        else:
+            game = None
+            t += rng.uniform(900, 4 * 3600)
+    trace.sort(key=lambda a: a.t)
+    return trace
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep autopilot parameters over activity traces")
+    parser.add_argument("traces", nargs="*", help="JSON-lines traces (default: synthetic days)")
+    parser.add_argument("--recording", help="Session recording directory (see src.recorder) to replay")
+    parser.add_argument("--days", type=int, default=7, help="Synthetic days when no trace is given")
+    parser.add_argument("--hysteresis", type=float, nargs="+", default=[PolicyParams._field_defaults["hysteresis"]])
+    parser.add_argument("--threshold", type=float, nargs="+", default=[PolicyParams._field_defaults["cpu_threshold"]])
+    parser.add_argument("--tick", type=float, nargs="+", default=[PolicyParams._field_defaults["tick"]])
+    parser.add_argument("--no-launch-events", action="store_true", help="Rely on CPU polling alone")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    traces = [load_trace(p) for p in args.traces] + ([load_recording(args.recording)] if args.recording else [])
+    traces = traces or [synthetic_trace(24, seed) for seed in range(args.days)]
+    params = grid(hysteresis=args.hysteresis, cpu_threshold=args.threshold, tick=args.tick,
+                  launch_events=(not args.no_launch_events,))
+    print(format_table(sweep(traces, params, args.workers)))
+
+if __name__ == "__main__":
+    main()
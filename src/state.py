@@ -0,0 +1,229 @@
+"""Network State Reconciliation Module.
+
+This module models the desired RSS state of every adapter, keeps a cached copy of
+what was last observed on the machine and pushes only the parameters that differ.
+
+Backends do the actual reading and writing. `KernelSurgeon` uses the PowerShell
+backend from `src.core`; `FakeAdapterBackend` keeps everything in memory.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TCPIP_KEYS: Tuple[str, ...] = ("ReceiveSideScaling", "EnableTCPA", "MaxNumRSSQueues")
+
+def normalize_im(value: Any) -> Optional[str]:
+    """Maps the various interrupt moderation spellings to 'Enabled'/'Disabled'."""
+    if value is None: return None
+    if isinstance(value, int): return "Enabled" if value == 1 else "Disabled"
+    return str(value)
+
+@dataclass(frozen=True)
+class AdapterState:
+    """RSS parameters of one adapter. `None` means unknown (observed) or don't-care (desired)."""
+    base_proc: Optional[int] = None
+    max_procs: Optional[int] = None
+    profile: Optional[str] = None
+    queues: Optional[int] = None
+    interrupt_mod: Optional[str] = None
+    base_group: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+@dataclass
+class ApplyPlan:
+    """The minimal set of changes that turns the observed state into the desired one.
+
+    Attributes:
+        adapters: Adapter name -> {field: new value}.
+        previous: Adapter name -> {field: value before the change}.
+        tcpip: Tcpip\\Parameters value name -> new value.
+        tcpip_previous: Tcpip\\Parameters value name -> value before the change.
+    """
+    adapters: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    previous: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    tcpip: Dict[str, int] = field(default_factory=dict)
+    tcpip_previous: Dict[str, Optional[int]] = field(default_factory=dict)
+
+    @property
+    def empty(self) -> bool:
+        return not self.adapters and not self.tcpip
+
+    def inverse(self) -> 'ApplyPlan':
+        """Returns the plan that undoes this one (unknown previous values are skipped)."""
+        adapters = {}
+        for nic, old in self.previous.items():
+            known = {k: v for k, v in old.items() if v is not None}
+            if known: adapters[nic] = known
+        tcpip = {k: v for k, v in self.tcpip_previous.items() if v is not None}
+        return ApplyPlan(adapters, {nic: dict(ch) for nic, ch in self.adapters.items()},
+                         tcpip, dict(self.tcpip))
+
+    def subset(self, names: Iterable[str], include_tcpip: bool = False) -> 'ApplyPlan':
+        """Returns the part of this plan that touches only the adapters in `names`."""
+        names = set(names)
+        return ApplyPlan({n: c for n, c in self.adapters.items() if n in names},
+                         {n: c for n, c in self.previous.items() if n in names},
+                         dict(self.tcpip) if include_tcpip else {},
+                         dict(self.tcpip_previous) if include_tcpip else {})
+
+class AdapterResult(NamedTuple):
+    """Outcome of pushing one adapter's changes."""
+    name: str
+    ok: bool
+    elapsed_ms: float
+
+class ExecResult(NamedTuple):
+    """Outcome of `StateReconciler.execute`."""
+    adapters: Dict[str, AdapterResult]
+    tcpip_ok: bool
+
+    @property
+    def ok(self) -> bool:
+        return self.tcpip_ok and all(r.ok for r in self.adapters.values())
+
+    @property
+    def failed(self) -> List[str]:
+        return [n for n, r in self.adapters.items() if not r.ok]
+
+class AdapterBackend:
+    """Reads and writes adapter and Tcpip state. Subclasses implement the I/O."""
+
+    def read_adapters(self, names: Iterable[str]) -> Dict[str, AdapterState]:
+        raise NotImplementedError
+
+    def set_adapter(self, name: str, changes: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def read_tcpip(self) -> Dict[str, Optional[int]]:
+        raise NotImplementedError
+
+    def write_tcpip(self, values: Dict[str, int]) -> bool:
+        raise NotImplementedError
+
+    def read_bindings(self, names: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Returns adapter name -> (local IPv4 address, IPv4 gateway). Unknown adapters are omitted."""
+        return {}
+
+    def read_link_speeds(self, names: Iterable[str]) -> Dict[str, int]:
+        """Returns adapter name -> receive link speed in bits per second. Unknown adapters are omitted."""
+        return {}
+
+class FakeAdapterBackend(AdapterBackend):
+    """In-memory backend that records every call it receives.
+
+    Attributes:
+        adapters: Adapter name -> current `AdapterState`.
+        tcpip: Current Tcpip\\Parameters values.
+        calls: Log of (operation, target, payload) tuples.
+    """
+
+    def __init__(self, adapters: Optional[Dict[str, AdapterState]] = None, tcpip: Optional[Dict[str, int]] = None):
+        self.adapters: Dict[str, AdapterState] = dict(adapters or {})
+        self.tcpip: Dict[str, Optional[int]] = dict(tcpip or {})
+        self.calls: List[Tuple[str, str, Any]] = []
+
+    def read_adapters(self, names: Iterable[str]) -> Dict[str, AdapterState]:
+        names = list(names)
+        self.calls.append(("read_adapters", ",".join(names), None))
+        return {n: self.adapters.get(n, AdapterState()) for n in names}
+
+    def set_adapter(self, name: str, changes: Dict[str, Any]) -> bool:
+        self.calls.append(("set_adapter", name, dict(changes)))
+        self.adapters[name] = replace(self.adapters.get(name, AdapterState()), **changes)
+        return True
+
+    def read_tcpip(self) -> Dict[str, Optional[int]]:
+        self.calls.append(("read_tcpip", "", None))
+        return {k: self.tcpip.get(k) for k in TCPIP_KEYS}
+
+    def write_tcpip(self, values: Dict[str, int]) -> bool:
+        self.calls.append(("write_tcpip", "", dict(values)))
+        self.tcpip.update(values)
+        return True
+
+class StateReconciler:
+    """Diffs desired against cached observed state and applies only the difference.
+
+    The observed cache is filled on first use and updated with every successful
+    write, so consecutive applies of the same target never touch the backend.
+    Call `refresh` to re-read the machine when something else may have changed it.
+    """
+
+    def __init__(self, backend: AdapterBackend):
+        self.backend = backend
+        self._observed: Dict[str, AdapterState] = {}
+        self._tcpip: Optional[Dict[str, Optional[int]]] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, names: Optional[Iterable[str]] = None) -> None:
+        """Re-reads observed state (all cached adapters if `names` is None)."""
+        with self._lock:
+            names = list(self._observed) if names is None else list(names)
+            if names: self._observed.update(self.backend.read_adapters(names))
+            self._tcpip = self.backend.read_tcpip()
+
+    def observed(self, name: str) -> Optional[AdapterState]:
+        return self._observed.get(name)
+
+    def diff(self, desired: Dict[str, AdapterState], tcpip: Optional[Dict[str, int]] = None) -> ApplyPlan:
+        """Computes the plan needed to reach `desired` and `tcpip`."""
+        with self._lock:
+            missing = [n for n in desired if n not in self._observed]
+            if missing: self._observed.update(self.backend.read_adapters(missing))
+            if tcpip and self._tcpip is None: self._tcpip = self.backend.read_tcpip()
+
+            plan = ApplyPlan()
+            for nic, want in desired.items():
+                have = self._observed.get(nic, AdapterState()).as_dict()
+                changes, before = {}, {}
+                for key, value in want.as_dict().items():
+                    if key == "interrupt_mod": value = normalize_im(value)
+                    if value is not None and have[key] != value:
+                        changes[key] = value
+                        before[key] = have[key]
+                if changes:
+                    plan.adapters[nic] = changes
+                    plan.previous[nic] = before
+            for key, value in (tcpip or {}).items():
+                old = self._tcpip.get(key)
+                if old != value:
+                    plan.tcpip[key] = value
+                    plan.tcpip_previous[key] = old
+            return plan
+
+    def _execute_adapter(self, nic: str, changes: Dict[str, Any]) -> AdapterResult:
+        t0 = time.perf_counter()
+        ok = self.backend.set_adapter(nic, changes)
+        with self._lock:
+            if ok: self._observed[nic] = replace(self._observed.get(nic, AdapterState()), **changes)
+            else: self._observed.pop(nic, None)  # Unknown now; re-read next time
+        return AdapterResult(nic, ok, (time.perf_counter() - t0) * 1000)
+
+    def execute(self, plan: ApplyPlan) -> ExecResult:
+        """Pushes `plan` to the backend and folds successful writes into the cache.
+
+        Adapters are configured concurrently, so the total time is bounded by the
+        slowest adapter rather than the sum of all of them.
+        """
+        results: Dict[str, AdapterResult] = {}
+        if plan.adapters:
+            with ThreadPoolExecutor(max_workers=len(plan.adapters)) as pool:
+                for res in pool.map(lambda item: self._execute_adapter(*item), plan.adapters.items()):
+                    results[res.name] = res
+        tcpip_ok = True
+        if plan.tcpip:
+            tcpip_ok = self.backend.write_tcpip(plan.tcpip)
+            with self._lock:
+                if not tcpip_ok: self._tcpip = None
+                elif self._tcpip is not None: self._tcpip.update(plan.tcpip)
+        return ExecResult(results, tcpip_ok)
+
+    def apply(self, desired: Dict[str, AdapterState], tcpip: Optional[Dict[str, int]] = None) -> Tuple[ApplyPlan, bool]:
+        """Diffs and executes in one step. Returns the plan and whether it succeeded."""
+        plan = self.diff(desired, tcpip)
+        return plan, (self.execute(plan).ok if not plan.empty else True)
@@ -0,0 +1,155 @@
+"""Interrupt Telemetry Module.
+
+This module samples how much time every logical processor spends servicing
+interrupts and deferred procedure calls (and running user code), so the topology
+map and the placement controller see real load instead of only the registry's
+view of which cores are polluted.
+
+The source is psutil's per-CPU times: `interrupt` and `dpc` on Windows, `irq`
+and `softirq` on Linux (from /proc/stat, in time units rather than the raw event
+counts of /proc/interrupts). Samples go into fixed-size, array-backed ring
+buffers. The sampler measures its own CPU time and lowers its rate when it would
+exceed its budget.
+"""
+
+import threading
+import time
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import psutil
+
+def read_irq_times() -> List[Tuple[float, float, float]]:
+    """Cumulative (interrupt, DPC, user) seconds per logical processor."""
+    rows = []
+    for t in psutil.cpu_times(percpu=True):
+        rows.append((getattr(t, "interrupt", getattr(t, "irq", 0.0)), getattr(t, "dpc", getattr(t, "softirq", 0.0)), t.user))
+    return rows
+
+class RingBuffer:
+    """Fixed-capacity ring of equal-width float rows, stored in one flat array.
+
+    Attributes:
+        capacity: Rows kept.
+        width: Values per row.
+        count: Rows written so far (saturates at `capacity`).
+    """
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.width = width
+        self.count = 0
+        self._head = 0
+        self._data = array("f", bytes(4 * capacity * width))
+
+    def push(self, row: Sequence[float]) -> None:
+        at = self._head * self.width
+        self._data[at:at + self.width] = array("f", row)
+        self._head = (self._head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def mean(self, rows: int) -> List[float]:
+        """Column means over the newest `rows` rows."""
+        rows = min(rows, self.count)
+        if not rows: return [0.0] * self.width
+        totals = [0.0] * self.width
+        for back in range(1, rows + 1):
+            at = ((self._head - back) % self.capacity) * self.width
+            for c, value in enumerate(self._data[at:at + self.width]): totals[c] += value
+        return [t / rows for t in totals]
+
+    def latest(self) -> List[float]:
+        if not self.count: return [0.0] * self.width
+        at = ((self._head - 1) % self.capacity) * self.width
+        return list(self._data[at:at + self.width])
+
+class TelemetrySampler:
+    """Background sampler of per-CPU interrupt and DPC load, in percent of one CPU.
+
+    Attributes:
+        hz: Current sample rate. Lowered when over budget, never raised above `max_hz`.
+        max_hz: Requested sample rate (capped at 10). The rings hold `seconds` of samples at this rate.
+        budget: Maximum share of one core the sampler may use, in percent.
+        interrupt: Ring of per-CPU interrupt percentages.
+        dpc: Ring of per-CPU DPC percentages.
+        user: Ring of per-CPU user-mode percentages.
+    """
+
+    def __init__(self, hz: float = 10.0, seconds: float = 60.0, budget: float = 0.5,
+                 source: Callable[[], List[Tuple[float, float, float]]] = read_irq_times,
+                 clock: Callable[[], float] = time.monotonic):
+        self.source = source
+        self.clock = clock
+        self.max_hz = self.hz = min(hz, 10.0)
+        self.budget = budget
+        self.cpus = len(source())
+        capacity = max(1, int(seconds * self.max_hz))
+        self.interrupt = RingBuffer(capacity, self.cpus)
+        self.dpc = RingBuffer(capacity, self.cpus)
+        self.user = RingBuffer(capacity, self.cpus)
+        self._prev: Optional[List[Tuple[float, float, float]]] = None
+        self._prev_ts = 0.0
+        self._cost = 0.0  # Sampler CPU seconds
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def sample(self) -> None:
+        """Takes one sample and pushes the per-CPU rates since the previous one."""
+        now = self.clock()
+        rows = self.source()
+        if self._prev is not None and now > self._prev_ts:
+            scale = 100.0 / (now - self._prev_ts)
+            irq = [max(0.0, (r[0] - p[0]) * scale) for r, p in zip(rows, self._prev)]
+            dpc = [max(0.0, (r[1] - p[1]) * scale) for r, p in zip(rows, self._prev)]
+            user = [max(0.0, (r[2] - p[2]) * scale) for r, p in zip(rows, self._prev)]
+            with self._lock:
+                self.interrupt.push(irq)
+                self.dpc.push(dpc)
+                self.user.push(user)
+        self._prev, self._prev_ts = rows, now
+
+    def _run(self) -> None:
+        self._started = time.monotonic()
+        while not self._stop.is_set():
+            t0 = time.thread_time()
+            self.sample()
+            self._cost += time.thread_time() - t0
+            # Back off when over budget, recover slowly when well under it (after a 1 s warm-up)
+            overhead = self.overhead_percent() if time.monotonic() - self._started > 1.0 else 0.0
+            if overhead > self.budget and self.hz > 1.0: self.hz = max(1.0, self.hz / 2)
+            elif overhead < self.budget / 4 and self.hz < self.max_hz: self.hz = min(self.max_hz, self.hz * 1.25)
+            self._stop.wait(1.0 / self.hz)
+
+    def start(self) -> 'TelemetrySampler':
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="irq-telemetry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks up to `timeout` seconds. Returns True once the sampler has been stopped."""
+        return self._stop.wait(timeout)
+
+    def overhead_percent(self) -> float:
+        """Sampler CPU time as a percentage of one core since it started."""
+        elapsed = time.monotonic() - self._started
+        return self._cost / elapsed * 100 if elapsed > 0 else 0.0
+
+    def heat(self, seconds: float = 1.0) -> List[float]:
+        """Per-CPU interrupt + DPC load in percent, averaged over the last `seconds`."""
+        rows = max(1, int(seconds * self.hz))
+        with self._lock:
+            irq, dpc = self.interrupt.mean(rows), self.dpc.mean(rows)
+        return [a + b for a, b in zip(irq, dpc)]
+
+    def load(self, seconds: float = 5.0, user_weight: float = 0.5) -> List[float]:
+        """Per-CPU interrupt + DPC + weighted user load in percent, averaged over the last `seconds`."""
+        rows = max(1, int(seconds * self.hz))
+        with self._lock:
+            irq, dpc, user = self.interrupt.mean(rows), self.dpc.mean(rows), self.user.mean(rows)
+        return [a + b + user_weight * c for a, b, c in zip(irq, dpc, user)]
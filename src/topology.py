@@ -0,0 +1,284 @@
+"""Hardware Topology Module.
+
+This module builds a model of the CPU from the OS topology API: packages, NUMA
+nodes, shared-cache domains, SMT sibling sets and efficiency classes.
+
+On Windows the source is `GetLogicalProcessorInformationEx(RelationAll)`. The
+parser works on the raw buffer, so a blob recorded on one machine (see
+`read_slpi_ex`) can be replayed anywhere. All masks use global logical processor
+numbering, with processor groups laid out back to back.
+"""
+
+import functools
+import struct
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+RELATION_PROCESSOR_CORE = 0
+RELATION_NUMA_NODE = 1
+RELATION_CACHE = 2
+RELATION_PROCESSOR_PACKAGE = 3
+RELATION_GROUP = 4
+RELATION_ALL = 0xFFFF
+
+CACHE_UNIFIED = 0
+LTP_PC_SMT = 0x1
+
+class CoreInfo(NamedTuple):
+    """One physical core: its logical processors, SMT flag and efficiency class."""
+    mask: int
+    smt: bool
+    efficiency_class: int
+
+class CacheInfo(NamedTuple):
+    level: int
+    cache_type: int
+    size: int
+    mask: int
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+def _runs(mask: int) -> List[Tuple[int, int]]:
+    """Splits a mask into contiguous [start, end) runs."""
+    runs, i, start = [], 0, None
+    while mask >> i:
+        if (mask >> i) & 1:
+            if start is None: start = i
+        elif start is not None:
+            runs.append((start, i))
+            start = None
+        i += 1
+    if start is not None: runs.append((start, i))
+    return runs
+
+class CpuTopology:
+    """Parsed processor topology.
+
+    Attributes:
+        group_sizes: Active logical processors per processor group.
+        cores: One `CoreInfo` per physical core.
+        packages: Logical-processor mask per physical package.
+        numa_nodes: NUMA node number -> logical-processor mask.
+        caches: Every cache reported by the OS.
+    """
+
+    def __init__(self, group_sizes: List[int], cores: List[CoreInfo], packages: List[int],
+                 numa_nodes: Dict[int, int], caches: List[CacheInfo]):
+        self.group_sizes = group_sizes
+        self.cores = cores
+        self.packages = packages
+        self.numa_nodes = numa_nodes
+        self.caches = caches
+
+    def _key(self) -> Tuple[Any, ...]:
+        # Record order is up to the OS, so two readings of the same machine compare sorted
+        return (tuple(self.group_sizes), tuple(sorted(self.cores)), tuple(sorted(self.packages)),
+                tuple(sorted(self.numa_nodes.items())), tuple(sorted(self.caches)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CpuTopology): return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    @property
+    def logical(self) -> int:
+        return sum(self.group_sizes)
+
+    @property
+    def physical(self) -> int:
+        return len(self.cores)
+
+    @property
+    def smt(self) -> bool:
+        return any(c.smt for c in self.cores)
+
+    @property
+    def hybrid(self) -> bool:
+        return len({c.efficiency_class for c in self.cores}) > 1
+
+    @functools.cached_property
+    def performance_mask(self) -> int:
+        """Logical processors on cores of the highest efficiency class (all, if not hybrid)."""
+        top = max((c.efficiency_class for c in self.cores), default=0)
+        mask = 0
+        for c in self.cores:
+            if c.efficiency_class == top: mask |= c.mask
+        return mask
+
+    @property
+    def performance_cores(self) -> int:
+        top = max((c.efficiency_class for c in self.cores), default=0)
+        return sum(1 for c in self.cores if c.efficiency_class == top)
+
+    def siblings(self, cpu: int) -> int:
+        """Mask of the logical processors sharing a physical core with `cpu`."""
+        for c in self.cores:
+            if (c.mask >> cpu) & 1: return c.mask
+        return 1 << cpu
+
+    def efficiency_class(self, cpu: int) -> int:
+        for c in self.cores:
+            if (c.mask >> cpu) & 1: return c.efficiency_class
+        return 0
+
+    @functools.cached_property
+    def cache_domains(self) -> List[int]:
+        """Masks of the outermost shared unified caches, falling back to NUMA nodes and packages."""
+        unified = [c for c in self.caches if c.cache_type == CACHE_UNIFIED]
+        if unified:
+            top = max(c.level for c in unified)
+            domains = sorted({c.mask for c in unified if c.level == top})
+            if domains: return domains
+        if self.numa_nodes: return sorted(self.numa_nodes.values())
+        return sorted(self.packages) or [(1 << self.logical) - 1]
+
+    def placement_segments(self) -> List[Tuple[int, int]]:
+        """Contiguous [start, end) ranges that stay inside one cache/NUMA domain."""
+        segments = []
+        for domain in self.cache_domains:
+            segments.extend(_runs(domain))
+        return sorted(segments)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The summary shape used by `KernelSurgeon.get_topology_info`."""
+        return {
+            "physical": self.physical,
+            "logical": self.logical,
+            "ht": self.smt,
+            "groups": list(self.group_sizes),
+            "p_cores": self.performance_cores,
+            "p_core_indices": [i for i in range(self.logical) if (self.performance_mask >> i) & 1],
+            "packages": len(self.packages),
+            "numa_nodes": len(self.numa_nodes),
+            "cache_domains": len(self.cache_domains),
+        }
+
+# --- GetLogicalProcessorInformationEx ---
+
+def _group_masks(blob: bytes, offset: int, count: int) -> List[Tuple[int, int]]:
+    out = []
+    for i in range(max(1, count)):
+        mask, group = struct.unpack_from("<QH", blob, offset + 16 * i)
+        out.append((group, mask))
+    return out
+
+def parse_slpi_ex(blob: bytes) -> CpuTopology:
+    """Parses a SYSTEM_LOGICAL_PROCESSOR_INFORMATION_EX buffer (x64 layout).
+
+    Args:
+        blob: Raw buffer returned by `GetLogicalProcessorInformationEx(RelationAll)`.
+
+    Returns:
+        The parsed `CpuTopology`.
+    """
+    records = []
+    offset = 0
+    while offset + 8 <= len(blob):
+        relation, size = struct.unpack_from("<II", blob, offset)
+        if size < 8: raise ValueError(f"corrupt record at offset {offset}")
+        records.append((relation, offset))
+        offset += size
+
+    group_sizes: List[int] = []
+    for relation, at in records:
+        if relation == RELATION_GROUP:
+            _, active = struct.unpack_from("<HH", blob, at + 8)
+            group_sizes = [blob[at + 32 + 48 * g + 1] for g in range(active)]
+    starts = [sum(group_sizes[:g]) for g in range(len(group_sizes))]
+
+    def to_global(pairs: List[Tuple[int, int]]) -> int:
+        mask = 0
+        for group, gmask in pairs:
+            mask |= gmask << (starts[group] if group < len(starts) else 64 * group)
+        return mask
+
+    cores, packages, numa, caches = [], [], {}, []
+    for relation, at in records:
+        if relation in (RELATION_PROCESSOR_CORE, RELATION_PROCESSOR_PACKAGE):
+            flags, eff = blob[at + 8], blob[at + 9]
+            (count,) = struct.unpack_from("<H", blob, at + 30)
+            mask = to_global(_group_masks(blob, at + 32, count))
+            if relation == RELATION_PROCESSOR_CORE:
+                cores.append(CoreInfo(mask, bool(flags & LTP_PC_SMT), eff))
+            else:
+                packages.append(mask)
+        elif relation == RELATION_NUMA_NODE:
+            node, = struct.unpack_from("<I", blob, at + 8)
+            (count,) = struct.unpack_from("<H", blob, at + 30)
+            numa[node] = numa.get(node, 0) | to_global(_group_masks(blob, at + 32, count))
+        elif relation == RELATION_CACHE:
+            level, _, _, cache_size, cache_type = struct.unpack_from("<BBHII", blob, at + 8)
+            (count,) = struct.unpack_from("<H", blob, at + 38)
+            caches.append(CacheInfo(level, cache_type, cache_size, to_global(_group_masks(blob, at + 40, count))))
+
+    if not group_sizes:
+        width = max((c.mask.bit_length() for c in cores), default=0)
+        group_sizes = [min(64, width - s) for s in range(0, width, 64)]
+    return CpuTopology(group_sizes, cores, packages, numa, caches)
+
+def encode_slpi_ex(topo: CpuTopology) -> bytes:
+    """Serializes a `CpuTopology` back into the SLPI_EX layout (fixture builder)."""
+    starts = [sum(topo.group_sizes[:g]) for g in range(len(topo.group_sizes))]
+
+    def group_masks(mask: int) -> bytes:
+        out = b""
+        for g, (start, size) in enumerate(zip(starts, topo.group_sizes)):
+            gmask = (mask >> start) & ((1 << size) - 1)
+            if gmask: out += struct.pack("<QH6x", gmask, g)
+        return out
+
+    def record(relation: int, body: bytes) -> bytes:
+        body += b"\0" * (-(len(body) + 8) % 8)
+        return struct.pack("<II", relation, len(body) + 8) + body
+
+    out = b""
+    for c in topo.cores:
+        gm = group_masks(c.mask)
+        out += record(RELATION_PROCESSOR_CORE, struct.pack("<BB20xH", LTP_PC_SMT if c.smt else 0, c.efficiency_class, len(gm) // 16) + gm)
+    for node, mask in sorted(topo.numa_nodes.items()):
+        gm = group_masks(mask)
+        out += record(RELATION_NUMA_NODE, struct.pack("<I18xH", node, len(gm) // 16) + gm)
+    for c in topo.caches:
+        gm = group_masks(c.mask)
+        out += record(RELATION_CACHE, struct.pack("<BBHII18xH", c.level, 0, 64, c.size, c.cache_type, len(gm) // 16) + gm)
+    for mask in topo.packages:
+        gm = group_masks(mask)
+        out += record(RELATION_PROCESSOR_PACKAGE, struct.pack("<BB20xH", 0, 0, len(gm) // 16) + gm)
+    info = b"".join(struct.pack("<BB38xQ", size, size, (1 << size) - 1) for size in topo.group_sizes)
+    out += record(RELATION_GROUP, struct.pack("<HH20x", len(topo.group_sizes), len(topo.group_sizes)) + info)
+    return out
+
+def read_slpi_ex() -> bytes:
+    """Calls GetLogicalProcessorInformationEx(RelationAll) and returns the raw buffer."""
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    size = wintypes.DWORD(0)
+    kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, None, ctypes.byref(size))
+    buf = ctypes.create_string_buffer(size.value)
+    if not kernel32.GetLogicalProcessorInformationEx(RELATION_ALL, buf, ctypes.byref(size)):
+        raise ctypes.WinError()
+    return buf.raw[:size.value]
+
+def flat_topology(physical: int, logical: int) -> CpuTopology:
+    """A single-package, single-domain topology built from core counts alone."""
+    per_core = max(1, logical // max(1, physical))
+    cores = [CoreInfo(((1 << per_core) - 1) << (i * per_core), per_core > 1, 0) for i in range(logical // per_core)]
+    full = (1 << logical) - 1
+    groups = [min(64, logical - s) for s in range(0, logical, 64)]
+    return CpuTopology(groups, cores, [full], {0: full}, [])
+
+@functools.lru_cache(maxsize=1)
+def load_topology() -> CpuTopology:
+    """Returns the machine topology, computed once per process."""
+    try:
+        return parse_slpi_ex(read_slpi_ex())
+    except (AttributeError, OSError, ValueError, struct.error):
+        pass
+    try:
+        import psutil
+        return flat_topology(psutil.cpu_count(logical=False) or 4, psutil.cpu_count(logical=True) or 8)
+    except ImportError:
+        return flat_topology(4, 8)
@@ -0,0 +1,193 @@
+"""Span Tracing Module.
+
+This module records where the time goes (startup, scans, ticks, detection,
+mode switches) as `perf_counter_ns` spans and exports them as Chrome trace
+JSON. The output opens in chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is off unless `enable` is called. `main.py` calls it for `--trace` or
+when the RSS_SENTINEL_TRACE environment variable is set; child processes inherit
+the variable. While disabled, `span` returns a shared no-op context manager and
+`traced` functions cost one global check.
+
+While enabled, events go into an in-memory ring buffer. A background thread
+appends new events to the trace file every `flush_interval` seconds, using the
+JSON array format, whose closing bracket is optional. A crash therefore still
+leaves a readable trace.
+"""
+
+import atexit
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_ENV = "RSS_SENTINEL_TRACE"
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Ring buffer of trace events with a background file flusher.
+
+    Attributes:
+        path: Trace file the flusher appends to (None keeps events in memory only).
+        capacity: Events kept in memory.
+        dropped: Events that left the ring before the flusher wrote them.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 65536, flush_interval: float = 1.0,
+                 process_name: str = "rss-sentinel"):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.process_name = process_name
+        self.dropped = 0
+        self._events: deque = deque(maxlen=capacity)
+        self._seq = itertools.count()
+        self._written = -1
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._file = None
+        self._first = True
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Recording (hot path) ---
+
+    def complete(self, name: str, cat: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None) -> None:
+        self._events.append((next(self._seq), "X", name, cat, start_ns, end_ns - start_ns, threading.get_ident(), args))
+
+    def instant(self, name: str, cat: str = "event", args: Optional[Dict[str, Any]] = None) -> None:
+        self._events.append((next(self._seq), "i", name, cat, time.perf_counter_ns(), 0, threading.get_ident(), args))
+
+    # --- Output ---
+
+    def _to_json(self, event) -> Dict[str, Any]:
+        _, ph, name, cat, ts, dur, tid, args = event
+        out = {"name": name, "cat": cat, "ph": ph, "ts": (ts - self._origin) / 1000, "pid": self._pid, "tid": tid}
+        if ph == "X": out["dur"] = dur / 1000
+        else: out["s"] = "t"
+        if args: out["args"] = args
+        return out
+
+    def _metadata(self) -> List[Dict[str, Any]]:
+        meta = [{"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": self.process_name}}]
+        for thread in threading.enumerate():
+            meta.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": thread.ident, "args": {"name": thread.name}})
+        return meta
+
+    def events(self) -> List[Dict[str, Any]]:
+        """The buffered events as Chrome trace dicts, oldest first."""
+        return [self._to_json(e) for e in list(self._events)]
+
+    def export(self, path: str) -> int:
+        """Writes the buffered events as a complete trace file. Returns the event count."""
+        events = self.events()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self._metadata() + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def flush(self, final: bool = False) -> None:
+        """Appends events recorded since the last flush to `path` (thread names again if `final`)."""
+        if not self.path: return
+        with self._lock:
+            fresh = [e for e in list(self._events) if e[0] > self._written]
+            if fresh:
+                if fresh[0][0] > self._written + 1: self.dropped += fresh[0][0] - self._written - 1
+                self._written = fresh[-1][0]
+            records = self._metadata() if self._file is None else []
+            records += [self._to_json(e) for e in fresh]
+            if final and self._file is not None: records += self._metadata()  # Threads started after the first flush
+            if not records: return
+            if self._file is None: self._file = open(self.path, "w", encoding="utf-8")
+            chunk = ",\n".join(json.dumps(r, separators=(",", ":")) for r in records)
+            self._file.write(("[\n" if self._first else ",\n") + chunk)
+            self._first = False
+            self._file.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try: self.flush()
+            except OSError as e: print(f"[Trace] Flush error: {e}")
+
+    def start(self) -> 'Tracer':
+        if self.path and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-flush", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stops the flusher, writes what is left and terminates the JSON array."""
+        self._stop.set()
+        self.flush(final=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.write("\n]\n")
+                self._file.close()
+                self._file = None
+
+_tracer: Optional[Tracer] = None
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None: self.args = {**(self.args or {}), "error": exc_type.__name__}
+        self.tracer.complete(self.name, self.cat, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+def enable(path: Optional[str] = None, process_name: str = "rss-sentinel", **options: Any) -> Tracer:
+    """Turns tracing on for this process and flushes to `path` until exit."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path, process_name=process_name, **options).start()
+        atexit.register(_tracer.close)
+    return _tracer
+
+def tracer() -> Optional[Tracer]:
+    return _tracer
+
+def span(name: str, cat: str = "app", **args: Any):
+    """Context manager timing a block. A shared no-op while tracing is off."""
+    if _tracer is None: return _NULL_SPAN
+    return _Span(_tracer, name, cat, args or None)
+
+def instant(name: str, cat: str = "event", **args: Any) -> None:
+    """Marks a point in time (e.g. a game launch)."""
+    if _tracer is not None: _tracer.instant(name, cat, args or None)
+
+def traced(name: Optional[str] = None, cat: str = "app") -> Callable:
+    """Decorator that records every call of the function as a span."""
+    def wrap(fn: Callable) -> Callable:
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            t = _tracer
+            if t is None: return fn(*a, **kw)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*a, **kw)
+            finally:
+                t.complete(label, cat, start, time.perf_counter_ns())
+        return inner
+    return wrap
@@ -0,0 +1,42 @@
+"""Tray Icon Module.
+
+This module shows the system tray icon for the headless daemon. It loads pystray
+and Pillow only; the dashboard is started as a separate client process on demand.
+"""
+
+import subprocess
+
+import pystray
+from PIL import Image, ImageDraw
+
+from src.config import launch_command
+
+def create_tray_image(width: int, color: str = "#00ff41") -> Image.Image:
+    image = Image.new('RGB', (width, width), (0, 0, 0))
+    dc = ImageDraw.Draw(image)
+    dc.ellipse([width//4, width//4, 3*width//4, 3*width//4], outline=color, width=4)
+    return image
+
+def run_tray(autopilot) -> None:
+    """Runs the tray icon until the user exits. Blocks the calling thread."""
+    icon = None
+    forward = autopilot.on_status_update
+
+    def on_status(msg, color):
+        if forward: forward(msg, color)
+        if icon:
+            icon.title = f"RSS Sentinel: {msg}"
+            icon.icon = create_tray_image(64, color)
+
+    def open_dashboard(icon, item):
+        subprocess.Popen(launch_command("--gui"))
+
+    def on_exit(icon, item):
+        autopilot.stop()
+        icon.stop()
+
+    autopilot.on_status_update = on_status
+    menu = pystray.Menu(pystray.MenuItem("Open Dashboard", open_dashboard, default=True),
+                        pystray.MenuItem("Exit Fully", on_exit))
+    icon = pystray.Icon("RSS-Sentinel", create_tray_image(64), "RSS Sentinel Active", menu)
+    icon.run()
@@ -0,0 +1,250 @@
+"""Watchdog Module.
+
+This module runs a small separate process that restores the network if
+Sentinel dies while its settings are in effect. Without it, a crash in Gaming
+Mode leaves interrupt moderation off and RSS pinned until someone notices.
+
+Sentinel talks to the watchdog over the watchdog's stdin, one JSON object per line:
+    {"beat": 1}          heartbeat, every `interval` seconds while the main loop makes progress
+    {"arm": {plan}}      the `RollbackPlan` to run if Sentinel goes away
+    {"disarm": 1}        nothing to restore any more
+    {"exit": 1}          clean shutdown, leave the settings as they are
+End of file without "exit" means Sentinel died. The plan runs at once. No beat
+for `timeout` seconds means Sentinel hung. The watchdog kills it first, so it
+cannot wake up in the middle of a switch, and then runs the plan. Beats are sent
+from a thread of their own, but only while the autopilot loop has called
+`WatchdogClient.touch` within `stale_after` seconds, so a stuck loop goes silent
+even though the process is still alive. The loop touches between the phases of
+a switch (apply, verify, rollback, benchmark), so `stale_after` only has to
+cover the longest single phase; `stale_after_for` derives it from their timeouts.
+
+The plan is rendered in advance and the shell workers are started when it
+arrives, so nothing is spawned once Sentinel is gone. After a successful
+rollback the journal is reset. Otherwise the next start would replay an
+interrupted switch on top of the restored values.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, TextIO
+
+import psutil
+
+from src.journal import SwitchJournal
+from src.rollback import RollbackPlan, RollbackRunner
+from src.shell import CREATE_NO_WINDOW, ShellPool
+
+HEARTBEAT_INTERVAL = 0.5
+HEARTBEAT_TIMEOUT = 5.0
+HEARTBEAT_MARGIN = 15.0
+HEARTBEAT_STALE = 30.0 + HEARTBEAT_MARGIN  # A shell batch at the default timeout; see `stale_after_for`
+
+def stale_after_for(*phases: float, margin: float = HEARTBEAT_MARGIN) -> float:
+    """Seconds without a `touch` after which the loop counts as stuck.
+
+    Args:
+        phases: Worst-case durations of the steps that run between two touches.
+        margin: Slack on top of the longest one.
+    """
+    return max(phases, default=0.0) + margin
+
+# --- Watchdog process ---
+
+class Watchdog:
+    """Reads the control stream and rolls back when it ends or falls silent.
+
+    Attributes:
+        runner: Runs the armed plan.
+        timeout: Seconds without a beat before Sentinel counts as hung.
+        parent: The Sentinel process, killed when it hangs.
+        journal_path: Journal to reset after a successful rollback.
+    """
+
+    def __init__(self, stream: TextIO, runner: RollbackRunner, timeout: float = HEARTBEAT_TIMEOUT,
+                 parent: Optional[psutil.Process] = None, journal_path: Optional[str] = None):
+        self.stream = stream
+        self.runner = runner
+        self.timeout = timeout
+        self.parent = parent
+        self.journal_path = journal_path
+        self.plan: Optional[RollbackPlan] = None
+        self._last_beat = time.monotonic()
+        self._ended: Optional[str] = None
+        self._event = threading.Event()
+
+    def _read(self) -> None:
+        for line in self.stream:
+            try: msg = json.loads(line)
+            except ValueError: continue
+            self._last_beat = time.monotonic()
+            if "arm" in msg:
+                self.plan = RollbackPlan.from_dict(msg["arm"])
+                self.runner.warm(len(self.plan.scripts))
+            elif "disarm" in msg:
+                self.plan = None
+            elif "exit" in msg:
+                self._ended = "exit"
+                break
+        if self._ended is None: self._ended = "died"
+        self._event.set()
+
+    def run(self) -> str:
+        """Watches until Sentinel exits, dies or hangs. Returns "exit", "died" or "hung"."""
+        threading.Thread(target=self._read, name="watchdog-read", daemon=True).start()
+        while self._ended is None:
+            remaining = self._last_beat + self.timeout - time.monotonic()
+            if remaining <= 0:
+                self._ended = "hung"
+                break
+            self._event.wait(remaining)
+        reason = self._ended
+        if reason == "exit": return reason
+        if reason == "hung" and self.parent is not None:
+            try: self.parent.kill()
+            except psutil.Error: pass
+        plan = self.plan
+        if plan is None or plan.empty:
+            print(f"[Watchdog] Sentinel {reason}, nothing to restore")
+            return reason
+        result = self.runner.run(plan)
+        print(f"[Watchdog] Sentinel {reason}: rolled back {plan.label} ({len(plan.scripts)} adapter(s)), "
+              f"dispatched in {result.dispatched_ms:.1f} ms, done in {result.done_ms:.0f} ms"
+              + (f", failed: {', '.join(result.failed)}" if result.failed else ""))
+        if result.ok and self.journal_path:
+            try:
+                journal = SwitchJournal(self.journal_path)
+                journal.reset()
+                journal.close()
+            except OSError as e:
+                print(f"[Watchdog] Journal reset failed: {e}")
+        return reason
+
+# Stand-in shell for --dry-run: logs every script and reports success
+_DRY_RUN_SHELL = r"""
+import base64, sys
+log = open(sys.argv[1], "a", encoding="utf-8")
+for line in sys.stdin:
+    parts = line.split()
+    for part in parts[1:]: log.write(base64.b64decode(part).decode("utf-8") + "\n")
+    log.flush()
+    print(" ".join([parts[0]] + ["1:"] * (len(parts) - 1)), flush=True)
+"""
+
+def serve(parent_pid: Optional[int] = None, journal_path: Optional[str] = None, timeout: float = HEARTBEAT_TIMEOUT,
+          dry_run: Optional[str] = None, stream: Optional[TextIO] = None) -> str:
+    """Runs the watchdog on stdin until Sentinel exits, dies or hangs.
+
+    Args:
+        parent_pid: Sentinel's PID, killed if it hangs.
+        journal_path: Journal to reset after a successful rollback.
+        timeout: Seconds without a heartbeat before Sentinel counts as hung.
+        dry_run: Log file that receives the commands instead of PowerShell and the registry.
+    """
+    try: parent = psutil.Process(parent_pid) if parent_pid else None
+    except psutil.Error: parent = None
+    if dry_run:
+        def log_tcpip(values: Dict[str, int]) -> bool:
+            with open(dry_run, "a", encoding="utf-8") as f: f.write(f"Tcpip {json.dumps(values, sort_keys=True)}\n")
+            return True
+        runner = RollbackRunner(ShellPool(4, [sys.executable, "-c", _DRY_RUN_SHELL, dry_run]), log_tcpip)
+    else:
+        runner = RollbackRunner(ShellPool(4))
+    reason = Watchdog(stream or sys.stdin, runner, timeout, parent, journal_path).run()
+    runner.pool.close()
+    return reason
+
+# --- Sentinel side ---
+
+class WatchdogClient:
+    """Starts the watchdog process, keeps it fed with heartbeats and the current plan.
+
+    Attributes:
+        argv: Command line that starts the watchdog.
+        interval: Seconds between heartbeats.
+        stale_after: Seconds after the last `touch` at which heartbeats stop.
+    """
+
+    def __init__(self, argv: Sequence[str], interval: float = HEARTBEAT_INTERVAL, log_path: Optional[str] = None,
+                 stale_after: float = HEARTBEAT_STALE):
+        self.argv = list(argv)
+        self.interval = interval
+        self.log_path = log_path
+        self.stale_after = stale_after
+        self.plan: Optional[RollbackPlan] = None
+        self._touched = time.monotonic()
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._spawn()
+        threading.Thread(target=self._beat, name="watchdog-beat", daemon=True).start()
+
+    def _spawn(self) -> None:
+        log = open(self.log_path, "a", encoding="utf-8") if self.log_path else subprocess.DEVNULL
+        try:
+            # Its own process group/session, so whatever takes Sentinel down does not take the watchdog with it
+            self._proc = subprocess.Popen(
+                self.argv, stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT, text=True, encoding="utf-8",
+                creationflags=CREATE_NO_WINDOW | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0),
+                start_new_session=sys.platform != "win32")
+        finally:
+            if log is not subprocess.DEVNULL: log.close()
+
+    def _send(self, msg: Dict[str, Any]) -> None:
+        line = json.dumps(msg, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._stop.is_set() and "exit" not in msg: return
+            for attempt in range(2):
+                try:
+                    if self._proc.poll() is not None: raise OSError("watchdog exited")
+                    self._proc.stdin.write(line)
+                    self._proc.stdin.flush()
+                    return
+                except (OSError, ValueError) as e:
+                    if attempt or "exit" in msg: return
+                    print(f"[Watchdog] Restarting watchdog ({e})")
+                    self._spawn()
+                    if self.plan is not None and "arm" not in msg:
+                        self._proc.stdin.write(json.dumps({"arm": self.plan.as_dict()}) + "\n")
+
+    def touch(self) -> None:
+        """Records that the main loop made progress. Call it once per iteration."""
+        self._touched = time.monotonic()
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.interval):
+            if time.monotonic() - self._touched < self.stale_after: self._send({"beat": 1})
+
+    def arm(self, plan: RollbackPlan) -> None:
+        """Makes `plan` the one to run if Sentinel goes away."""
+        self.plan = plan
+        self._send({"arm": plan.as_dict()})
+
+    def disarm(self) -> None:
+        self.plan = None
+        self._send({"disarm": 1})
+
+    def close(self) -> None:
+        """Tells the watchdog this is a clean exit and waits for it to leave."""
+        self._stop.set()
+        self._send({"exit": 1})
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="RSS Sentinel rollback watchdog")
+    parser.add_argument("--parent", type=int, default=None, help="Sentinel PID, killed if it hangs")
+    parser.add_argument("--journal", default=None, help="Switch journal to reset after a rollback")
+    parser.add_argument("--timeout", type=float, default=HEARTBEAT_TIMEOUT)
+    parser.add_argument("--dry-run", default=None, help="Log the rollback commands to this file instead of running them")
+    args = parser.parse_args(argv)
+    serve(args.parent, args.journal, args.timeout, args.dry_run)
+
+if __name__ == "__main__":
+    main()
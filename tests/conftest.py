@@ -0,0 +1,7 @@
+"""Shared test setup: makes `src` importable when pytest runs from the project root or from tests/."""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path: sys.path.insert(0, PROJECT_ROOT)
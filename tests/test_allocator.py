@@ -0,0 +1,73 @@
+"""allocate() with synthetic adapters and topologies."""
+
+from src.allocator import AdapterDemand, Allocation, allocate, describe
+from src.gaps import GapObjective, group_segments, split_segments
+from src.topology import CacheInfo, CoreInfo, CpuTopology, flat_topology
+
+def bits(lo, hi): return ((1 << (hi - lo)) - 1) << lo
+
+def cpus(a: Allocation) -> int: return bits(a.base, a.base + a.size)
+
+def assert_disjoint(result):
+    owned = [cpus(a) for a in result.values() if not a.shared]
+    for i, m in enumerate(owned):
+        for other in owned[i + 1:]: assert m & other == 0
+
+def test_single_adapter_gets_the_largest_window():
+    result = allocate([AdapterDemand("Ethernet", 1.0)], bits(2, 16), 16)
+    assert result["Ethernet"].size == 4 and not result["Ethernet"].shared
+    assert cpus(result["Ethernet"]) & bits(0, 2) == 0
+
+def test_windows_are_split_by_weight_and_do_not_overlap():
+    result = allocate([AdapterDemand("WiFi", 1.0), AdapterDemand("10GbE", 10.0)], bits(2, 16), 16)
+    assert result["10GbE"].size == 4 and result["WiFi"].size >= 1
+    assert_disjoint(result)
+    assert not any(a.shared for a in result.values())
+
+def test_out_of_clean_cores_shares_the_least_loaded_window():
+    demands = [AdapterDemand(f"nic{i}", float(10 - i)) for i in range(4)]
+    result = allocate(demands, bits(4, 6), 8, max_per_adapter=1)
+    owners = [a for a in result.values() if not a.shared]
+    assert len(owners) == 2 and len(result) == 4
+    assert_disjoint(result)
+    shared = [name for name, a in result.items() if a.shared]
+    assert shared == ["nic2", "nic3"]
+    assert result["nic2"].base == result["nic1"].base  # The lighter of the two owners
+    assert result["nic3"].base == result["nic0"].base  # nic2 made nic1's window heavier
+
+def test_no_clean_core_means_no_allocation():
+    assert allocate([AdapterDemand("Ethernet", 1.0)], 0, 8) == {}
+    assert allocate([], bits(0, 8), 8) == {}
+
+def test_windows_stay_inside_cache_domains():
+    cores = [CoreInfo(bits(2 * i, 2 * i + 2), True, 0) for i in range(16)]
+    caches = [CacheInfo(3, 0, 1 << 25, bits(0, 16)), CacheInfo(3, 0, 1 << 25, bits(16, 32))]
+    topo = CpuTopology([32], cores, [bits(0, 32)], {0: bits(0, 32)}, caches)
+    clean = bits(2, 32) & ~bits(14, 18)  # 14-17 polluted, around the CCD boundary
+    result = allocate([AdapterDemand("a", 1.0), AdapterDemand("b", 1.0), AdapterDemand("c", 1.0)],
+                      clean, topo.logical, segments=topo.placement_segments())
+    assert_disjoint(result)
+    for a in result.values():
+        assert cpus(a) & clean == cpus(a)
+        assert any(cpus(a) & d == cpus(a) for d in topo.cache_domains)
+
+def test_hybrid_prefers_performance_cores():
+    cores = [CoreInfo(bits(2 * i, 2 * i + 2), True, 1) for i in range(4)] + [CoreInfo(1 << (8 + i), False, 0) for i in range(8)]
+    topo = CpuTopology([16], cores, [bits(0, 16)], {0: bits(0, 16)}, [])
+    clean = bits(2, 16)
+    plain = allocate([AdapterDemand("Ethernet", 1.0)], clean, 16, p_core_mask=topo.performance_mask)
+    assert plain["Ethernet"].base >= 8  # Without a P-core weight, position favours the end of the die
+    result = allocate([AdapterDemand("Ethernet", 1.0)], clean, 16, objective=GapObjective(p_core=2.0),
+                      p_core_mask=topo.performance_mask)
+    assert cpus(result["Ethernet"]) & topo.performance_mask == cpus(result["Ethernet"])
+
+def test_windows_never_cross_processor_groups():
+    topo = flat_topology(96, 96)
+    segments = split_segments(group_segments([48, 48]), topo.placement_segments())
+    clean = bits(46, 50)  # Contiguous, but straddles the group boundary
+    result = allocate([AdapterDemand("a", 1.0)], clean, 96, segments=segments)
+    assert result["a"].size == 2 and result["a"].base in (46, 48)
+
+def test_describe():
+    lines = describe({"b": Allocation(4, 2, True), "a": Allocation(2, 1, False)})
+    assert lines == ["a: cores 2", "b: cores 4-5 (shared)"]
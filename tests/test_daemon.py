@@ -0,0 +1,62 @@
+"""The autopilot measures a fresh baseline before each switch and waits for the link before the "after" burst."""
+
+import pytest
+
+import src.daemon
+from src.daemon import RSSAutopilot
+from src.procwatch import ProcessWatcher
+from src.simulator import _Clock, _NoLaunches, _SimConfig, _SimSurgeon
+
+class Surgeon(_SimSurgeon):
+    def __init__(self, events, link_up=True):
+        super().__init__(_Clock(), 0.0)
+        self.events = events
+        self.link_up = link_up
+
+    def safe_apply_mode(self, *args, **kwargs):
+        self.events.append("apply")
+        return super().safe_apply_mode(*args, **kwargs)
+
+    def check_connectivity(self):
+        self.events.append("link")
+        return self.link_up
+
+@pytest.fixture
+def autopilot(tmp_path, monkeypatch):
+    events = []
+    runs = iter(range(100))
+
+    class Bench:
+        def __init__(self, host, port=None, samples=200): pass
+
+        def run(self):
+            n = next(runs)
+            events.append(f"bench{n}")
+            return {"count": 10, "lost": 0, "loss": 0.0, "p50_us": n, "p99_us": n, "p999_us": n, "max_us": n, "mean_us": n, "jitter_us": n}
+    monkeypatch.setattr(src.daemon, "JitterBenchmark", Bench)
+
+    def make(link_up=True):
+        surgeon = Surgeon(events, link_up)
+        surgeon.data_dir = str(tmp_path)
+        config = _SimConfig({"bench_enabled": True, "bench_settle": 0.0})
+        pilot = RSSAutopilot(surgeon, config, watcher=ProcessWatcher(lambda: [], lambda pid: None), launches=_NoLaunches())
+        pilot.current_mode = "DESKTOP"
+        return pilot, events
+    return make
+
+def test_baseline_is_fresh_and_after_waits_for_the_link(autopilot):
+    pilot, events = autopilot()
+    assert pilot._switch("GAMING") and pilot._switch("DESKTOP")
+    assert events == ["bench0", "apply", "link", "bench1", "bench2", "apply", "link", "bench3"]
+    assert pilot.benchmarks["DESKTOP"]["before"]["p50_us"] == 2  # Not GAMING's "after" (1)
+
+def test_no_after_sample_while_the_link_is_down(autopilot):
+    pilot, events = autopilot(link_up=False)
+    assert pilot._switch("GAMING")
+    assert events == ["bench0", "apply", "link"]
+    assert pilot.benchmarks["GAMING"]["after"] is None
+
+def test_lossy_runs_are_not_recorded(autopilot, monkeypatch):
+    pilot, _ = autopilot()
+    monkeypatch.setattr(src.daemon.JitterBenchmark, "run", lambda self: {"count": 80, "lost": 20, "loss": 0.2})
+    assert pilot._measure() is None
@@ -0,0 +1,54 @@
+"""Discovery profiles: a warm start on unchanged hardware reports no change, a changed fact does."""
+
+import base64
+import sys
+
+from src.discovery import Discovery, FactCodec
+from src.shell import ShellPool
+from src.state import AdapterState, FakeAdapterBackend
+from src.topology import encode_slpi_ex, flat_topology, parse_slpi_ex
+
+HW_CODEC = FactCodec(lambda t: base64.b64encode(encode_slpi_ex(t)).decode("ascii"), lambda s: parse_slpi_ex(base64.b64decode(s)))
+STANDIN_SHELL = "import sys\nfor line in sys.stdin: print(line.split()[0] + ' 1:' * (len(line.split()) - 1), flush=True)"
+
+def start(path, hw, gateway="192.168.1.1"):
+    changes = []
+    discovery = Discovery({"hw": lambda: hw, "gateway_ip": lambda: gateway}, path, {"hw": HW_CODEC},
+                          on_change=lambda name, old, new: changes.append(name))
+    discovery.start()
+    discovery.wait()
+    return discovery, changes
+
+def test_topology_equality_survives_the_profile_codec():
+    topo = flat_topology(8, 16)
+    assert HW_CODEC.decode(HW_CODEC.encode(topo)) == topo
+    assert flat_topology(8, 16) != flat_topology(6, 12)
+
+def test_warm_start_on_unchanged_hardware_fires_no_change(tmp_path):
+    path = str(tmp_path / "hardware_profile.json")
+    _, cold = start(path, flat_topology(8, 16))
+    warm, changes = start(path, flat_topology(8, 16))
+    assert cold == [] and changes == []
+    assert warm.get("hw") == flat_topology(8, 16)
+
+def test_changed_hardware_fires_the_callback(tmp_path):
+    path = str(tmp_path / "hardware_profile.json")
+    start(path, flat_topology(8, 16))
+    _, changes = start(path, flat_topology(6, 12), gateway="10.0.0.1")
+    assert sorted(changes) == ["gateway_ip", "hw"]
+
+def test_surgeon_warm_start_keeps_hardware_version(tmp_path, monkeypatch):
+    from src.core import KernelSurgeon
+    monkeypatch.setattr(KernelSurgeon, "_load_hardware", lambda self: flat_topology(8, 16))
+    monkeypatch.setattr(KernelSurgeon, "scan_polluted_cores", lambda self: [0, 1])
+    versions = []
+    for _ in range(2):
+        backend = FakeAdapterBackend({"Ethernet": AdapterState(0, 8, "Closest", 8, "Enabled", 0)})
+        surgeon = KernelSurgeon(shell=ShellPool(1, [sys.executable, "-c", STANDIN_SHELL]), backend=backend, data_dir=str(tmp_path))
+        try:
+            surgeon.discovery.wait()
+            versions.append(surgeon.hardware_version)
+        finally:
+            surgeon.journal.close()
+            surgeon.shell.close()
+    assert versions == [0, 0]
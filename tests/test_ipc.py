@@ -0,0 +1,111 @@
+"""The control channel speaks JSON only, rejects requests outside the whitelist and keeps its key and socket private."""
+
+import os
+import stat
+import sys
+from multiprocessing.connection import Client
+
+import pytest
+
+from src.config import ConfigManager
+from src.ipc import ControlClient, ControlError, ControlServer, load_authkey, recv_message, send_message, validate_request
+
+KEY = b"k" * 32
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="checks POSIX permission bits")
+
+class Boom:
+    """Pickles into a call that would create a file, if anything ever unpickled it."""
+    def __init__(self, path): self.path = path
+    def __reduce__(self): return (open, (self.path, "w"))
+
+@pytest.fixture
+def server(tmp_path):
+    calls = []
+
+    def force(req):
+        calls.append(req)
+        return {"ok": True}
+    address = str(tmp_path / "ctl.sock") if sys.platform != "win32" else rf"\\.\pipe\rss-test-{os.getpid()}"
+    srv = ControlServer({"status": lambda req: {"ok": True, "status": {"mode": "DESKTOP", "window": (2, 4)}}, "force": force},
+                       address, authkey=KEY)
+    srv.start()
+    yield srv, calls
+    srv.close()
+
+def raw(server):
+    return Client(server.address, authkey=KEY)
+
+def test_client_round_trip_is_json(server):
+    srv, calls = server
+    client = ControlClient(srv.address, authkey=KEY)
+    try:
+        assert client.status() == {"mode": "DESKTOP", "window": [2, 4]}  # Tuples arrive as JSON arrays
+        client.force("GAMING")
+        assert calls == [{"cmd": "force", "mode": "GAMING"}]
+    finally:
+        client.close()
+
+def test_pickled_request_is_never_unpickled(server, tmp_path):
+    srv, calls = server
+    marker = tmp_path / "pwned"
+    conn = raw(srv)
+    try:
+        conn.send(Boom(str(marker)))  # Connection.send pickles
+        reply = recv_message(conn)
+    finally:
+        conn.close()
+    assert not reply["ok"] and "bad request" in reply["error"]
+    assert not marker.exists() and calls == []
+
+@pytest.mark.parametrize("request_, error", [
+    ({"cmd": "exec", "code": "1"}, "unknown command"),
+    ({"cmd": "force"}, "takes ['mode']"),
+    ({"cmd": "force", "mode": "GAMING", "extra": 1}, "takes ['mode']"),
+    ({"cmd": "force", "mode": "TURBO"}, "invalid mode"),
+    ({"cmd": "autostart", "enable": "yes"}, "invalid enable"),
+    (["status"], "not an object"),
+])
+def test_requests_outside_the_whitelist_are_rejected(server, request_, error):
+    srv, calls = server
+    conn = raw(srv)
+    try:
+        send_message(conn, request_)
+        reply = recv_message(conn)
+        send_message(conn, {"cmd": "status"})  # The connection stays usable
+        assert recv_message(conn)["ok"]
+    finally:
+        conn.close()
+    assert not reply["ok"] and error in reply["error"] and calls == []
+
+def test_whitelisted_command_without_a_handler_is_unsupported(server):
+    srv, _ = server
+    client = ControlClient(srv.address, authkey=KEY)
+    try:
+        with pytest.raises(ControlError, match="unsupported"): client.call("stop")
+    finally:
+        client.close()
+
+def test_validate_request_returns_the_command():
+    assert validate_request({"cmd": "set_config", "values": {"manual_mode": True}}) == "set_config"
+    assert validate_request({"cmd": "force", "mode": None}) == "force"
+
+def test_config_check_rejects_unknown_keys_and_wrong_types():
+    ConfigManager.check({"manual_mode": True, "probe_deadline": 3, "games_list": ["cs2.exe"]})
+    with pytest.raises(ValueError, match="unknown setting"): ConfigManager.check({"shell": "calc.exe"})
+    with pytest.raises(ValueError, match="manual_base"): ConfigManager.check({"manual_base": True})
+    with pytest.raises(ValueError, match="manual_mode"): ConfigManager.check({"manual_mode": 1})
+
+@posix_only
+def test_key_file_and_socket_are_owner_only(tmp_path, server):
+    path = str(tmp_path / "ipc.key")
+    with open(path, "wb") as f: f.write(b"x" * 32)
+    os.chmod(path, 0o644)  # Left readable by an older version
+    assert load_authkey(path, create=True) == b"x" * 32  # Kept, so running clients still connect
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    fresh = str(tmp_path / "new.key")
+    assert len(load_authkey(fresh, create=True)) == 32 and stat.S_IMODE(os.stat(fresh).st_mode) == 0o600
+    srv, _ = server
+    assert stat.S_IMODE(os.stat(srv.address).st_mode) == 0o600
+
+def test_client_without_a_key_reports_the_daemon_missing(tmp_path):
+    with pytest.raises(ControlError, match="not running"): load_authkey(str(tmp_path / "missing.key"))
@@ -0,0 +1,71 @@
+"""AffinityScanner over a synthetic 100k-key Enum tree, through the RegistryAccess interface."""
+
+import pytest
+
+from src.irqscan import ENUM_ROOT, POLICY_KEY, POLICY_VALUE, AffinityScanner, build_synthetic_tree, mask_of
+
+def expected_mask(reg):
+    mask = 0
+    for path, (_, _, values) in reg.keys.items():
+        if path.endswith(POLICY_KEY): mask |= mask_of(values.get(POLICY_VALUE))
+    return mask
+
+@pytest.fixture(scope="module")
+def tree():
+    return build_synthetic_tree(100_000)
+
+def test_cold_scan_finds_every_override(tree, tmp_path):
+    assert len(tree.keys) >= 100_000
+    scanner = AffinityScanner(tree, str(tmp_path / "cache.json"))
+    mask = scanner.scan()
+    assert mask == expected_mask(tree) and mask != 0
+    under_root = sum(1 for k in tree.keys if k == ENUM_ROOT or k.startswith(ENUM_ROOT + "\\"))
+    assert scanner.keys_seen == under_root and scanner.keys_read == under_root
+
+def test_warm_scan_reads_nothing_and_survives_restart(tree, tmp_path):
+    cache = str(tmp_path / "cache.json")
+    cold = AffinityScanner(tree, cache).scan()
+    restarted = AffinityScanner(tree, cache)
+    assert restarted.scan() == cold
+    assert restarted.keys_read == 1  # Only the root, to list the subtrees
+
+def test_changed_keys_are_re_read(tree, tmp_path):
+    scanner = AffinityScanner(tree, str(tmp_path / "cache.json"))
+    scanner.scan()
+    inst = f"{ENUM_ROOT}\\PCI\\DEV_99999\\999999"
+    tree.add(inst + "\\Device Parameters\\Interrupt Management\\" + POLICY_KEY, {POLICY_VALUE: (1 << 200).to_bytes(32, "little")})
+    try:
+        mask = scanner.scan()
+        assert mask >> 200 & 1 and mask == expected_mask(tree)
+        assert 1 < scanner.keys_read < 20
+    finally:
+        _remove(tree, inst)
+    assert not scanner.scan() >> 200 & 1
+
+def test_small_changes_are_not_persisted_until_they_add_up(tree, tmp_path):
+    cache = tmp_path / "cache.json"
+    scanner = AffinityScanner(tree, str(cache))
+    cold = scanner.scan()
+    written = cache.stat().st_mtime_ns
+    changed = sorted(tree.keys)[1000:1010]
+    for path in changed: tree.touch(path)
+    assert scanner.scan() == cold and scanner.keys_read == 11
+    assert cache.stat().st_mtime_ns == written  # Ten keys are cheaper to re-read than the cache is to rewrite
+    restarted = AffinityScanner(tree, str(cache))
+    assert restarted.scan() == cold and restarted.keys_read == 11  # The outdated entries are plain misses
+
+def _remove(reg, path):
+    for key in [k for k in reg.keys if k == path or k.startswith(path + "\\")]: del reg.keys[key]
+    parent, _, name = path.rpartition("\\")
+    reg.keys[parent][1].remove(name)
+    reg.touch(parent)
+
+def test_missing_root_and_bad_cache(tmp_path):
+    from src.irqscan import SyntheticRegistry
+    cache = tmp_path / "cache.json"
+    cache.write_text("{not json")
+    assert AffinityScanner(SyntheticRegistry(), str(cache)).scan() == 0
+
+def test_mask_of_decodes_values():
+    assert mask_of(b"\x01\x02") == 0x0201
+    assert mask_of(12) == 12 and mask_of(None) == 0 and mask_of("x") == 0
@@ -0,0 +1,74 @@
+"""JitterBenchmark against a local UDP echo responder: only real echoes count, loss is reported and probes are paced."""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from src.jitter import JitterBenchmark, LatencyHistogram, format_summary, summarize
+
+class Responder:
+    """Echoes datagrams on localhost, skipping every `drop_every`-th one if set."""
+
+    def __init__(self, drop_every=0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.drop_every = drop_every
+        self.arrivals = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try: data, addr = self.sock.recvfrom(64)
+            except OSError: continue
+            self.arrivals.append(time.perf_counter())
+            if self.drop_every and len(self.arrivals) % self.drop_every == 0: continue
+            self.sock.sendto(data, addr)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+@pytest.fixture
+def responder():
+    servers = []
+
+    def make(**kwargs):
+        servers.append(Responder(**kwargs))
+        return servers[-1]
+    yield make
+    for server in servers: server.close()
+
+def test_echoes_are_measured_without_loss(responder):
+    server = responder()
+    summary = JitterBenchmark("127.0.0.1", server.port, samples=20, interval=0.005).run()
+    assert summary["count"] == 20 and summary["lost"] == 0 and summary["loss"] == 0.0
+    assert 0 < summary["p50_us"] <= summary["max_us"]
+
+def test_probes_are_paced(responder):
+    server = responder()
+    JitterBenchmark("127.0.0.1", server.port, samples=10, interval=0.02).run()
+    gaps = [b - a for a, b in zip(server.arrivals, server.arrivals[1:])]
+    assert len(gaps) == 9 and min(gaps) >= 0.015
+
+def test_unanswered_probes_are_reported_as_loss(responder):
+    server = responder(drop_every=4)
+    summary = JitterBenchmark("127.0.0.1", server.port, samples=20, interval=0.002, timeout=0.02).run()
+    assert (summary["count"], summary["lost"], summary["loss"]) == (15, 5, 0.25)
+    assert "5 lost, 25.0%" in format_summary(summary)
+
+def test_a_closed_port_is_all_loss():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    summary = JitterBenchmark("127.0.0.1", port, samples=10, interval=0.001, timeout=0.02).run()
+    assert summary["count"] == 0 and summary["loss"] == 1.0  # A port unreachable is not an echo
+
+def test_summary_of_an_empty_run_has_no_loss():
+    assert summarize(LatencyHistogram())["loss"] == 0.0
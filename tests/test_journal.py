@@ -0,0 +1,108 @@
+"""SwitchJournal on disk, and KernelSurgeon recovering an interrupted switch with a fake backend."""
+
+import sys
+
+import pytest
+
+from src.journal import SwitchJournal
+from src.shell import ShellPool
+from src.state import AdapterState, ApplyPlan, FakeAdapterBackend, StateReconciler
+
+ORIGINAL = AdapterState(0, 8, "Closest", 8, "Enabled", 0)
+GAMING = AdapterState(2, 4, "NUMAStatic", 4, "Disabled", 0)
+
+def begin_gaming(journal, rec):
+    plan = rec.diff({"Ethernet": GAMING}, {"MaxNumRSSQueues": 4})
+    return journal.begin("GAMING", plan), plan
+
+@pytest.fixture
+def setup(tmp_path):
+    backend = FakeAdapterBackend({"Ethernet": ORIGINAL}, {"ReceiveSideScaling": 1, "EnableTCPA": 1, "MaxNumRSSQueues": 8})
+    return str(tmp_path / "network_journal.log"), backend, StateReconciler(backend)
+
+def test_open_switch_survives_a_restart(setup):
+    path, backend, rec = setup
+    journal = SwitchJournal(path)
+    seq, plan = begin_gaming(journal, rec)
+    rec.execute(plan)
+    journal.close()  # The process dies here, before commit
+
+    reopened = SwitchJournal(path)
+    pending = reopened.pending()
+    assert pending is not None and pending[:2] == (seq, "GAMING")
+    assert pending[2].adapters == {"Ethernet": {"base_proc": 0, "max_procs": 8, "profile": "Closest", "queues": 8, "interrupt_mod": "Enabled"}}
+    assert pending[2].tcpip == {"MaxNumRSSQueues": 8}
+    reopened.commit(seq)
+    assert SwitchJournal(path).pending() is None
+
+def test_originals_keep_the_first_value_seen(setup):
+    path, backend, rec = setup
+    journal = SwitchJournal(path)
+    seq, plan = begin_gaming(journal, rec)
+    rec.execute(plan)
+    journal.commit(seq)
+    plan = rec.diff({"Ethernet": AdapterState(queues=2)})
+    seq = journal.begin("DESKTOP", plan)
+    rec.execute(plan)
+    journal.commit(seq)
+    originals = SwitchJournal(path).originals()
+    assert originals.adapters["Ethernet"]["queues"] == 8 and originals.tcpip == {"MaxNumRSSQueues": 8}
+
+def test_torn_last_line_is_dropped(setup):
+    path, backend, rec = setup
+    journal = SwitchJournal(path)
+    seq, _ = begin_gaming(journal, rec)
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f: f.write('{"c": ' + str(seq))  # Crash mid-write
+    reopened = SwitchJournal(path)
+    assert reopened.pending()[0] == seq
+    reopened.commit(seq)
+    assert SwitchJournal(path).pending() is None
+
+def test_compaction_keeps_live_state(setup):
+    path, backend, rec = setup
+    journal = SwitchJournal(path, compact_after=8)
+    for _ in range(20):
+        seq, plan = begin_gaming(journal, rec)
+        journal.commit(seq)
+    open_seq, _ = begin_gaming(journal, rec)
+    journal.close()
+    with open(path, encoding="utf-8") as f: assert len(f.read().splitlines()) < 10
+    reopened = SwitchJournal(path)
+    assert reopened.pending()[0] == open_seq and reopened.originals().tcpip == {"MaxNumRSSQueues": 8}
+
+def test_reset_forgets_everything(setup):
+    path, backend, rec = setup
+    journal = SwitchJournal(path)
+    begin_gaming(journal, rec)
+    journal.reset()
+    reopened = SwitchJournal(path)
+    assert reopened.pending() is None and reopened.originals().empty
+
+STANDIN_SHELL = "import sys\nfor line in sys.stdin: print(line.split()[0] + ' 1:' * (len(line.split()) - 1), flush=True)"
+
+def test_surgeon_recovers_interrupted_switch_on_start(setup, tmp_path):
+    from src.core import KernelSurgeon
+    path, backend, rec = setup
+    journal = SwitchJournal(path)
+    seq, plan = begin_gaming(journal, rec)
+    rec.execute(plan)
+    journal.close()
+    assert backend.adapters["Ethernet"] == GAMING
+
+    backend.calls.clear()
+    surgeon = KernelSurgeon(shell=ShellPool(1, [sys.executable, "-c", STANDIN_SHELL]), backend=backend, data_dir=str(tmp_path))
+    try:
+        assert backend.adapters["Ethernet"] == ORIGINAL and backend.tcpip["MaxNumRSSQueues"] == 8
+        assert surgeon.journal.pending() is None
+        assert not surgeon.recover_interrupted_switch()  # Nothing left to do
+        assert surgeon.restore_network_config()  # Originals are still known until restored
+        assert surgeon.journal.originals().empty
+    finally:
+        surgeon.journal.close()
+        surgeon.shell.close()
+
+def test_undo_plan_matches_inverse():
+    plan = ApplyPlan({"A": {"queues": 4}}, {"A": {"queues": 8}}, {"MaxNumRSSQueues": 4}, {"MaxNumRSSQueues": None})
+    undo = plan.inverse()
+    assert undo.adapters == {"A": {"queues": 8}} and undo.tcpip == {}  # Unknown previous values are skipped
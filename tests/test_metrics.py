@@ -0,0 +1,70 @@
+"""Metrics render valid Prometheus text and a local scraper reads back what was recorded."""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.metrics import CONTENT_TYPE, MetricsServer, Registry, parse_exposition, scrape
+
+@pytest.fixture
+def registry():
+    reg = Registry()
+    reg.counter("rss_switches_total", "Mode switches.", ("mode",)).inc(mode="GAMING")
+    reg.gauge("rss_mode", "Current mode.").set(1)
+    lat = reg.histogram("rss_apply_duration_seconds", "Apply time.", ("mode",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 3.0): lat.observe(v, mode="GAMING")
+    return reg
+
+@pytest.fixture
+def server(registry):
+    srv = MetricsServer(registry, port=0).start()
+    yield srv
+    srv.close()
+
+def url(server, path="/metrics"):
+    return f"http://{server.address[0]}:{server.address[1]}{path}"
+
+def test_exposition_has_help_type_and_samples(registry):
+    text = registry.render()
+    assert "# HELP rss_mode Current mode.\n# TYPE rss_mode gauge\nrss_mode 1\n" in text
+    assert "# TYPE rss_switches_total counter\n" in text
+    assert 'rss_switches_total{mode="GAMING"} 1\n' in text
+    assert "# TYPE rss_apply_duration_seconds histogram\n" in text
+
+def test_histogram_buckets_are_cumulative(registry):
+    samples = parse_exposition(registry.render())
+    bucket = lambda le: samples[("rss_apply_duration_seconds_bucket", (("le", le), ("mode", "GAMING")))]
+    assert (bucket("0.1"), bucket("1"), bucket("+Inf")) == (1, 2, 3)
+    assert samples[("rss_apply_duration_seconds_count", (("mode", "GAMING"),))] == 3
+    assert samples[("rss_apply_duration_seconds_sum", (("mode", "GAMING"),))] == pytest.approx(3.55)
+
+def test_label_values_are_escaped_and_parsed_back():
+    reg = Registry()
+    reg.counter("odd_total", "Odd labels.", ("name",)).inc(name='a "b"\\c')
+    assert 'odd_total{name="a \\"b\\"\\\\c"} 1' in reg.render()
+    assert parse_exposition(reg.render())[("odd_total", (("name", 'a "b"\\c'),))] == 1
+
+def test_wrong_labels_and_conflicting_kinds_are_rejected(registry):
+    with pytest.raises(ValueError): registry.counter("rss_switches_total", "Mode switches.", ("mode",)).inc(adapter="x")
+    with pytest.raises(ValueError): registry.gauge("rss_switches_total", "Now a gauge.")
+    assert registry.counter("rss_switches_total", "Mode switches.", ("mode",)).value(mode="GAMING") == 1
+
+def test_scrape_reads_the_live_registry(registry, server):
+    samples = scrape(url(server))
+    assert samples == parse_exposition(registry.render())
+    registry.counter("rss_switches_total", "Mode switches.", ("mode",)).inc(mode="GAMING")
+    assert scrape(url(server))[("rss_switches_total", (("mode", "GAMING"),))] == 2
+
+def test_server_sends_the_exposition_content_type(server):
+    with urllib.request.urlopen(url(server), timeout=2) as response:
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+
+def test_server_answers_404_off_the_metrics_path(server):
+    with pytest.raises(urllib.error.HTTPError) as e: urllib.request.urlopen(url(server, "/"), timeout=2)
+    assert e.value.code == 404
+
+def test_snapshot_writes_the_exposition(registry, tmp_path):
+    path = str(tmp_path / "metrics.prom")
+    registry.snapshot(path)
+    with open(path, encoding="utf-8") as f: assert f.read() == registry.render()
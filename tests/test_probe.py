@@ -0,0 +1,91 @@
+"""ConnectivityProbe against local TCP and UDP servers."""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from src.probe import ConnectivityProbe
+
+class UdpEcho:
+    """Binds a UDP port on localhost and echoes datagrams once `answering` is set."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.answering = threading.Event()
+        self.received = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try: data, addr = self.sock.recvfrom(64)
+            except OSError: continue
+            self.received += 1
+            if self.answering.is_set(): self.sock.sendto(data, addr)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+@pytest.fixture
+def udp():
+    server = UdpEcho()
+    yield server
+    server.close()
+
+def udp_probe(port, **kw):
+    return ConnectivityProbe("127.0.0.1", tcp_ports=(), udp_port=port, use_icmp=False, timeout=0.1, **kw)
+
+def test_tcp_listener_answers():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        probe = ConnectivityProbe("127.0.0.1", tcp_ports=(listener.getsockname()[1],), udp_port=None, use_icmp=False)
+        result = probe.verify()
+    assert result.ok and result.method.startswith("tcp/") and result.attempts == 1
+
+def test_refused_tcp_port_counts_as_reachable():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed = s.getsockname()[1]
+    result = ConnectivityProbe("127.0.0.1", tcp_ports=(closed,), udp_port=None, use_icmp=False).verify()
+    assert result.ok and result.method == f"tcp/{closed}"
+
+def test_udp_echo_answers(udp):
+    udp.answering.set()
+    result = udp_probe(udp.port).verify()
+    assert result.ok and result.method == "udp"
+
+def test_silent_host_fails_after_deadline_and_failures(udp):
+    result = udp_probe(udp.port, deadline=0.4, max_failures=3).verify()
+    assert not result.ok and result.method is None
+    assert result.failures >= 3 and result.elapsed_ms >= 400
+    assert udp.received >= 3
+
+def test_recovers_as_soon_as_the_host_answers(udp):
+    threading.Timer(0.3, udp.answering.set).start()
+    t0 = time.perf_counter()
+    result = udp_probe(udp.port, deadline=5.0).verify()
+    assert result.ok and result.failures >= 1
+    assert time.perf_counter() - t0 < 1.5  # Backoff is capped well below the deadline
+
+def test_last_winning_method_is_tried_first(udp):
+    udp.answering.set()
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        probe = ConnectivityProbe("127.0.0.1", tcp_ports=(listener.getsockname()[1],), udp_port=udp.port, use_icmp=False)
+        assert probe.probe_once().startswith("tcp/")
+        probe._last_method = "udp"
+        assert probe.probe_once() == "udp"
+
+def test_source_address_is_bound(udp):
+    udp.answering.set()
+    assert udp_probe(udp.port, source="127.0.0.1").verify().ok
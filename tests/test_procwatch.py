@@ -0,0 +1,112 @@
+"""ProcessWatcher against a fake process table, including PID reuse."""
+
+from collections import namedtuple
+
+import psutil
+
+from src.matcher import GameMatcher
+from src.procwatch import ProcessWatcher
+
+_CpuTimes = namedtuple("_CpuTimes", "user system")
+
+class FakeProcess:
+    checks = 0
+
+    def __init__(self, pid, name, cpu=0.0):
+        self.pid, self._name, self.cpu, self.alive = pid, name, cpu, True
+
+    def name(self): return self._name
+    def exe(self): return f"C:\\Games\\{self._name}"
+    def create_time(self): return 0.0
+    def cpu_times(self): return _CpuTimes(self.cpu, 0.0)
+
+    def is_running(self):
+        FakeProcess.checks += 1
+        if self.pid < 0: raise psutil.AccessDenied(self.pid)
+        return self.alive
+
+class FakeTable:
+    def __init__(self): self.procs = {}
+
+    def start(self, pid, name, cpu=0.0):
+        old = self.procs.get(pid)
+        if old is not None: old.alive = False
+        self.procs[pid] = FakeProcess(pid, name, cpu)
+
+    def stop(self, pid): self.procs.pop(pid).alive = False
+
+    def lookup(self, pid):
+        if pid not in self.procs: raise psutil.NoSuchProcess(pid)
+        return self.procs[pid]
+
+def make(sweep=32):
+    table = FakeTable()
+    clock = [0.0]
+    watcher = ProcessWatcher(lambda: list(table.procs), table.lookup, lambda: clock[0], sweep=sweep)
+    watcher.set_matcher(GameMatcher(["cs2.exe"]))
+    return table, watcher, clock
+
+def test_only_changes_are_reported():
+    table, watcher, _ = make()
+    table.start(4, "explorer.exe")
+    table.start(8, "CS2.exe")
+    assert watcher.tick() == ({4, 8}, set())
+    assert watcher.game_pids() == [8] and watcher.name_of(8) == "cs2.exe"
+    assert watcher.tick() == (set(), set())
+    table.stop(8)
+    assert watcher.tick() == (set(), {8})
+    assert watcher.game_pids() == []
+
+def test_reused_pid_is_reclassified():
+    table, watcher, _ = make()
+    table.start(8, "cs2.exe")
+    watcher.tick()
+    table.start(8, "notepad.exe")  # Exits and the PID is handed out again between ticks
+    assert watcher.tick() == ({8}, {8})
+    assert watcher.name_of(8) == "notepad.exe" and watcher.game_pids() == []
+    table.start(8, "cs2.exe")
+    watcher.tick()
+    assert watcher.game_pids() == [8]
+
+def test_reuse_checks_cover_games_and_a_bounded_sweep():
+    table, watcher, _ = make(sweep=2)
+    table.start(8, "cs2.exe")
+    for pid in range(100, 120, 4): table.start(pid, "svc.exe")
+    watcher.tick()
+    FakeProcess.checks = 0
+    watcher.tick()
+    assert FakeProcess.checks == 1 + 2  # The game plus two others, not all six
+
+def test_reused_non_game_pid_is_caught_by_the_sweep():
+    table, watcher, _ = make(sweep=1)
+    for pid in (4, 12, 16): table.start(pid, "svc.exe")
+    watcher.tick()
+    table.start(12, "cs2.exe")  # A game lands on a PID that was not a game
+    for _ in range(3): watcher.tick()
+    assert watcher.game_pids() == [12] and watcher.name_of(12) == "cs2.exe"
+
+def test_name_of_a_reused_pid_is_unknown_until_the_next_check():
+    table, watcher, _ = make(sweep=0)
+    table.start(4, "svc.exe")
+    watcher.tick()
+    table.start(4, "other.exe")
+    assert watcher.name_of(4) is None
+
+def test_vanished_process_is_skipped():
+    table, watcher, _ = make()
+    table.start(4, "cs2.exe")
+    watcher.process_factory = lambda pid: (_ for _ in ()).throw(psutil.NoSuchProcess(pid))
+    assert watcher.tick() == (set(), set())
+    assert len(watcher) == 0
+
+def test_active_game_uses_cpu_deltas():
+    table, watcher, clock = make()
+    table.start(8, "cs2.exe", cpu=0.0)
+    watcher.tick()
+    watcher.active_game(5.0)
+    clock[0] = 1.0
+    table.procs[8].cpu = 0.5  # Half a core over the last second
+    assert watcher.active_game(5.0) == "cs2.exe"
+    assert watcher.game_usage() == [(8, "cs2.exe", 50.0)]
+    clock[0] = 2.0
+    assert watcher.active_game(5.0) is None
@@ -0,0 +1,141 @@
+"""ShellWorker and ShellPool against a Python stand-in that speaks the framed protocol."""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from src.shell import ShellError, ShellPool, ShellTimeout, ShellWorker
+
+# Executes each script as Python and replies "<id> <ok>:<b64 stdout> ...".
+# A few magic scripts drive the failure paths:
+#   CRASH <path>   exits mid-request unless <path> exists (creates it first, so only the first attempt crashes)
+#   HANG           never replies
+#   STALE          sends banner noise and a reply with another id before the real one
+#   MALFORMED      replies with one result too few
+STANDIN = r"""
+import base64, contextlib, io, os, sys, time
+for line in sys.stdin:
+    parts = line.rstrip("\n").split(" ")
+    out = [parts[0]]
+    for part in parts[1:]:
+        code = base64.b64decode(part).decode("utf-8")
+        if code.startswith("CRASH "):
+            marker = code.split(" ", 1)[1]
+            if not os.path.exists(marker):
+                open(marker, "w").close()
+                os._exit(3)
+            code = "print('survived')"
+        if code == "HANG": time.sleep(60)
+        if code == "STALE":
+            print("Windows PowerShell banner noise", flush=True)
+            print("999999 1:" + base64.b64encode(b"stale").decode(), flush=True)
+            code = "print('fresh')"
+        if code == "MALFORMED":
+            out = [parts[0]]
+            break
+        buf, ok = io.StringIO(), 1
+        try:
+            with contextlib.redirect_stdout(buf): exec(code, {})
+        except Exception as e:
+            buf.write(repr(e))
+            ok = 0
+        out.append(f"{ok}:" + base64.b64encode(buf.getvalue().encode("utf-8")).decode("ascii"))
+    print(" ".join(out), flush=True)
+"""
+
+ARGV = [sys.executable, "-c", STANDIN]
+
+@pytest.fixture
+def worker():
+    w = ShellWorker(ARGV, timeout=10)
+    yield w
+    w.close()
+
+def test_batch_returns_one_result_per_script_in_order(worker):
+    results = worker.run_batch(["print('a')", "raise ValueError('boom')", "print('ü ' * 3)"])
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].output == "a\n"
+    assert "boom" in results[1].output
+    assert results[2].output == "ü ü ü \n"
+    assert worker.spawns == 1
+
+def test_worker_is_reused_across_requests(worker):
+    for i in range(5): assert worker.run(f"print({i})").output == f"{i}\n"
+    assert worker.spawns == 1
+
+def test_empty_batch_does_not_spawn(worker):
+    assert worker.run_batch([]) == []
+    assert worker.spawns == 0
+
+def test_stale_reply_ids_and_noise_are_skipped(worker):
+    result = worker.run("STALE")
+    assert result == (True, "fresh\n")
+    assert worker.run("print('next')").output == "next\n"
+
+def test_timeout_kills_worker_and_is_not_retried(worker):
+    worker.warm()
+    t0 = time.monotonic()
+    with pytest.raises(ShellTimeout):
+        worker.run_batch(["HANG"], timeout=0.5)
+    assert time.monotonic() - t0 < 5
+    assert not worker.alive and worker.spawns == 1
+    assert worker.run("print('back')").output == "back\n"
+    assert worker.spawns == 2
+
+def test_crash_mid_request_is_not_retried(worker, tmp_path):
+    log = tmp_path / "ran"
+    with pytest.raises(ShellError, match="exited"):
+        worker.run_batch([f"open({str(log)!r}, 'a').write('x')", f"CRASH {tmp_path / 'm'}"])
+    assert log.read_text() == "x" and worker.spawns == 1  # The side effect happened once
+    assert worker.run("print('back')").output == "back\n"
+    assert worker.spawns == 2
+
+def test_worker_gone_before_the_send_is_respawned_and_retried(worker):
+    worker.warm()
+    worker._proc.stdin.close()  # The frame cannot be written
+    assert worker.run("print('retried')").output == "retried\n"
+    assert worker.spawns == 2
+
+def test_malformed_reply_kills_the_worker(worker):
+    with pytest.raises(ShellError, match="malformed"):
+        worker.run_batch(["print(1)", "MALFORMED"])
+    assert not worker.alive
+    assert worker.run("print('next')").output == "next\n"
+    assert worker.spawns == 2
+
+def test_pool_runs_batches_concurrently():
+    pool = ShellPool(3, ARGV, timeout=10)
+    try:
+        pool.warm()
+        results = [None] * 3
+        def call(i): results[i] = pool.run_batch(["import time; time.sleep(0.5)", f"print({i})"])
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+        t0 = time.monotonic()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert time.monotonic() - t0 < 1.4
+        assert [r[1].output for r in results] == ["0\n", "1\n", "2\n"]
+    finally:
+        pool.close()
+
+def test_pool_warm_starts_the_workers_handed_out_next():
+    pool = ShellPool(4, ARGV, timeout=10)
+    try:
+        pool.warm(1)
+        worker = pool._idle.get()
+        assert worker.alive
+        pool._idle.put(worker)
+        pool.run("print(1)")
+        assert sum(w.spawns for w in pool._workers) == 1
+    finally:
+        pool.close()
+
+def test_pool_recovers_from_a_worker_timeout():
+    pool = ShellPool(1, ARGV, timeout=10)
+    try:
+        with pytest.raises(ShellTimeout): pool.run("HANG", timeout=0.3)
+        assert pool.run("print('ok')").output == "ok\n"
+    finally:
+        pool.close()
@@ -0,0 +1,28 @@
+"""The policy simulator replays traces through the real autopilot on any OS."""
+
+from src.simulator import Activity, PolicyParams, grid, load_trace, run, save_trace, synthetic_trace
+
+def test_game_session_switches_once_each_way():
+    trace = [Activity(0.0, 100, "explorer.exe", 1.0), Activity(60.0, 200, "cs2.exe", 80.0), Activity(1260.0, 200, "cs2.exe", None)]
+    report = run(trace, PolicyParams(hysteresis=60, launch_events=False), duration=1800.0)
+    assert report.switches == 2 and report.flaps == 0
+    assert 0 < report.late_s <= 10  # One or two ticks plus the apply cost
+    assert 60 <= report.linger_s <= 70  # The hysteresis
+
+def test_launch_events_cut_the_detection_delay():
+    trace = [Activity(0.0, 200, "cs2.exe", 80.0)]
+    polled = run(trace, PolicyParams(launch_events=False), duration=600.0)
+    evented = run(trace, PolicyParams(launch_events=True), duration=600.0)
+    assert evented.late_s < polled.late_s
+
+def test_synthetic_day_and_trace_round_trip(tmp_path):
+    trace = synthetic_trace(hours=2, seed=1)
+    path = str(tmp_path / "trace.jsonl")
+    save_trace(trace, path)
+    assert load_trace(path) == trace
+    report = run(trace)
+    assert report.ticks > 3000 and report.switches >= 2
+
+def test_grid_expands_every_combination():
+    params = grid(hysteresis=[30, 60], tick=[1.0, 2.0])
+    assert len(params) == 4 and {(p.hysteresis, p.tick) for p in params} == {(30, 1.0), (30, 2.0), (60, 1.0), (60, 2.0)}
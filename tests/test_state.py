@@ -0,0 +1,85 @@
+"""StateReconciler against the in-memory FakeAdapterBackend."""
+
+from src.state import AdapterState, ApplyPlan, FakeAdapterBackend, StateReconciler, normalize_im
+
+GAMING = {"Ethernet": AdapterState(2, 4, "Closest", 4, "Disabled", 0), "WiFi": AdapterState(6, 2, "Closest", 2, "Disabled", 0)}
+TCPIP = {"ReceiveSideScaling": 1, "EnableTCPA": 1, "MaxNumRSSQueues": 4}
+
+def make():
+    backend = FakeAdapterBackend(
+        {"Ethernet": AdapterState(0, 8, "Closest", 8, "Enabled", 0), "WiFi": AdapterState(0, 8, "Closest", 2, "Enabled", 0)},
+        {"ReceiveSideScaling": 1, "EnableTCPA": 0, "MaxNumRSSQueues": 8})
+    return backend, StateReconciler(backend)
+
+def writes(backend):
+    return [c for c in backend.calls if c[0] in ("set_adapter", "write_tcpip")]
+
+def test_apply_pushes_only_differing_parameters():
+    backend, rec = make()
+    plan, ok = rec.apply(GAMING, TCPIP)
+    assert ok
+    assert plan.adapters == {"Ethernet": {"base_proc": 2, "max_procs": 4, "queues": 4, "interrupt_mod": "Disabled"},
+                             "WiFi": {"base_proc": 6, "max_procs": 2, "interrupt_mod": "Disabled"}}
+    assert plan.tcpip == {"EnableTCPA": 1, "MaxNumRSSQueues": 4}
+    assert sorted(c[1] for c in writes(backend) if c[0] == "set_adapter") == ["Ethernet", "WiFi"]
+    assert backend.adapters["Ethernet"] == GAMING["Ethernet"]
+
+def test_apply_twice_is_a_no_op():
+    backend, rec = make()
+    rec.apply(GAMING, TCPIP)
+    backend.calls.clear()
+    plan, ok = rec.apply(GAMING, TCPIP)
+    assert ok and plan.empty
+    assert backend.calls == []  # Not even a read: the cache already knows
+
+def test_dont_care_fields_are_left_alone():
+    backend, rec = make()
+    plan = rec.diff({"Ethernet": AdapterState(queues=8, interrupt_mod=1)})
+    assert plan.empty
+    plan = rec.diff({"Ethernet": AdapterState(interrupt_mod=0)})
+    assert plan.adapters == {"Ethernet": {"interrupt_mod": "Disabled"}}
+
+def test_inverse_restores_the_original_state():
+    backend, rec = make()
+    before = dict(backend.adapters), dict(backend.tcpip)
+    plan, _ = rec.apply(GAMING, TCPIP)
+    assert rec.execute(plan.inverse()).ok
+    assert (backend.adapters, backend.tcpip) == before
+    backend.calls.clear()
+    assert rec.diff({n: s for n, s in before[0].items()}, before[1]).empty and backend.calls == []
+
+def test_subset_keeps_only_named_adapters():
+    plan = ApplyPlan({"A": {"queues": 4}, "B": {"queues": 2}}, {"A": {"queues": 8}, "B": {"queues": 8}}, {"MaxNumRSSQueues": 4}, {"MaxNumRSSQueues": 8})
+    sub = plan.subset(["B"])
+    assert sub.adapters == {"B": {"queues": 2}} and sub.tcpip == {}
+    assert plan.subset(["A"], include_tcpip=True).tcpip == {"MaxNumRSSQueues": 4}
+
+def test_failed_write_is_forgotten_and_re_read():
+    class Flaky(FakeAdapterBackend):
+        fail = True
+        def set_adapter(self, name, changes):
+            if self.fail and name == "WiFi":
+                self.calls.append(("set_adapter", name, dict(changes)))
+                return False
+            return super().set_adapter(name, changes)
+
+    backend = Flaky({"WiFi": AdapterState(0, 8, "Closest", 2, "Enabled", 0)})
+    rec = StateReconciler(backend)
+    result = rec.execute(rec.diff({"WiFi": GAMING["WiFi"]}))
+    assert not result.ok and result.failed == ["WiFi"]
+    assert rec.observed("WiFi") is None
+    backend.fail = False
+    backend.calls.clear()
+    plan, ok = rec.apply({"WiFi": GAMING["WiFi"]})
+    assert ok and backend.calls[0][0] == "read_adapters"
+
+def test_refresh_picks_up_outside_changes():
+    backend, rec = make()
+    rec.apply(GAMING, TCPIP)
+    backend.adapters["Ethernet"] = AdapterState(0, 8, "Closest", 8, "Enabled", 0)  # Someone else changed it
+    assert rec.diff(GAMING).empty
+    rec.refresh()
+    assert set(rec.diff(GAMING).adapters) == {"Ethernet"}
+
+def test_normalize_im():
+    assert [normalize_im(v) for v in (None, 1, 0, "Enabled")] == [None, "Enabled", "Disabled", "Enabled"]
@@ -0,0 +1,44 @@
+"""The telemetry sampler turns cumulative per-CPU times into percentages and keeps to its requested rate."""
+
+import time
+
+from src.telemetry import RingBuffer, TelemetrySampler
+
+def counting_source(cpus=2, step=(0.01, 0.005, 0.02)):
+    totals = [[0.0, 0.0, 0.0] for _ in range(cpus)]
+
+    def read():
+        for row in totals:
+            for i, inc in enumerate(step): row[i] += inc
+        return [tuple(row) for row in totals]
+    return read
+
+def test_ring_keeps_only_the_newest_rows():
+    ring = RingBuffer(3, 2)
+    for v in range(5): ring.push([v, 10 * v])
+    assert ring.count == 3 and ring.latest() == [4.0, 40.0]
+    assert ring.mean(2) == [3.5, 35.0]
+    assert ring.mean(10) == [3.0, 30.0]
+
+def test_sample_reports_percent_of_one_cpu():
+    clock = [0.0]
+    sampler = TelemetrySampler(source=counting_source(), clock=lambda: clock[0])
+    for _ in range(3):
+        clock[0] += 0.1
+        sampler.sample()
+    heat = sampler.heat(1.0)
+    assert [round(h, 3) for h in heat] == [15.0, 15.0]  # (0.01 + 0.005) s per 0.1 s
+    assert [round(v, 3) for v in sampler.load(1.0, user_weight=0.5)] == [25.0, 25.0]
+
+def test_rate_recovery_never_exceeds_the_requested_rate():
+    sampler = TelemetrySampler(hz=4.0, seconds=10.0, budget=100.0, source=counting_source()).start()
+    time.sleep(1.8)  # Past the 1 s warm-up, with overhead far under budget
+    sampler.stop()
+    assert sampler.max_hz == 4.0 and sampler.hz <= 4.0
+    assert sampler.interrupt.capacity == 40
+
+def test_rate_backs_off_when_over_budget():
+    sampler = TelemetrySampler(hz=10.0, budget=0.0, source=counting_source()).start()
+    time.sleep(1.6)
+    sampler.stop()
+    assert sampler.hz < sampler.max_hz
@@ -0,0 +1,68 @@
+"""parse_slpi_ex on SLPI_EX fixture blobs, runnable on any OS.
+
+The fixtures under fixtures/slpi_ex/ are raw GetLogicalProcessorInformationEx(RelationAll)
+buffers in the x64 layout. To add a machine, write `read_slpi_ex()` to a .bin file there.
+"""
+
+import os
+import struct
+
+import pytest
+
+from src.topology import RELATION_GROUP, encode_slpi_ex, flat_topology, parse_slpi_ex
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "slpi_ex")
+
+def load(name):
+    with open(os.path.join(FIXTURES, name + ".bin"), "rb") as f: return parse_slpi_ex(f.read())
+
+def bits(lo, hi): return ((1 << (hi - lo)) - 1) << lo
+
+def test_hybrid_smt_p_cores_and_e_cores():
+    topo = load("hybrid_8p4e")
+    assert (topo.logical, topo.physical, topo.smt, topo.hybrid) == (20, 12, True, True)
+    assert topo.performance_mask == bits(0, 16) and topo.performance_cores == 8
+    assert topo.siblings(5) == 0b110000 and topo.siblings(17) == 1 << 17
+    assert topo.efficiency_class(3) == 1 and topo.efficiency_class(18) == 0
+    assert topo.cache_domains == [bits(0, 20)]
+    info = topo.as_dict()
+    assert info["p_core_indices"] == list(range(16)) and info["ht"] and info["groups"] == [20]
+
+def test_two_l3_domains_split_placement():
+    topo = load("two_ccd_16c32t")
+    assert (topo.logical, topo.physical, topo.hybrid) == (32, 16, False)
+    assert topo.cache_domains == [bits(0, 16), bits(16, 32)]
+    assert topo.placement_segments() == [(0, 16), (16, 32)]
+    assert topo.performance_mask == bits(0, 32)
+
+def test_dual_socket_uses_global_numbering_across_groups():
+    topo = load("dual_socket_128")
+    assert topo.group_sizes == [64, 64] and topo.logical == 128 and not topo.smt
+    assert topo.packages == [bits(0, 64), bits(64, 128)]
+    assert topo.numa_nodes == {0: bits(0, 64), 1: bits(64, 128)}
+    assert topo.siblings(100) == 1 << 100
+    assert len(topo.cache_domains) == 16 and topo.placement_segments()[-1] == (120, 128)
+    assert topo.as_dict()["numa_nodes"] == 2
+
+@pytest.mark.parametrize("name", ["hybrid_8p4e", "two_ccd_16c32t", "dual_socket_128"])
+def test_encode_round_trips(name):
+    with open(os.path.join(FIXTURES, name + ".bin"), "rb") as f: blob = f.read()
+    assert encode_slpi_ex(parse_slpi_ex(blob)) == blob
+
+def test_missing_group_record_falls_back_to_core_masks():
+    blob = encode_slpi_ex(flat_topology(4, 8))
+    records, offset = [], 0
+    while offset < len(blob):
+        relation, size = struct.unpack_from("<II", blob, offset)
+        if relation != RELATION_GROUP: records.append(blob[offset:offset + size])
+        offset += size
+    topo = parse_slpi_ex(b"".join(records))
+    assert topo.group_sizes == [8] and topo.physical == 4
+
+def test_corrupt_record_raises():
+    with pytest.raises(ValueError):
+        parse_slpi_ex(struct.pack("<II", 0, 4) + b"\0" * 8)
+
+def test_flat_topology():
+    topo = flat_topology(6, 12)
+    assert (topo.physical, topo.logical, topo.smt, topo.cache_domains) == (6, 12, True, [bits(0, 12)])
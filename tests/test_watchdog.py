@@ -0,0 +1,155 @@
+"""The watchdog rolls back through dry-run shells when Sentinel dies, hangs or stalls, and stays out of a clean exit."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from src.journal import SwitchJournal
+from src.rollback import prepare
+from src.state import ApplyPlan
+from src.shell import ShellPool
+from src.watchdog import HEARTBEAT_MARGIN, HEARTBEAT_STALE, serve, stale_after_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLAN = ApplyPlan({"Ethernet": {"base_proc": 0, "queues": 4, "interrupt_mod": "Enabled"}, "WiFi": {"interrupt_mod": "Enabled"}},
+                 {}, {"MaxNumRSSQueues": 4}, {})
+
+# A stand-in Sentinel: arms PLAN, then either exits cleanly, keeps its loop going, or lets it stall
+SENTINEL = r"""
+import json, os, sys, time
+from src.rollback import prepare
+from src.state import ApplyPlan
+from src.watchdog import WatchdogClient
+argv, mode = json.loads(sys.argv[1]), sys.argv[2]
+client = WatchdogClient(argv + ["--parent", str(os.getpid())], interval=0.1, stale_after=0.5)
+client.arm(prepare(ApplyPlan(**json.loads(sys.argv[3])), "GAMING"))
+print(client._proc.pid, flush=True)
+if mode == "exit":
+    client.close()
+    sys.exit()
+while True:
+    if mode == "loop": client.touch()
+    time.sleep(0.1)
+"""
+
+@pytest.fixture
+def work(tmp_path):
+    log, journal_path = str(tmp_path / "dry.log"), str(tmp_path / "journal.log")
+    journal = SwitchJournal(journal_path)
+    journal.begin("GAMING", ApplyPlan({"Ethernet": {"interrupt_mod": "Disabled"}}, {"Ethernet": {"interrupt_mod": "Enabled"}}))
+    journal.close()
+    return log, journal_path
+
+def logged(log):
+    try:
+        with open(log, encoding="utf-8") as f: return f.read()
+    except FileNotFoundError:
+        return ""
+
+def assert_rolled_back(log, journal_path):
+    text = logged(log)
+    assert "Ethernet" in text and "WiFi" in text and 'Tcpip {"MaxNumRSSQueues": 4}' in text
+    journal = SwitchJournal(journal_path)
+    assert journal.pending() is None and journal.originals().empty
+    journal.close()
+
+def assert_untouched(log, journal_path):
+    assert logged(log) == ""
+    journal = SwitchJournal(journal_path)
+    assert journal.pending() is not None
+    journal.close()
+
+def arm_line(plan=PLAN):
+    return json.dumps({"arm": prepare(plan, "GAMING").as_dict()}) + "\n"
+
+# --- In process ---
+
+def test_end_of_stream_runs_the_plan_and_resets_the_journal(work):
+    log, journal_path = work
+    assert serve(journal_path=journal_path, dry_run=log, stream=io.StringIO('{"beat":1}\n' + arm_line())) == "died"
+    assert_rolled_back(log, journal_path)
+
+def test_clean_exit_leaves_everything_alone(work):
+    log, journal_path = work
+    assert serve(journal_path=journal_path, dry_run=log, stream=io.StringIO(arm_line() + '{"exit":1}\n')) == "exit"
+    assert_untouched(log, journal_path)
+
+def test_disarmed_watchdog_has_nothing_to_restore(work):
+    log, journal_path = work
+    assert serve(journal_path=journal_path, dry_run=log, stream=io.StringIO(arm_line() + '{"disarm":1}\n')) == "died"
+    assert_untouched(log, journal_path)
+
+def test_silence_kills_the_parent_then_rolls_back(work):
+    log, journal_path = work
+    parent = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    r, w = os.pipe()
+    os.write(w, arm_line().encode("utf-8"))
+    stream = os.fdopen(r, encoding="utf-8")  # Stays open and silent, like a hung Sentinel
+    try:
+        assert serve(parent.pid, journal_path, timeout=0.5, dry_run=log, stream=stream) == "hung"
+        assert parent.wait(timeout=5) != 0
+    finally:
+        os.close(w)  # The reader thread sees end of file and lets go of the stream
+        if parent.poll() is None: parent.kill()
+        parent.wait()
+    time.sleep(0.1)
+    stream.close()
+    assert_rolled_back(log, journal_path)
+
+def test_stale_bound_covers_the_longest_phase():
+    assert stale_after_for(2.0, 61.5, 1.0) == 61.5 + HEARTBEAT_MARGIN
+    assert HEARTBEAT_STALE > ShellPool().timeout  # A shell batch that runs into its timeout still beats
+
+# --- A real Sentinel process ---
+
+def start_sentinel(work, mode):
+    log, journal_path = work
+    argv = [sys.executable, "-m", "src.watchdog", "--dry-run", log, "--journal", journal_path, "--timeout", "1.0"]
+    plan = {"adapters": PLAN.adapters, "previous": PLAN.previous, "tcpip": PLAN.tcpip, "tcpip_previous": PLAN.tcpip_previous}
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    child = subprocess.Popen([sys.executable, "-c", SENTINEL, json.dumps(argv), mode, json.dumps(plan)],
+                             stdout=subprocess.PIPE, text=True, env=env, cwd=ROOT)
+    watchdog = psutil.Process(int(child.stdout.readline()))
+    return child, watchdog
+
+def finish(child, watchdog, timeout=10.0):
+    """Waits for the watchdog and the Sentinel to leave. Returns the Sentinel's exit code, or None if it had to be killed."""
+    try:
+        watchdog.wait(timeout=timeout)
+        return child.wait(timeout=5)
+    except (psutil.TimeoutExpired, subprocess.TimeoutExpired):
+        return None
+    finally:
+        if child.poll() is None: child.kill()
+        child.wait()
+        child.stdout.close()
+
+def test_killed_sentinel_is_rolled_back(work):
+    child, watchdog = start_sentinel(work, "loop")
+    time.sleep(1.0)  # Let the watchdog start its dry-run shells
+    child.kill()
+    finish(child, watchdog)
+    assert_rolled_back(*work)
+
+def test_frozen_sentinel_is_killed_and_rolled_back(work):
+    child, watchdog = start_sentinel(work, "loop")
+    time.sleep(1.0)
+    psutil.Process(child.pid).suspend()
+    assert finish(child, watchdog) not in (None, 0)  # Killed by the watchdog
+    assert_rolled_back(*work)
+
+def test_stalled_loop_stops_the_heartbeat(work):
+    child, watchdog = start_sentinel(work, "stall")  # Alive, beat thread running, but the loop never touches
+    assert finish(child, watchdog) not in (None, 0)
+    assert_rolled_back(*work)
+
+def test_clean_exit_is_not_rolled_back(work):
+    child, watchdog = start_sentinel(work, "exit")
+    assert finish(child, watchdog) == 0
+    assert_untouched(*work)